@@ -3,8 +3,13 @@ from .polymarket_data import PolymarketDataAPI
 from .polymarket_clob import PolymarketCLOBAPI
 from .lifi_bridge import LifiBridgeAPI
 from .price_tracker import PriceTracker
+from .errors import (
+    APIError, APITimeoutError, APIConnectionError, APIStatusError,
+    APIRateLimitError, CircuitOpenError
+)
 
 __all__ = [
     'PolymarketGammaAPI', 'PolymarketDataAPI', 'PolymarketCLOBAPI',
-    'LifiBridgeAPI', 'PriceTracker'
+    'LifiBridgeAPI', 'PriceTracker', 'APIError', 'APITimeoutError',
+    'APIConnectionError', 'APIStatusError', 'APIRateLimitError', 'CircuitOpenError'
 ]
@@ -0,0 +1,78 @@
+"""
+Single-flight coalescing for identical upstream GETs.
+
+Concurrent callers asking for the same resource share one in-flight request,
+and its result is kept for a short time so a burst arriving just after it
+completes is answered without another round trip.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class RequestCoalescer:
+    """Shares in-flight requests by key and micro-caches their results."""
+
+    def __init__(self, ttl: float = 1.0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._recent: Dict[Hashable, Tuple[float, Any]] = {}
+        self.metrics = {
+            'lookups': 0,
+            'micro_hits': 0,
+            'merged': 0,
+            'fetches': 0
+        }
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result for ``key``, fetching it at most once at a time."""
+        self.metrics['lookups'] += 1
+
+        cached = self._recent.get(key)
+        if cached is not None:
+            expires, value = cached
+            if time.monotonic() < expires:
+                self.metrics['micro_hits'] += 1
+                return value
+            del self._recent[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.metrics['merged'] += 1
+        else:
+            self.metrics['fetches'] += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        # A cancelled caller must not cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or self.ttl <= 0:
+            return
+        if len(self._recent) >= self.max_entries:
+            self._prune()
+        self._recent[key] = (time.monotonic() + self.ttl, task.result())
+
+    def _prune(self):
+        now = time.monotonic()
+        for key in [key for key, (expires, _) in self._recent.items() if expires <= now]:
+            del self._recent[key]
+        while len(self._recent) >= self.max_entries:
+            # Dicts keep insertion order, so this drops the oldest entry
+            del self._recent[next(iter(self._recent))]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        lookups = self.metrics['lookups']
+        return {
+            **self.metrics,
+            'hit_rate': round(self.metrics['micro_hits'] / lookups, 3) if lookups else 0.0,
+            'merge_rate': round(self.metrics['merged'] / lookups, 3) if lookups else 0.0,
+            'in_flight': len(self._inflight),
+            'cached': len(self._recent)
+        }
@@ -0,0 +1,61 @@
+from typing import Any, Optional
+
+class APIError(Exception):
+    """Base error for upstream API failures."""
+
+    def __init__(self, message: str, upstream: str = None, endpoint: str = None):
+        super().__init__(message)
+        self.upstream = upstream
+        self.endpoint = endpoint
+
+    @property
+    def retryable(self) -> bool:
+        """Whether repeating the same request may succeed."""
+        return False
+
+class APITimeoutError(APIError):
+    """The upstream did not answer within the endpoint's timeout."""
+
+    @property
+    def retryable(self) -> bool:
+        return True
+
+class APIConnectionError(APIError):
+    """The upstream could not be reached."""
+
+    @property
+    def retryable(self) -> bool:
+        return True
+
+class APIStatusError(APIError):
+    """The upstream answered with a non-success HTTP status."""
+
+    def __init__(self, message: str, status: int, body: Any = None,
+                 upstream: str = None, endpoint: str = None):
+        super().__init__(message, upstream, endpoint)
+        self.status = status
+        self.body = body
+
+    @property
+    def retryable(self) -> bool:
+        return self.status >= 500
+
+class APIRateLimitError(APIStatusError):
+    """The upstream rejected the request with 429 Too Many Requests."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, body: Any = None,
+                 upstream: str = None, endpoint: str = None):
+        super().__init__(message, 429, body, upstream, endpoint)
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return True
+
+class CircuitOpenError(APIError):
+    """The upstream's circuit breaker is open and no cached response exists."""
+
+    def __init__(self, message: str, retry_in: float = 0.0,
+                 upstream: str = None, endpoint: str = None):
+        super().__init__(message, upstream, endpoint)
+        self.retry_in = retry_in
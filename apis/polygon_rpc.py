@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Optional, Tuple
+from config import Config
+from .errors import APIError
+from .resilience import ResilientClient
+
+class PolygonRPC:
+    """JSON-RPC client for the Polygon node."""
+
+    # Per-endpoint timeouts in seconds
+    TIMEOUTS = {
+        'default': 10.0,
+        'batch': 20.0
+    }
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url or Config.POLYGON_RPC_URL
+        self.client = ResilientClient('rpc', self.url, {'Content-Type': 'application/json'}, self.TIMEOUTS)
+        self._next_id = 0
+
+    def _payload(self, method: str, params: List) -> Dict:
+        self._next_id += 1
+        return {'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': params}
+
+    @staticmethod
+    def _result(response: Dict, method: str) -> Any:
+        if 'error' in response:
+            raise APIError(f"{method} failed: {response['error'].get('message')}", 'rpc', method)
+        return response.get('result')
+
+    async def call(self, method: str, params: Optional[List] = None) -> Any:
+        """Send one JSON-RPC request; reads are retried like idempotent GETs."""
+        response = await self.client.request('POST', '', method, json=self._payload(method, params or []),
+                                             error=f"{method} failed", idempotent=True)
+        return self._result(response, method)
+
+    async def batch(self, calls: List[Tuple[str, List]]) -> List[Any]:
+        """Send several JSON-RPC requests in one HTTP round trip; results in call order."""
+        if not calls:
+            return []
+        payloads = [self._payload(method, params) for method, params in calls]
+        responses = await self.client.request('POST', '', 'batch', json=payloads,
+                                              error="RPC batch failed", idempotent=True)
+        by_id = {response.get('id'): response for response in responses}
+        return [self._result(by_id.get(payload['id'], {'error': {'message': 'missing response'}}),
+                             payload['method'])
+                for payload in payloads]
+
+    async def block_number(self) -> int:
+        return int(await self.call('eth_blockNumber'), 16)
@@ -1,12 +1,19 @@
-import aiohttp
 import asyncio
 import websockets
 import json
 from typing import Dict, List, Optional, Any, Callable
 from config import Config
+from .resilience import ResilientClient
 
 class PolymarketCLOBAPI:
     """Polymarket CLOB API client for orderbook and prices."""
+
+    # Per-endpoint timeouts in seconds; quotes go stale quickly
+    TIMEOUTS = {
+        'default': 5.0,
+        'orderbook': 3.0,
+        'best_bid_ask': 3.0
+    }
     
     def __init__(self):
         self.base_url = Config.POLYMARKET_CLOB_API_URL
@@ -16,63 +23,31 @@ class PolymarketCLOBAPI:
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        self.client = ResilientClient('clob', self.base_url, self.headers, self.TIMEOUTS,
+                                     api_key=self.api_key)
     
     async def get_orderbook(self, market_id: str) -> Dict:
         """Get orderbook for a market."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/orderbook/{market_id}"
-            
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"Orderbook fetch failed: {response.status}")
+        return await self.client.get(f"/orderbook/{market_id}", 'orderbook', error="Orderbook fetch failed")
     
     async def get_market_prices(self, market_id: str) -> Dict:
         """Get current market prices."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/markets/{market_id}/prices"
-            
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"Market prices fetch failed: {response.status}")
+        return await self.client.get(f"/markets/{market_id}/prices", 'prices', error="Market prices fetch failed")
     
     async def get_ticker(self, market_id: str) -> Dict:
         """Get market ticker data."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/ticker/{market_id}"
-            
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"Ticker fetch failed: {response.status}")
+        return await self.client.get(f"/ticker/{market_id}", 'ticker', error="Ticker fetch failed")
     
     async def get_recent_trades(self, market_id: str, limit: int = 50) -> List[Dict]:
         """Get recent trades for a market."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/markets/{market_id}/trades"
-            params = {'limit': limit}
-            
-            async with session.get(url, headers=self.headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data', [])
-                else:
-                    raise Exception(f"Recent trades fetch failed: {response.status}")
+        params = {'limit': limit}
+        data = await self.client.get(f"/markets/{market_id}/trades", 'recent_trades', params,
+                                     error="Recent trades fetch failed")
+        return data.get('data', [])
     
     async def get_market_stats(self, market_id: str) -> Dict:
         """Get market statistics."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/markets/{market_id}/stats"
-            
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"Market stats fetch failed: {response.status}")
+        return await self.client.get(f"/markets/{market_id}/stats", 'stats', error="Market stats fetch failed")
     
     async def subscribe_to_orderbook(self, market_id: str, callback: Callable):
         """Subscribe to orderbook updates via WebSocket."""
@@ -136,22 +111,8 @@ class PolymarketCLOBAPI:
     
     async def get_market_depth(self, market_id: str) -> Dict:
         """Get market depth (bids and asks)."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/markets/{market_id}/depth"
-            
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"Market depth fetch failed: {response.status}")
+        return await self.client.get(f"/markets/{market_id}/depth", 'depth', error="Market depth fetch failed")
     
     async def get_best_bid_ask(self, market_id: str) -> Dict:
         """Get best bid and ask prices."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/markets/{market_id}/best"
-            
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"Best bid/ask fetch failed: {response.status}")
+        return await self.client.get(f"/markets/{market_id}/best", 'best_bid_ask', error="Best bid/ask fetch failed")
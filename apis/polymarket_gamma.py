@@ -1,11 +1,27 @@
-import aiohttp
 import asyncio
 from typing import Dict, List, Optional, Any
 from config import Config
+from .resilience import ResilientClient
+from .response_cache import CachePolicy
 
 class PolymarketGammaAPI:
     """Polymarket Gamma API client for events, markets, sports, search, and orders."""
-    
+
+    # Per-endpoint timeouts in seconds
+    TIMEOUTS = {
+        'default': 10.0,
+        'search': 5.0,
+        'market': 5.0,
+        'orders': 15.0
+    }
+
+    # Fresh for ttl seconds, then served stale while refreshing for stale_ttl more
+    CACHE_POLICIES = {
+        'market': CachePolicy(ttl=30, stale_ttl=300),
+        'events': CachePolicy(ttl=60, stale_ttl=600),
+        'sports_events': CachePolicy(ttl=60, stale_ttl=600)
+    }
+
     def __init__(self):
         self.base_url = Config.POLYMARKET_GAMMA_API_URL
         self.api_key = Config.POLYMARKET_API_KEY
@@ -13,121 +29,60 @@ class PolymarketGammaAPI:
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
-    
+        self.client = ResilientClient('gamma', self.base_url, self.headers, self.TIMEOUTS,
+                                     api_key=self.api_key, cache_policies=self.CACHE_POLICIES)
+
     async def search_markets(self, query: str, limit: int = 20) -> List[Dict]:
         """Search for markets by query."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/markets/search"
-            params = {
-                'query': query,
-                'limit': limit,
-                'active': True
-            }
-            
-            async with session.get(url, headers=self.headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data', [])
-                else:
-                    raise Exception(f"Search failed: {response.status}")
-    
+        params = {
+            'query': query,
+            'limit': limit,
+            'active': True
+        }
+        data = await self.client.get("/markets/search", 'search', params, error="Search failed")
+        return data.get('data', [])
+
     async def get_market_details(self, market_id: str) -> Dict:
         """Get detailed information about a specific market."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/markets/{market_id}"
-            
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"Market details failed: {response.status}")
-    
+        return await self.client.get(f"/markets/{market_id}", 'market', error="Market details failed")
+
     async def get_events(self, limit: int = 50) -> List[Dict]:
         """Get list of events."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/events"
-            params = {'limit': limit, 'active': True}
-            
-            async with session.get(url, headers=self.headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data', [])
-                else:
-                    raise Exception(f"Events fetch failed: {response.status}")
-    
+        params = {'limit': limit, 'active': True}
+        data = await self.client.get("/events", 'events', params, error="Events fetch failed")
+        return data.get('data', [])
+
     async def get_sports_events(self, sport: str = None) -> List[Dict]:
         """Get sports events."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/sports/events"
-            params = {}
-            if sport:
-                params['sport'] = sport
-            
-            async with session.get(url, headers=self.headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data', [])
-                else:
-                    raise Exception(f"Sports events fetch failed: {response.status}")
-    
+        params = {}
+        if sport:
+            params['sport'] = sport
+
+        data = await self.client.get("/sports/events", 'sports_events', params, error="Sports events fetch failed")
+        return data.get('data', [])
+
     async def place_limit_order(self, order_data: Dict) -> Dict:
         """Place a limit order."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/orders/limit"
-            
-            async with session.post(url, headers=self.headers, json=order_data) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_data = await response.json()
-                    raise Exception(f"Limit order failed: {error_data}")
-    
+        return await self.client.post("/orders/limit", 'orders', order_data, error="Limit order failed")
+
     async def place_market_order(self, order_data: Dict) -> Dict:
         """Place a market order."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/orders/market"
-            
-            async with session.post(url, headers=self.headers, json=order_data) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_data = await response.json()
-                    raise Exception(f"Market order failed: {error_data}")
-    
+        return await self.client.post("/orders/market", 'orders', order_data, error="Market order failed")
+
     async def cancel_order(self, order_id: str) -> Dict:
         """Cancel an order."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/orders/{order_id}/cancel"
-            
-            async with session.post(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_data = await response.json()
-                    raise Exception(f"Cancel order failed: {error_data}")
-    
+        return await self.client.post(f"/orders/{order_id}/cancel", 'orders', error="Cancel order failed")
+
     async def get_user_orders(self, user_address: str, status: str = None) -> List[Dict]:
         """Get user's orders."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/orders/user/{user_address}"
-            params = {}
-            if status:
-                params['status'] = status
-            
-            async with session.get(url, headers=self.headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data', [])
-                else:
-                    raise Exception(f"User orders fetch failed: {response.status}")
-    
+        params = {}
+        if status:
+            params['status'] = status
+
+        data = await self.client.get(f"/orders/user/{user_address}", 'user_orders', params,
+                                     error="User orders fetch failed")
+        return data.get('data', [])
+
     async def get_order_status(self, order_id: str) -> Dict:
         """Get order status."""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/orders/{order_id}"
-            
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    raise Exception(f"Order status fetch failed: {response.status}")
+        return await self.client.get(f"/orders/{order_id}", 'order_status', error="Order status fetch failed")
@@ -1,10 +1,11 @@
-import aiohttp
 import asyncio
 import websockets
 import json
 from typing import Dict, List, Optional, Any, Callable
 from datetime import datetime
 from config import Config
+from .resilience import ResilientClient
+from .rate_limiter import background_requests
 
 class PriceTracker:
     """Price tracking service for tokens and markets."""
@@ -13,40 +14,32 @@ class PriceTracker:
         self.prices = {}
         self.subscribers = []
         self.is_running = False
+        self.price_client = ResilientClient('coingecko', 'https://api.coingecko.com/api/v3', timeouts={'default': 5.0})
     
     async def get_token_price(self, symbol: str) -> Optional[Dict]:
         """Get current price for a token."""
-        # This would typically fetch from a price API like CoinGecko or CoinMarketCap
-        # For now, we'll use a mock implementation
-        price_apis = {
-            'POL': 'https://api.coingecko.com/api/v3/simple/price?ids=polymarket&vs_currencies=usd',
-            'ETH': 'https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd',
-            'SOL': 'https://api.coingecko.com/api/v3/simple/price?ids=solana&vs_currencies=usd',
-            'USDC': 'https://api.coingecko.com/api/v3/simple/price?ids=usd-coin&vs_currencies=usd'
+        # CoinGecko ids for the supported symbols
+        token_ids = {
+            'POL': 'polymarket',
+            'ETH': 'ethereum',
+            'SOL': 'solana',
+            'USDC': 'usd-coin'
         }
         
-        if symbol not in price_apis:
+        if symbol not in token_ids:
             return None
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(price_apis[symbol]) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        token_id = 'polymarket' if symbol == 'POL' else symbol.lower()
-                        if symbol == 'USDC':
-                            token_id = 'usd-coin'
-                        elif symbol == 'ETH':
-                            token_id = 'ethereum'
-                        elif symbol == 'SOL':
-                            token_id = 'solana'
-                        
-                        price_data = data.get(token_id, {})
-                        return {
-                            'symbol': symbol,
-                            'price_usd': price_data.get('usd', 0),
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
+            token_id = token_ids[symbol]
+            params = {'ids': token_id, 'vs_currencies': 'usd'}
+            data = await self.price_client.get("/simple/price", 'simple_price', params,
+                                               error="Price fetch failed")
+            price_data = data.get(token_id, {})
+            return {
+                'symbol': symbol,
+                'price_usd': price_data.get('usd', 0),
+                'timestamp': datetime.utcnow().isoformat()
+            }
         except Exception as e:
             print(f"Error fetching price for {symbol}: {e}")
             return None
@@ -76,7 +69,9 @@ class PriceTracker:
         
         while self.is_running:
             try:
-                prices = await self.get_multiple_prices(symbols)
+                # Periodic refresh yields to user-facing requests
+                with background_requests():
+                    prices = await self.get_multiple_prices(symbols)
                 self.prices.update(prices)
                 
                 # Notify subscribers
@@ -0,0 +1,174 @@
+"""
+Client-side rate limiting for upstream APIs.
+
+Requests queue for a token instead of being sent into a 429. Waiters are
+served by priority, so user-facing calls overtake background sync. A 429
+pauses the bucket for the advertised Retry-After and halves its rate; the
+rate creeps back to the configured budget as requests succeed.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+PRIORITY_NAMES = {
+    PRIORITY_USER: 'user',
+    PRIORITY_BACKGROUND: 'background'
+}
+
+# Never throttle below this fraction of the configured rate
+MIN_RATE_FACTOR = 0.1
+# Fraction of the configured rate recovered per successful request
+RECOVERY_STEP = 0.05
+# Pause used when a 429 carries no Retry-After header
+DEFAULT_PENALTY = 1.0
+
+_request_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    'request_priority', default=PRIORITY_USER
+)
+
+
+def current_priority() -> int:
+    """Priority of requests made from the current task."""
+    return _request_priority.get()
+
+
+@contextmanager
+def background_requests():
+    """Mark every API request made inside the block as background work."""
+    token = _request_priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class RateLimiter:
+    """Async token bucket with priority-ordered waiters and 429 back-off."""
+
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("`rate` must be positive")
+        self.name = name
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.metrics = {
+            'acquired': 0,
+            'delayed': 0,
+            'throttled': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+        self.wait_ms_by_priority: Dict[int, float] = {}
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _delay(self, now: float) -> float:
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self, priority: int = PRIORITY_USER) -> float:
+        """Wait for a token; returns the seconds spent waiting."""
+        now = time.monotonic()
+        self._refill(now)
+        if not self._waiters and self._delay(now) == 0.0:
+            self.tokens -= 1
+            self._record(priority, 0.0)
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before cancellation; hand the token back
+                self.tokens = min(self.capacity, self.tokens + 1)
+                self._schedule()
+            raise
+        waited = time.monotonic() - now
+        self._record(priority, waited)
+        return waited
+
+    def _record(self, priority: int, waited: float):
+        waited_ms = waited * 1000
+        self.metrics['acquired'] += 1
+        if waited_ms > 0:
+            self.metrics['delayed'] += 1
+        self.metrics['total_wait_ms'] += waited_ms
+        self.metrics['max_wait_ms'] = max(self.metrics['max_wait_ms'], waited_ms)
+        self.wait_ms_by_priority[priority] = self.wait_ms_by_priority.get(priority, 0.0) + waited_ms
+
+    def _schedule(self):
+        if self._timer is not None or not self._waiters:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        self._timer = asyncio.get_running_loop().call_later(self._delay(now), self._drain)
+
+    def _drain(self):
+        self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and self._delay(now) == 0.0:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+        self._schedule()
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """Back off after a 429: pause for Retry-After and halve the rate."""
+        now = time.monotonic()
+        self._refill(now)
+        self.metrics['throttled'] += 1
+        self.paused_until = max(self.paused_until, now + (retry_after if retry_after is not None else DEFAULT_PENALTY))
+        self.rate = max(self.base_rate * MIN_RATE_FACTOR, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._waiters:
+            self._schedule()
+
+    def record_success(self):
+        """Recover the rate gradually after a back-off."""
+        if self.rate < self.base_rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_STEP)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        acquired = self.metrics['acquired']
+        return {
+            **self.metrics,
+            'avg_wait_ms': round(self.metrics['total_wait_ms'] / acquired, 2) if acquired else 0.0,
+            'wait_ms_by_priority': {
+                PRIORITY_NAMES.get(priority, str(priority)): round(total, 2)
+                for priority, total in self.wait_ms_by_priority.items()
+            },
+            'rate': round(self.rate, 3),
+            'configured_rate': self.base_rate,
+            'queued': sum(1 for _, _, future in self._waiters if not future.done()),
+            'paused_for': round(max(0.0, self.paused_until - time.monotonic()), 2)
+        }
@@ -0,0 +1,445 @@
+"""
+Shared resilience layer for the HTTP API clients.
+
+Every client talks to its upstream through a ``ResilientClient``. Clients
+for the same upstream share one ``Upstream``: a single aiohttp session, one
+circuit breaker, a rate limiter for the host, a coalescer that merges
+identical concurrent GETs and a small cache of last-good GET responses. The
+cache is served while the breaker is open or when retries run out. Clients
+using the same API key also share a per-key rate limiter. Endpoints with a
+``CachePolicy`` are read through the stale-while-revalidate response cache.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from config import Config
+from .errors import (
+    APIError, APITimeoutError, APIConnectionError, APIStatusError,
+    APIRateLimitError, CircuitOpenError
+)
+from .coalescing import RequestCoalescer
+from .rate_limiter import RateLimiter, background_requests, current_priority
+from .response_cache import CacheEntry, CachePolicy, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Returned by _send when a conditional GET is answered with 304
+NOT_MODIFIED = object()
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, used for idempotent requests only."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 5.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number ``attempt`` (0-based)."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            return max(backoff, retry_after)
+        return backoff
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a probe through."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def release_probe(self):
+        """Let another probe through after one was abandoned."""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self.failures += 1
+        if self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+
+
+class Upstream:
+    """State shared by every client of one upstream service."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float,
+                 rate_limit: float, cache_size: int = 1000):
+        self.name = name
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        # Allow a few requests in a burst even on slow budgets (a menu needs several)
+        self.limiter = RateLimiter(name, rate_limit, burst=max(3.0, rate_limit))
+        self.coalescer = RequestCoalescer(Config.API_MICRO_CACHE_TTL)
+        self.cache_size = cache_size
+        self.fallback_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self.created_at = time.monotonic()
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+        self.metrics = {
+            'requests': 0,
+            'failures': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'short_circuited': 0,
+            'fallback_served': 0,
+            'rate_limited': 0
+        }
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the shared session, recreating it if closed or from another loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession()
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def remember(self, key: Tuple, value: Any):
+        self.fallback_cache[key] = value
+        self.fallback_cache.move_to_end(key)
+        if len(self.fallback_cache) > self.cache_size:
+            self.fallback_cache.popitem(last=False)
+
+    def staleness(self) -> float:
+        """Seconds since the last success while requests have been failing; 0 when healthy or idle."""
+        if self.last_failure is None or (self.last_success or 0) >= self.last_failure:
+            return 0.0
+        return time.monotonic() - (self.last_success or self.created_at)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'stale_for': round(self.staleness(), 1),
+            'breaker_state': self.breaker.state,
+            'breaker_failures': self.breaker.failures,
+            'breaker_opened': self.breaker.times_opened,
+            'breaker_retry_in': round(self.breaker.retry_in(), 1),
+            'cached_responses': len(self.fallback_cache),
+            'rate_limiter': self.limiter.get_metrics(),
+            'coalescing': self.coalescer.get_metrics()
+        }
+
+
+_upstreams: Dict[str, Upstream] = {}
+_key_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_upstream(name: str) -> Upstream:
+    """Return the shared state for an upstream, creating it on first use."""
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        upstream = Upstream(
+            name, Config.API_BREAKER_FAILURE_THRESHOLD, Config.API_BREAKER_RESET_TIMEOUT,
+            Config.API_RATE_LIMITS.get(name, Config.API_DEFAULT_RATE_LIMIT)
+        )
+        _upstreams[name] = upstream
+    return upstream
+
+
+def get_key_limiter(api_key: str) -> RateLimiter:
+    """Return the limiter shared by every client using this API key."""
+    # Never expose the key itself in metrics
+    name = 'key-' + hashlib.sha256(api_key.encode()).hexdigest()[:8]
+    limiter = _key_limiters.get(name)
+    if limiter is None:
+        limiter = RateLimiter(name, Config.API_KEY_RATE_LIMIT)
+        _key_limiters[name] = limiter
+    return limiter
+
+
+async def close_upstreams():
+    """Close every shared session; registered as a runtime shutdown hook."""
+    for upstream in _upstreams.values():
+        await upstream.close()
+
+
+def get_upstream_metrics() -> Dict[str, Dict[str, Any]]:
+    """Breaker state and counters for every upstream."""
+    return {name: upstream.get_metrics() for name, upstream in _upstreams.items()}
+
+
+def get_key_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Added wait time and back-off state for every API key budget."""
+    return {name: limiter.get_metrics() for name, limiter in _key_limiters.items()}
+
+
+def _normalize_params(params: Optional[Dict]) -> Optional[Dict]:
+    # aiohttp rejects bool query values; drop unset ones as well
+    if not params:
+        return params
+    return {
+        key: ('true' if value else 'false') if isinstance(value, bool) else value
+        for key, value in params.items() if value is not None
+    }
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class ResilientClient:
+    """HTTP client for one upstream with per-endpoint timeouts, retries and a breaker."""
+
+    def __init__(self, upstream: str, base_url: str, headers: Optional[Dict[str, str]] = None,
+                 timeouts: Optional[Dict[str, float]] = None, retry_policy: Optional[RetryPolicy] = None,
+                 api_key: Optional[str] = None, cache_policies: Optional[Dict[str, CachePolicy]] = None):
+        self.upstream = get_upstream(upstream)
+        self.cache_policies = cache_policies or {}
+        self.key_limiter = get_key_limiter(api_key) if api_key else None
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.timeouts = timeouts or {}
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=Config.API_RETRY_ATTEMPTS)
+
+    def timeout_for(self, endpoint: str) -> float:
+        return self.timeouts.get(endpoint, self.timeouts.get('default', Config.API_DEFAULT_TIMEOUT))
+
+    async def get(self, path: str, endpoint: str, params: Optional[Dict] = None,
+                  error: str = 'Request failed', priority: Optional[int] = None) -> Any:
+        """GET with retries; identical concurrent GETs share one request."""
+        params = _normalize_params(params)
+        key = (self.base_url, path, tuple(sorted((params or {}).items())))
+        policy = self.cache_policies.get(endpoint)
+        if policy is None:
+            return await self.upstream.coalescer.run(
+                key,
+                lambda: self.request('GET', path, endpoint, params=params, error=error,
+                                     idempotent=True, priority=priority)
+            )
+
+        cache = get_response_cache()
+        entry = await cache.get(key)
+        if entry is not None:
+            age = entry.age()
+            if age < policy.ttl:
+                cache.metrics['fresh_hits'] += 1
+                return entry.value
+            if age < policy.ttl + policy.stale_ttl:
+                cache.metrics['stale_hits'] += 1
+                cache.refresh(key, lambda: self._refresh(key, path, endpoint, params, error, policy))
+                return entry.value
+
+        cache.metrics['misses'] += 1
+        return await self.upstream.coalescer.run(
+            key, lambda: self._revalidate(key, path, endpoint, params, error, policy, entry, priority)
+        )
+
+    async def _refresh(self, key, path, endpoint, params, error, policy):
+        with background_requests():
+            # Re-read: a foreground miss may have refreshed the entry meanwhile
+            entry = await get_response_cache().get(key)
+            await self.upstream.coalescer.run(
+                key, lambda: self._revalidate(key, path, endpoint, params, error, policy, entry, None)
+            )
+
+    async def _revalidate(self, key, path: str, endpoint: str, params: Optional[Dict], error: str,
+                          policy: CachePolicy, entry: Optional[CacheEntry], priority: Optional[int]) -> Any:
+        """Fetch into the response cache, sending If-None-Match when an ETag is known."""
+        cache = get_response_cache()
+        etag = entry.etag if entry is not None else None
+        value, etag = await self._request('GET', path, endpoint, params=params, error=error,
+                                          idempotent=True, priority=priority, etag=etag)
+        if value is NOT_MODIFIED:
+            cache.metrics['not_modified'] += 1
+            value = entry.value
+        fetched_at = time.time()
+        await cache.set(key, CacheEntry(value, etag, fetched_at, fetched_at + policy.ttl + policy.stale_ttl))
+        return value
+
+    async def post(self, path: str, endpoint: str, json: Optional[Dict] = None,
+                   error: str = 'Request failed', priority: Optional[int] = None) -> Any:
+        """POST without retries; never served from cache."""
+        return await self.request('POST', path, endpoint, json=json, error=error,
+                                  idempotent=False, priority=priority)
+
+    async def _throttle(self, priority: int):
+        # Host budget first, then the budget shared by everything using this key
+        await self.upstream.limiter.acquire(priority)
+        if self.key_limiter is not None:
+            await self.key_limiter.acquire(priority)
+
+    async def request(self, method: str, path: str, endpoint: str, params: Optional[Dict] = None,
+                      json: Optional[Dict] = None, error: str = 'Request failed',
+                      idempotent: bool = False, priority: Optional[int] = None) -> Any:
+        value, _ = await self._request(method, path, endpoint, params, json, error, idempotent, priority)
+        return value
+
+    async def _request(self, method: str, path: str, endpoint: str, params: Optional[Dict] = None,
+                       json: Optional[Dict] = None, error: str = 'Request failed',
+                       idempotent: bool = False, priority: Optional[int] = None,
+                       etag: Optional[str] = None) -> Tuple[Any, Optional[str]]:
+        upstream = self.upstream
+        if priority is None:
+            priority = current_priority()
+        breaker = upstream.breaker
+        params = _normalize_params(params)
+        # The key has no body, so idempotent requests with one (JSON-RPC reads) are never served from it
+        cache_key = (method, path, tuple(sorted((params or {}).items()))) if idempotent and json is None else None
+
+        if not breaker.allow():
+            upstream.metrics['short_circuited'] += 1
+            upstream.last_failure = time.monotonic()
+            if cache_key in upstream.fallback_cache:
+                upstream.metrics['fallback_served'] += 1
+                return upstream.fallback_cache[cache_key], None
+            raise CircuitOpenError(
+                f"{error}: {upstream.name} unavailable, retry in {breaker.retry_in():.0f}s",
+                breaker.retry_in(), upstream.name, endpoint
+            )
+
+        attempts = self.retry_policy.max_attempts if idempotent else 1
+        last_error: Optional[APIError] = None
+        for attempt in range(attempts):
+            try:
+                await self._throttle(priority)
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            upstream.metrics['requests'] += 1
+            try:
+                result, etag = await self._send(method, path, endpoint, params, json, error, etag)
+            except APIRateLimitError as e:
+                # Throttled, not broken: back off without counting a breaker failure
+                last_error = e
+                upstream.metrics['rate_limited'] += 1
+                upstream.limiter.penalize(e.retry_after)
+                breaker.release_probe()
+            except APIError as e:
+                last_error = e
+                if e.retryable:
+                    upstream.metrics['failures'] += 1
+                    upstream.last_failure = time.monotonic()
+                    breaker.record_failure()
+                else:
+                    # A 4xx means the upstream is healthy; the request was wrong
+                    upstream.last_success = time.monotonic()
+                    breaker.record_success()
+                    raise
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except Exception:
+                upstream.last_failure = time.monotonic()
+                breaker.record_failure()
+                raise
+            else:
+                upstream.last_success = time.monotonic()
+                breaker.record_success()
+                upstream.limiter.record_success()
+                if cache_key is not None and result is not NOT_MODIFIED:
+                    upstream.remember(cache_key, result)
+                return result, etag
+
+            if attempt + 1 >= attempts or not breaker.allow():
+                break
+            if isinstance(last_error, APIRateLimitError) and (last_error.retry_after or 0) > self.retry_policy.max_delay:
+                # Not worth holding the caller; fall back to the cache instead
+                breaker.release_probe()
+                break
+            upstream.metrics['retries'] += 1
+            if not isinstance(last_error, APIRateLimitError):
+                # After a 429 the limiter already holds requests until Retry-After
+                await asyncio.sleep(self.retry_policy.delay(attempt))
+
+        if cache_key in upstream.fallback_cache:
+            upstream.metrics['fallback_served'] += 1
+            logger.warning(f"{upstream.name} {endpoint} failed ({last_error}); serving cached response")
+            return upstream.fallback_cache[cache_key], None
+        raise last_error
+
+    async def _send(self, method: str, path: str, endpoint: str, params: Optional[Dict],
+                    json: Optional[Dict], error: str, etag: Optional[str] = None) -> Tuple[Any, Optional[str]]:
+        url = f"{self.base_url}{path}"
+        timeout = aiohttp.ClientTimeout(total=self.timeout_for(endpoint))
+        headers = {**self.headers, 'If-None-Match': etag} if etag else self.headers
+        try:
+            async with self.upstream.session().request(
+                method, url, headers=headers, params=params, json=json, timeout=timeout
+            ) as response:
+                if response.status == 304 and etag:
+                    return NOT_MODIFIED, etag
+                if 200 <= response.status < 300:
+                    return await response.json(content_type=None), response.headers.get('ETag')
+
+                try:
+                    body = await response.json(content_type=None)
+                except (aiohttp.ContentTypeError, ValueError):
+                    body = await response.text()
+
+                if response.status == 429:
+                    raise APIRateLimitError(
+                        f"{error}: {response.status}",
+                        _parse_retry_after(response.headers.get('Retry-After')),
+                        body, self.upstream.name, endpoint
+                    )
+                raise APIStatusError(
+                    f"{error}: {body if method != 'GET' else response.status}",
+                    response.status, body, self.upstream.name, endpoint
+                )
+        except asyncio.TimeoutError:
+            self.upstream.metrics['timeouts'] += 1
+            raise APITimeoutError(f"{error}: timed out", self.upstream.name, endpoint)
+        except aiohttp.ClientError as e:
+            raise APIConnectionError(f"{error}: {e}", self.upstream.name, endpoint)
@@ -0,0 +1,207 @@
+"""
+Tiered stale-while-revalidate cache for upstream GET responses.
+
+Entries live in an in-process LRU bounded by approximate size in bytes and,
+when ``Config.API_CACHE_DIR`` is set, in a directory of JSON files that
+survives restarts. Each cached endpoint has a ``CachePolicy``: within ``ttl``
+the entry is served as is; for ``stale_ttl`` after that it is still served
+instantly while a background refresh runs; beyond that the caller waits for
+a fresh response. Refreshes send the stored ETag as If-None-Match.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CachePolicy:
+    """Freshness rules for one endpoint, in seconds."""
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+
+class CacheEntry:
+    """A cached response body with its validator."""
+
+    def __init__(self, value: Any, etag: Optional[str], fetched_at: float, expires_at: float):
+        self.value = value
+        self.etag = etag
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+        self.size = len(json.dumps(value, default=str))
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'value': self.value,
+            'etag': self.etag,
+            'fetched_at': self.fetched_at,
+            'expires_at': self.expires_at
+        }, default=str)
+
+    @classmethod
+    def from_json(cls, data: str) -> 'CacheEntry':
+        raw = json.loads(data)
+        return cls(raw['value'], raw.get('etag'), raw['fetched_at'], raw['expires_at'])
+
+
+class ResponseCache:
+    """Size-bounded LRU of responses with an optional disk tier."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, disk_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self.metrics = {
+            'fresh_hits': 0,
+            'stale_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'revalidations': 0,
+            'not_modified': 0,
+            'refresh_failures': 0,
+            'evictions': 0
+        }
+        if disk_path:
+            os.makedirs(disk_path, exist_ok=True)
+
+    def _file(self, key: Hashable) -> str:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_path, f"{digest}.json")
+
+    async def get(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for ``key`` from memory or disk, if not expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.disk_path:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self.metrics['disk_hits'] += 1
+                self._store_memory(key, entry)
+
+        if entry is not None and time.time() >= entry.expires_at:
+            await self.delete(key)
+            return None
+        return entry
+
+    async def set(self, key: Hashable, entry: CacheEntry):
+        self._store_memory(key, entry)
+        if self.disk_path:
+            await asyncio.to_thread(self._write_disk, key, entry)
+
+    async def delete(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        if self.disk_path:
+            await asyncio.to_thread(self._remove_disk, key)
+
+    def _store_memory(self, key: Hashable, entry: CacheEntry):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.metrics['evictions'] += 1
+
+    def _read_disk(self, key: Hashable) -> Optional[CacheEntry]:
+        try:
+            with open(self._file(key), 'r', encoding='utf-8') as f:
+                return CacheEntry.from_json(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable cache file for {key}: {e}")
+            self._remove_disk(key)
+            return None
+
+    def _write_disk(self, key: Hashable, entry: CacheEntry):
+        path = self._file(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(entry.to_json())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache file for {key}: {e}")
+
+    def _remove_disk(self, key: Hashable):
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove cache file for {key}: {e}")
+
+    def refresh(self, key: Hashable, fetch) -> None:
+        """Run ``fetch`` in the background unless a refresh for ``key`` is running."""
+        if key in self._refreshing:
+            return
+        self.metrics['revalidations'] += 1
+        task = asyncio.ensure_future(fetch())
+        self._refreshing[key] = task
+        task.add_done_callback(lambda done: self._refresh_done(key, done))
+
+    def _refresh_done(self, key: Hashable, task: asyncio.Task):
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            # The stale entry stays until it expires; the next read tries again
+            self.metrics['refresh_failures'] += 1
+            logger.warning(f"Background refresh of {key} failed: {task.exception()}")
+
+    async def close(self):
+        """Cancel background refreshes; registered as a runtime shutdown hook."""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        reads = self.metrics['fresh_hits'] + self.metrics['stale_hits'] + self.metrics['misses']
+        hits = self.metrics['fresh_hits'] + self.metrics['stale_hits']
+        return {
+            **self.metrics,
+            'hit_rate': round(hits / reads, 3) if reads else 0.0,
+            'entries': len(self._entries),
+            'memory_bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'refreshing': len(self._refreshing),
+            'disk': bool(self.disk_path)
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache, creating it on first use."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(Config.API_CACHE_MAX_BYTES, Config.API_CACHE_DIR)
+    return _response_cache
+
+
+async def close_response_cache():
+    if _response_cache is not None:
+        await _response_cache.close()
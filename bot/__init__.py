@@ -1,4 +1,5 @@
 from .handlers import BotHandlers
 from .main import main
+from .send_queue import SendQueue
 
-__all__ = ['BotHandlers', 'main']
+__all__ = ['BotHandlers', 'main', 'SendQueue']
@@ -0,0 +1,145 @@
+"""
+Concurrent update processing with per-user and per-chat ordering.
+
+Updates from different users run in parallel, while updates that share a
+user or a chat run strictly in arrival order. An update only takes one of
+the global concurrency slots once every earlier update sharing its user or
+chat has finished, so a user with a long backlog waits on itself instead of
+holding slots other users need.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Dict, List, Tuple
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# The base class gates process_update with its own semaphore before our
+# ordering logic runs; keep it out of the way and enforce limits here.
+_UNBOUNDED = 2 ** 31 - 1
+
+
+class OrderedUpdateProcessor(BaseUpdateProcessor):
+    """Update processor preserving per-user/per-chat order under a global limit."""
+
+    def __init__(self, max_concurrent_updates: int = 64, max_pending_per_user: int = 10):
+        super().__init__(_UNBOUNDED)
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        self.global_limit = max_concurrent_updates
+        self.max_pending_per_user = max_pending_per_user
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        self._tails: Dict[Tuple[str, int], asyncio.Future] = {}
+        self._pending_per_user: Dict[int, int] = {}
+
+        self.running = 0
+        self.waiting_for_order = 0
+        self.waiting_for_slot = 0
+        self.metrics = {
+            'processed': 0,
+            'failed': 0,
+            'dropped': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+
+    @staticmethod
+    def _ordering_keys(update: object) -> Tuple[List[Tuple[str, int]], Any]:
+        if not isinstance(update, Update):
+            return [], None
+        keys = []
+        user = update.effective_user
+        chat = update.effective_chat
+        if user is not None:
+            keys.append(('user', user.id))
+        if chat is not None:
+            keys.append(('chat', chat.id))
+        return keys, user.id if user is not None else None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Wait for earlier updates of the same user/chat, then run under the global limit."""
+        keys, user_id = self._ordering_keys(update)
+
+        if user_id is not None and self._pending_per_user.get(user_id, 0) >= self.max_pending_per_user:
+            self.metrics['dropped'] += 1
+            logger.warning(f"Dropping update from user {user_id}: {self.max_pending_per_user} already pending")
+            coroutine.close()
+            return
+
+        # Register as the new tail for each key before yielding to keep arrival order
+        predecessors = {id(self._tails[key]): self._tails[key] for key in keys if key in self._tails}
+        done = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self._tails[key] = done
+        if user_id is not None:
+            self._pending_per_user[user_id] = self._pending_per_user.get(user_id, 0) + 1
+
+        arrived = time.perf_counter()
+        try:
+            if predecessors:
+                self.waiting_for_order += 1
+                try:
+                    # asyncio.wait does not cancel the predecessors if we are cancelled
+                    await asyncio.wait(predecessors.values())
+                finally:
+                    self.waiting_for_order -= 1
+
+            self.waiting_for_slot += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self.waiting_for_slot -= 1
+
+            waited_ms = (time.perf_counter() - arrived) * 1000
+            self.metrics['total_wait_ms'] += waited_ms
+            self.metrics['max_wait_ms'] = max(self.metrics['max_wait_ms'], waited_ms)
+
+            self.running += 1
+            try:
+                await coroutine
+                self.metrics['processed'] += 1
+            except Exception:
+                self.metrics['failed'] += 1
+                raise
+            finally:
+                self.running -= 1
+                self._slots.release()
+        finally:
+            done.set_result(None)
+            for key in keys:
+                if self._tails.get(key) is done:
+                    del self._tails[key]
+            if user_id is not None:
+                remaining = self._pending_per_user[user_id] - 1
+                if remaining:
+                    self._pending_per_user[user_id] = remaining
+                else:
+                    del self._pending_per_user[user_id]
+            if inspect.iscoroutine(coroutine) and inspect.getcoroutinestate(coroutine) == inspect.CORO_CREATED:
+                # Cancelled before it started; close it to avoid a never-awaited warning
+                coroutine.close()
+
+    async def initialize(self) -> None:
+        """Nothing to allocate."""
+
+    async def shutdown(self) -> None:
+        """Nothing to release; in-flight updates finish through the application."""
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return concurrency and backpressure metrics."""
+        finished = self.metrics['processed'] + self.metrics['failed']
+        return {
+            **self.metrics,
+            'avg_wait_ms': round(self.metrics['total_wait_ms'] / finished, 2) if finished else 0.0,
+            'running': self.running,
+            'global_limit': self.global_limit,
+            'waiting_for_order': self.waiting_for_order,
+            'waiting_for_slot': self.waiting_for_slot,
+            'users_with_pending': len(self._pending_per_user),
+            'max_pending_for_one_user': max(self._pending_per_user.values(), default=0)
+        }
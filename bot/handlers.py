@@ -10,19 +10,38 @@ from services.wallet_service import WalletService
 from services.trading_service import TradingService
 from services.referral_service import ReferralService
 from services.translation_service import TranslationService
+from services.price_alerts import get_price_alert_engine
+from services.conditional_orders import get_conditional_order_engine
+from services.execution import get_execution_scheduler
 from utils.helpers import format_currency, format_percentage, generate_referral_code
+from config import Config
+from .send_queue import SendQueue
+from . import screens
+from .router import CallbackRouter, rate_limit, resolve_user
 
 class BotHandlers:
-    def __init__(self):
+    def __init__(self, price_tracker: Optional[PriceTracker] = None,
+                 send_queue: Optional[SendQueue] = None):
         self.gamma_api = PolymarketGammaAPI()
         self.data_api = PolymarketDataAPI()
         self.clob_api = PolymarketCLOBAPI()
         self.lifi_api = LifiBridgeAPI()
-        self.price_tracker = PriceTracker()
+        self.price_tracker = price_tracker or PriceTracker()
         self.wallet_service = WalletService()
         self.trading_service = TradingService()
         self.referral_service = ReferralService()
         self.translation_service = TranslationService()
+        self.send_queue = send_queue or SendQueue(
+            global_rate=Config.TELEGRAM_GLOBAL_RATE,
+            private_rate=Config.TELEGRAM_PRIVATE_CHAT_RATE,
+            group_rate=Config.TELEGRAM_GROUP_CHAT_RATE
+        )
+        self.price_alerts = get_price_alert_engine()
+        self.price_alerts.bind(self.send_queue)
+        self.conditional_orders = get_conditional_order_engine()
+        self.execution = get_execution_scheduler()
+        self.renderer = screens.ScreenRenderer()
+        self.router = self._build_router()
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command - show branding and main menu."""
@@ -44,6 +63,7 @@ class BotHandlers:
             )
             db.add(db_user)
             db.commit()
+            await self.wallet_service.provision_wallet(db_user.id)
         
         # Get user's wallet and balances
         wallet = db.query(Wallet).filter(Wallet.user_id == db_user.id, Wallet.is_active == True).first()
@@ -59,9 +79,9 @@ class BotHandlers:
         pol_balance = 0.0
         usdc_balance = 0.0
         if wallet:
-            # In a real implementation, you'd fetch actual balances from the blockchain
-            pol_balance = 1000.0  # Mock data
-            usdc_balance = 500.0  # Mock data
+            balances = await self.wallet_service.get_wallet_balance(wallet.address)
+            pol_balance = balances.get('POL', 0.0)
+            usdc_balance = balances.get('USDC', 0.0)
         
         # Create welcome message
         welcome_text = f"""
@@ -82,173 +102,112 @@ class BotHandlers:
 🔍 **Search Markets:** Send any text to search for prediction markets (e.g., "trump", "election", "bitcoin")
 """
         
-        # Create main menu keyboard
-        keyboard = [
-            [InlineKeyboardButton("🎯 Your Positions", callback_data="positions")],
-            [InlineKeyboardButton("💳 Wallet", callback_data="wallet")],
-            [InlineKeyboardButton("👥 Referral", callback_data="referral")],
-            [InlineKeyboardButton("📡 Community", url="https://t.me/polyfocus_portal")],
-            [InlineKeyboardButton("📈 Copy Trading", callback_data="copy_trading")],
-            [InlineKeyboardButton("👤 My Profile", callback_data="profile")],
-            [InlineKeyboardButton("⚙️ Settings", callback_data="settings")],
-            [InlineKeyboardButton("❓ Help", callback_data="help")],
-            [InlineKeyboardButton("📒 Docs", url="https://docs.polyfocus.com")],
-            [InlineKeyboardButton("🔄 Refresh", callback_data="refresh")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
             welcome_text,
-            reply_markup=reply_markup,
+            reply_markup=screens.MAIN_MENU_MARKUP,
             parse_mode=ParseMode.MARKDOWN
         )
     
+    def _build_router(self) -> CallbackRouter:
+        """Map callback data to handlers."""
+        router = CallbackRouter()
+        
+        router.add("positions", lambda ctx: self.show_positions(ctx.query))
+        router.add("wallet", lambda ctx: self.show_wallet(ctx.query))
+        router.add("wallet_history", lambda ctx: self.show_history(ctx.query))
+        router.add("referral", lambda ctx: self.show_referral(ctx.query))
+        router.add("copy_trading", lambda ctx: self.show_copy_trading(ctx.query))
+        router.add("profile", lambda ctx: self.show_profile(ctx.query))
+        router.add("settings", lambda ctx: self.show_settings(ctx.query))
+        router.add("help", lambda ctx: self.show_help(ctx.query))
+        router.add("refresh", lambda ctx: self.refresh_data(ctx.query), middleware=[rate_limit(5.0)])
+        router.add("back_to_main", lambda ctx: self.start_command(ctx.update, ctx.context))
+        
+        # Parameterized callbacks emitted by search results and the referral screen
+        router.add_prefix("view_market_", lambda ctx: self.show_market(ctx.query, ctx.payload),
+                          middleware=[rate_limit(1.0)])
+        router.add_prefix("wallet_history_", lambda ctx: self.show_history(ctx.query, ctx.payload))
+        router.add_prefix("copy_referral_", lambda ctx: self.send_referral_link(ctx.query, ctx.payload),
+                          middleware=[resolve_user])
+        
+        return router
+    
     async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle callback queries from inline keyboards."""
         query = update.callback_query
         await query.answer()
         
-        data = query.data
-        user_id = query.from_user.id
-        
-        if data == "positions":
-            await self.show_positions(query)
-        elif data == "wallet":
-            await self.show_wallet(query)
-        elif data == "referral":
-            await self.show_referral(query)
-        elif data == "copy_trading":
-            await self.show_copy_trading(query)
-        elif data == "profile":
-            await self.show_profile(query)
-        elif data == "settings":
-            await self.show_settings(query)
-        elif data == "help":
-            await self.show_help(query)
-        elif data == "refresh":
-            await self.refresh_data(query)
-        elif data.startswith("back_to_main"):
-            await self.start_command(update, context)
+        await self.router.dispatch(update, context)
+    
+    async def _get_db_user(self, query, db):
+        """Look up the query's user, telling them to /start if unknown."""
+        db_user = db.query(User).filter(User.telegram_id == query.from_user.id).first()
+        if not db_user:
+            await self.renderer.edit(query, screens.USER_NOT_FOUND_TEXT, parse_mode=None)
+        return db_user
     
     async def show_positions(self, query):
         """Show user's positions dashboard."""
-        user_id = query.from_user.id
         db = next(get_db())
-        db_user = db.query(User).filter(User.telegram_id == user_id).first()
-        
+        db_user = await self._get_db_user(query, db)
         if not db_user:
-            await query.edit_message_text("User not found. Please use /start first.")
             return
         
         positions = db.query(Position).filter(Position.user_id == db_user.id).all()
-        
-        if not positions:
-            text = "📊 **Your Positions**\n\nNo positions found. Start trading to see your positions here!"
-        else:
-            text = "📊 **Your Positions**\n\n"
-            total_pnl = 0
-            
-            for pos in positions:
-                pnl_emoji = "📈" if pos.unrealized_pnl > 0 else "📉" if pos.unrealized_pnl < 0 else "➡️"
-                text += f"{pnl_emoji} **{pos.market_title}**\n"
-                text += f"• Outcome: {pos.outcome}\n"
-                text += f"• Shares: {pos.shares:.2f}\n"
-                text += f"• Avg Price: ${pos.average_price:.3f}\n"
-                text += f"• Current: ${pos.current_price:.3f}\n"
-                text += f"• P&L: {format_currency(pos.unrealized_pnl)}\n\n"
-                total_pnl += pos.unrealized_pnl
-            
-            text += f"**Total P&L:** {format_currency(total_pnl)}"
-        
-        keyboard = [[InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+        await self.renderer.show(query, screens.render_positions(positions))
     
     async def show_wallet(self, query):
         """Show wallet management interface."""
-        user_id = query.from_user.id
         db = next(get_db())
-        db_user = db.query(User).filter(User.telegram_id == user_id).first()
-        
+        db_user = await self._get_db_user(query, db)
         if not db_user:
-            await query.edit_message_text("User not found. Please use /start first.")
             return
         
         wallet = db.query(Wallet).filter(Wallet.user_id == db_user.id, Wallet.is_active == True).first()
         
+        pol_balance = 0.0
+        usdc_balance = 0.0
+        if wallet:
+            balances = await self.wallet_service.get_wallet_balance(wallet.address)
+            pol_balance = balances.get('POL', 0.0)
+            usdc_balance = balances.get('USDC', 0.0)
+        
+        await self.renderer.show(query, screens.render_wallet(wallet, pol_balance, usdc_balance))
+    
+    async def show_history(self, query, cursor: Optional[str] = None):
+        """Show a page of the user's indexed token transfers."""
+        db = next(get_db())
+        db_user = await self._get_db_user(query, db)
+        if not db_user:
+            return
+        
+        wallet = db.query(Wallet).filter(Wallet.user_id == db_user.id, Wallet.is_active == True).first()
         if not wallet:
-            text = "💳 **Wallet Management**\n\nNo wallet connected. Connect a wallet to start trading!"
-            keyboard = [
-                [InlineKeyboardButton("🔗 Connect Wallet", callback_data="connect_wallet")],
-                [InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")]
-            ]
-        else:
-            # Get balances (mock data for now)
-            pol_balance = 1000.0
-            usdc_balance = 500.0
-            
-            text = f"💳 **Wallet Management**\n\n"
-            text += f"**Address:** `{wallet.address}`\n"
-            text += f"**Network:** {wallet.network.upper()}\n\n"
-            text += f"**Balances:**\n"
-            text += f"• POL: {format_currency(pol_balance)}\n"
-            text += f"• USDC.e: {format_currency(usdc_balance)}\n\n"
-            text += f"**Actions:**"
-            
-            keyboard = [
-                [InlineKeyboardButton("💸 Send", callback_data="send_tokens")],
-                [InlineKeyboardButton("🌉 Bridge", callback_data="bridge_tokens")],
-                [InlineKeyboardButton("📊 Portfolio", callback_data="portfolio")],
-                [InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")]
-            ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+            await self.renderer.show(query, screens.render_wallet(None))
+            return
+        
+        before = tuple(int(part) for part in cursor.split('_')) if cursor else None
+        transfers, next_cursor = self.wallet_service.get_transaction_history(wallet.address, before=before)
+        await self.renderer.show(query, screens.render_history(transfers, next_cursor))
     
     async def show_referral(self, query):
         """Show referral system interface."""
-        user_id = query.from_user.id
         db = next(get_db())
-        db_user = db.query(User).filter(User.telegram_id == user_id).first()
-        
+        db_user = await self._get_db_user(query, db)
         if not db_user:
-            await query.edit_message_text("User not found. Please use /start first.")
             return
         
         # Get referral stats
         referrals = db.query(User).filter(User.referrer_id == db_user.id).count()
         total_rewards = 0.0  # Calculate from ReferralReward table
         
-        text = f"👥 **Referral System**\n\n"
-        text += f"**Your Referral Code:** `{db_user.referral_code}`\n\n"
-        text += f"**Stats:**\n"
-        text += f"• Total Referrals: {referrals}\n"
-        text += f"• Total Rewards: ${format_currency(total_rewards)}\n\n"
-        text += f"**Share your link:**\n"
-        text += f"`https://t.me/your_bot?start={db_user.referral_code}`\n\n"
-        text += f"**Referral Tree:**\n"
-        text += f"🔗 You are at the top of the pyramid!\n"
-        text += f"📊 Earn 10% commission from all your referrals' trades!"
-        
-        keyboard = [
-            [InlineKeyboardButton("📋 Copy Link", callback_data=f"copy_referral_{db_user.referral_code}")],
-            [InlineKeyboardButton("📊 View Tree", callback_data="referral_tree")],
-            [InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+        await self.renderer.show(query, screens.render_referral(db_user.referral_code, referrals, total_rewards))
     
     async def show_copy_trading(self, query):
         """Show copy trading interface."""
-        user_id = query.from_user.id
         db = next(get_db())
-        db_user = db.query(User).filter(User.telegram_id == user_id).first()
-        
+        db_user = await self._get_db_user(query, db)
         if not db_user:
-            await query.edit_message_text("User not found. Please use /start first.")
             return
         
         copy_settings = db.query(CopyTradingSettings).filter(CopyTradingSettings.user_id == db_user.id).first()
@@ -266,39 +225,13 @@ class BotHandlers:
             db.add(copy_settings)
             db.commit()
         
-        status_emoji = "✅" if copy_settings.is_enabled else "❌"
-        
-        text = f"📈 **Copy Trading**\n\n"
-        text += f"**Status:** {status_emoji} {'Enabled' if copy_settings.is_enabled else 'Disabled'}\n\n"
-        text += f"**Settings:**\n"
-        text += f"• Max Position Size: ${format_currency(copy_settings.max_position_size)}\n"
-        text += f"• Max Daily Volume: ${format_currency(copy_settings.max_daily_volume)}\n"
-        text += f"• Copy Percentage: {format_percentage(copy_settings.copy_percentage)}\n"
-        text += f"• Min Confidence: {format_percentage(copy_settings.min_confidence)}\n\n"
-        text += f"**How it works:**\n"
-        text += f"1. Follow successful traders\n"
-        text += f"2. Automatically copy their trades\n"
-        text += f"3. Set your risk parameters\n"
-        text += f"4. Earn while you sleep!"
-        
-        keyboard = [
-            [InlineKeyboardButton("⚙️ Configure", callback_data="configure_copy_trading")],
-            [InlineKeyboardButton("👥 Follow Traders", callback_data="follow_traders")],
-            [InlineKeyboardButton("📊 Performance", callback_data="copy_performance")],
-            [InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+        await self.renderer.show(query, screens.render_copy_trading(copy_settings))
     
     async def show_profile(self, query):
         """Show user profile."""
-        user_id = query.from_user.id
         db = next(get_db())
-        db_user = db.query(User).filter(User.telegram_id == user_id).first()
-        
+        db_user = await self._get_db_user(query, db)
         if not db_user:
-            await query.edit_message_text("User not found. Please use /start first.")
             return
         
         # Get user stats
@@ -306,93 +239,37 @@ class BotHandlers:
         total_positions = db.query(Position).filter(Position.user_id == db_user.id).count()
         referrals = db.query(User).filter(User.referrer_id == db_user.id).count()
         
-        text = f"👤 **My Profile**\n\n"
-        text += f"**User Info:**\n"
-        text += f"• Username: @{db_user.username or 'N/A'}\n"
-        text += f"• Name: {db_user.first_name} {db_user.last_name or ''}\n"
-        text += f"• Language: {db_user.language.upper()}\n"
-        text += f"• Member Since: {db_user.created_at.strftime('%Y-%m-%d')}\n\n"
-        text += f"**Trading Stats:**\n"
-        text += f"• Total Trades: {total_trades}\n"
-        text += f"• Active Positions: {total_positions}\n"
-        text += f"• Referrals: {referrals}\n\n"
-        text += f"**Settings:**\n"
-        text += f"• Slippage: {format_percentage(db_user.slippage_tolerance)}\n"
-        text += f"• Gas Mode: {db_user.gas_fee_mode.title()}\n"
-        text += f"• Last Active: {db_user.last_active.strftime('%Y-%m-%d %H:%M')}"
-        
-        keyboard = [
-            [InlineKeyboardButton("⚙️ Edit Profile", callback_data="edit_profile")],
-            [InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+        await self.renderer.show(query, screens.render_profile(db_user, total_trades, total_positions, referrals))
     
     async def show_settings(self, query):
         """Show settings interface."""
-        user_id = query.from_user.id
         db = next(get_db())
-        db_user = db.query(User).filter(User.telegram_id == user_id).first()
-        
+        db_user = await self._get_db_user(query, db)
         if not db_user:
-            await query.edit_message_text("User not found. Please use /start first.")
             return
         
-        text = f"⚙️ **Settings**\n\n"
-        text += f"**Trading Settings:**\n"
-        text += f"• Slippage Tolerance: {format_percentage(db_user.slippage_tolerance)}\n"
-        text += f"• Gas Fee Mode: {db_user.gas_fee_mode.title()}\n\n"
-        text += f"**Language Settings:**\n"
-        text += f"• Current Language: {db_user.language.upper()}\n\n"
-        text += f"**Security Settings:**\n"
-        text += f"• Private Key: Encrypted ✅\n"
-        text += f"• 2FA: Not enabled\n\n"
-        text += f"**Gas Fee Modes:**\n"
-        text += f"• Fast: 1.2x base fee\n"
-        text += f"• Turbo: 1.5x base fee\n"
-        text += f"• Ultra: 2.0x base fee"
-        
-        keyboard = [
-            [InlineKeyboardButton("🎯 Slippage", callback_data="set_slippage")],
-            [InlineKeyboardButton("⛽ Gas Fees", callback_data="set_gas_fees")],
-            [InlineKeyboardButton("🌐 Language", callback_data="set_language")],
-            [InlineKeyboardButton("🔒 Security", callback_data="security_settings")],
-            [InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+        await self.renderer.show(query, screens.render_settings(db_user))
     
     async def show_help(self, query):
         """Show help and FAQ."""
-        text = f"❓ **Help & FAQ**\n\n"
-        text += f"**Getting Started:**\n"
-        text += f"1. Connect your wallet\n"
-        text += f"2. Search for markets\n"
-        text += f"3. Place your first trade\n"
-        text += f"4. Monitor your positions\n\n"
-        text += f"**Trading:**\n"
-        text += f"• Send any text to search markets\n"
-        text += f"• Use limit orders for better prices\n"
-        text += f"• Set slippage protection\n"
-        text += f"• Monitor gas fees\n\n"
-        text += f"• **Copy Trading:** Follow successful traders\n"
-        text += f"• **Referrals:** Share your link to earn\n"
-        text += f"• **Bridge:** Transfer tokens between chains\n\n"
-        text += f"**Need More Help?**\n"
-        text += f"• Join our community: @polyfocus_portal\n"
-        text += f"• Read docs: docs.polyfocus.com\n"
-        text += f"• Contact support: @polyfocus_support"
-        
-        keyboard = [
-            [InlineKeyboardButton("📒 Documentation", url="https://docs.polyfocus.com")],
-            [InlineKeyboardButton("📡 Community", url="https://t.me/polyfocus_portal")],
-            [InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")]
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=ParseMode.MARKDOWN)
+        await self.renderer.show(query, screens.render_help())
+    
+    async def show_market(self, query, market_id: str):
+        """Show details for a market picked from search results."""
+        try:
+            market = await self.gamma_api.get_market_details(market_id)
+        except Exception as e:
+            await self.renderer.edit(query, f"❌ Error loading market: {str(e)}", parse_mode=None)
+            return
+        
+        await self.renderer.show(query, screens.render_market(market))
+    
+    async def send_referral_link(self, query, referral_code: str):
+        """Send the referral link as its own message so it can be copied."""
+        await query.message.reply_text(
+            screens.REFERRAL_LINK_TEXT(referral_code),
+            parse_mode=ParseMode.MARKDOWN
+        )
     
     async def refresh_data(self, query):
         """Refresh user data and prices."""
@@ -413,6 +290,157 @@ class BotHandlers:
         # Go back to main menu
         await self.start_command(query, None)
     
+    async def alert_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /alert <market> <YES|NO> <above|below> <price> and /alert cancel <id>."""
+        args = context.args or []
+        db = next(get_db())
+        db_user = db.query(User).filter(User.telegram_id == update.effective_user.id).first()
+        if not db_user:
+            await update.message.reply_text(screens.USER_NOT_FOUND_TEXT)
+            return
+        
+        if len(args) == 2 and args[0].lower() == 'cancel' and args[1].isdigit():
+            result = self.price_alerts.cancel_alert(db_user.id, int(args[1]))
+            await update.message.reply_text(result.get('message') or f"❌ {result['error']}")
+            return
+        
+        try:
+            market_id, outcome, direction, threshold = args[0], args[1], args[2], float(args[3])
+        except (IndexError, ValueError):
+            await update.message.reply_text(
+                "Usage: /alert <market> <YES|NO> <above|below> <price>\n"
+                "Cancel with /alert cancel <id>"
+            )
+            return
+        
+        result = self.price_alerts.create_alert(db_user.id, market_id, outcome, direction, threshold)
+        if result['success']:
+            await update.message.reply_text(
+                f"🔔 Alert {result['alert_id']} set: {market_id} {outcome.upper()} {direction.lower()} {threshold:.2f}"
+            )
+        else:
+            await update.message.reply_text(f"❌ {result['error']}")
+    
+    async def alerts_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /alerts - list the user's active price alerts."""
+        db = next(get_db())
+        db_user = db.query(User).filter(User.telegram_id == update.effective_user.id).first()
+        if not db_user:
+            await update.message.reply_text(screens.USER_NOT_FOUND_TEXT)
+            return
+        
+        alerts = self.price_alerts.list_alerts(db_user.id)
+        if not alerts:
+            await update.message.reply_text("🔕 No active price alerts.")
+            return
+        lines = [f"{alert.id}. {alert.market_id} {alert.outcome} {alert.direction} {alert.threshold:.2f}"
+                 for alert in alerts]
+        await update.message.reply_text("🔔 Active price alerts:\n" + "\n".join(lines))
+    
+    async def exit_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /exit <position> <sl|tp> <price>, /exit list and /exit cancel <id>."""
+        args = context.args or []
+        db = next(get_db())
+        db_user = db.query(User).filter(User.telegram_id == update.effective_user.id).first()
+        if not db_user:
+            await update.message.reply_text(screens.USER_NOT_FOUND_TEXT)
+            return
+        
+        if args[:1] == ['list']:
+            triggers = self.conditional_orders.list_triggers(db_user.id)
+            if not triggers:
+                await update.message.reply_text("No armed stop-loss or take-profit orders.")
+                return
+            lines = [f"{trigger.id}. {trigger.kind.replace('_', ' ')} {trigger.market_id} {trigger.outcome} "
+                     f"@ {trigger.trigger_price:.2f} ({trigger.shares:g} shares)" for trigger in triggers]
+            await update.message.reply_text("🎯 Armed exits:\n" + "\n".join(lines))
+            return
+        
+        if len(args) == 2 and args[0].lower() == 'cancel' and args[1].isdigit():
+            result = self.conditional_orders.cancel(db_user.id, int(args[1]))
+            await update.message.reply_text(result.get('message') or f"❌ {result['error']}")
+            return
+        
+        try:
+            position_id, kind, trigger_price = int(args[0]), args[1], float(args[2])
+        except (IndexError, ValueError):
+            await update.message.reply_text(
+                "Usage: /exit <position> <sl|tp> <price>\n"
+                "List with /exit list, cancel with /exit cancel <id>"
+            )
+            return
+        
+        result = self.conditional_orders.arm(db_user.id, position_id, kind, trigger_price)
+        if result['success']:
+            await update.message.reply_text(
+                f"🎯 Trigger {result['trigger_id']} armed: {kind.upper()} at {trigger_price:.2f}"
+            )
+        else:
+            await update.message.reply_text(f"❌ {result['error']}")
+    
+    async def algo_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /algo - start, inspect or cancel a sliced execution."""
+        args = context.args or []
+        db = next(get_db())
+        db_user = db.query(User).filter(User.telegram_id == update.effective_user.id).first()
+        if not db_user:
+            await update.message.reply_text(screens.USER_NOT_FOUND_TEXT)
+            return
+        
+        if len(args) == 2 and args[0].lower() == 'cancel' and args[1].isdigit():
+            result = self.execution.cancel(db_user.id, int(args[1]))
+            await update.message.reply_text(result.get('message') or f"❌ {result['error']}")
+            return
+        
+        if len(args) == 1 and args[0].isdigit():
+            report = self.execution.report(int(args[0]))
+            if report is None:
+                await update.message.reply_text("❌ Execution not found")
+                return
+            slippage = report['slippage_bps']
+            await update.message.reply_text(
+                f"⚙️ Execution {report['execution_id']} ({report['strategy']}, {report['status']})\n"
+                f"Filled {report['filled_shares']:g}/{report['total_shares']:g} shares "
+                f"in {report['slices_sent']} slices\n"
+                f"Slippage vs arrival: {'n/a' if slippage is None else f'{slippage:.1f} bps'}"
+            )
+            return
+        
+        try:
+            market_id, outcome, side, shares, strategy = args[0], args[1], args[2], float(args[3]), args[4]
+            limit_price = float(args[5]) if len(args) > 5 else None
+        except (IndexError, ValueError):
+            await update.message.reply_text(
+                "Usage: /algo <market> <YES|NO> <buy|sell> <shares> <twap|iceberg|pov> [limit]\n"
+                "Check with /algo <id>, cancel with /algo cancel <id>"
+            )
+            return
+        
+        result = await self.execution.submit(db_user.id, market_id, outcome, side, shares, strategy, limit_price)
+        if result['success']:
+            await update.message.reply_text(
+                f"⚙️ Execution {result['execution_id']} started: {strategy.lower()} {side.upper()} {shares:g} shares"
+            )
+        else:
+            await update.message.reply_text(f"❌ {result['error']}")
+    
+    async def cancel_all_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /cancelall [market] [buy|sell] - cancel resting orders in bulk."""
+        args = context.args or []
+        db = next(get_db())
+        db_user = db.query(User).filter(User.telegram_id == update.effective_user.id).first()
+        if not db_user:
+            await update.message.reply_text(screens.USER_NOT_FOUND_TEXT)
+            return
+        
+        side = next((arg.upper() for arg in args if arg.upper() in ('BUY', 'SELL')), None)
+        market_id = next((arg for arg in args if arg.upper() not in ('BUY', 'SELL')), None)
+        result = await self.trading_service.cancel_orders(db_user.id, market_id=market_id, side=side)
+        text = f"🧹 {result['message']}"
+        if result.get('error'):
+            text += f"\n❌ {result['error']}"
+        await update.message.reply_text(text)
+    
     async def handle_text_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle text messages as market search queries."""
         query_text = update.message.text
@@ -3,7 +3,12 @@ import logging
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
 from config import Config
 from database import init_db
+from runtime import BotRuntime
+from services.wallet_pool import get_wallet_pool
+from services.balances import get_balance_service
+from services.transfer_indexer import get_transfer_indexer
 from .handlers import BotHandlers
+from .dispatcher import OrderedUpdateProcessor
 
 # Configure logging
 logging.basicConfig(
@@ -12,25 +17,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
-    """Main function to run the bot."""
-    # Initialize database
-    init_db()
-    
-    # Create application
-    application = Application.builder().token(Config.TELEGRAM_BOT_TOKEN).build()
-    
+def build_application(handlers: BotHandlers = None) -> Application:
+    """Create the Telegram application with all handlers registered."""
+    application = (
+        Application.builder()
+        .token(Config.TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(OrderedUpdateProcessor(
+            max_concurrent_updates=Config.MAX_CONCURRENT_UPDATES,
+            max_pending_per_user=Config.MAX_PENDING_UPDATES_PER_USER
+        ))
+        .build()
+    )
+
     # Initialize handlers
-    handlers = BotHandlers()
-    
+    handlers = handlers or BotHandlers()
+
     # Add handlers
     application.add_handler(CommandHandler("start", handlers.start_command))
+    application.add_handler(CommandHandler("alert", handlers.alert_command))
+    application.add_handler(CommandHandler("alerts", handlers.alerts_command))
+    application.add_handler(CommandHandler("exit", handlers.exit_command))
+    application.add_handler(CommandHandler("algo", handlers.algo_command))
+    application.add_handler(CommandHandler("cancelall", handlers.cancel_all_command))
     application.add_handler(CallbackQueryHandler(handlers.handle_callback_query))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.handle_text_message))
-    
+
+    # Notifications go out through the rate-shaped send queue
+    handlers.send_queue.bind(application.bot)
+
+    return application
+
+def main():
+    """Main function to run the bot."""
+    # Initialize database
+    init_db()
+
+    handlers = BotHandlers()
+    runtime = BotRuntime()
+    runtime.add_application(build_application(handlers))
+    runtime.add_component('send_queue', handlers.send_queue.start, handlers.send_queue.stop)
+    runtime.add_background_task('price_alerts', handlers.price_alerts.run, stop=handlers.price_alerts.stop)
+    runtime.add_background_task('conditional_orders', handlers.conditional_orders.run,
+                                stop=handlers.conditional_orders.stop)
+    runtime.add_background_task('execution', handlers.execution.run, stop=handlers.execution.stop)
+    wallet_pool = get_wallet_pool()
+    runtime.add_background_task('wallet_pool', wallet_pool.run, stop=wallet_pool.stop)
+    balances = get_balance_service()
+    runtime.add_background_task('balances', balances.run, stop=balances.stop)
+    transfer_indexer = get_transfer_indexer()
+    runtime.add_background_task('transfer_indexer', transfer_indexer.run, stop=transfer_indexer.stop)
+
     # Start the bot
     logger.info("Starting PolyFocus Bot...")
-    application.run_polling()
+    asyncio.run(runtime.run())
 
 if __name__ == '__main__':
     main()
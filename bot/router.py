@@ -0,0 +1,209 @@
+"""
+Callback query routing.
+
+Exact callback data such as ``positions`` is dispatched with one dict lookup.
+Parameterized data such as ``view_market_<id>`` is matched by the longest
+registered prefix in a character trie, and the remainder is parsed into a
+typed payload. Routes can carry middleware, and every dispatch is timed into
+a per-route latency histogram.
+"""
+
+import bisect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from database import get_db, User
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+Handler = Callable[['RouteContext'], Awaitable[Any]]
+Middleware = Callable[['RouteContext', Callable[[], Awaitable[Any]]], Awaitable[Any]]
+
+
+class RouteContext:
+    """Per-dispatch state handed to middleware and route handlers."""
+
+    def __init__(self, update, context, route: 'Route', payload: Any = None):
+        self.update = update
+        self.context = context
+        self.query = update.callback_query
+        self.route = route
+        self.payload = payload
+        self.user = None
+        self.telegram_id = self.query.from_user.id
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.errors = 0
+
+    def observe(self, elapsed_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, elapsed_ms)] += 1
+        self.total += 1
+        self.sum_ms += elapsed_ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bucket bound containing the given fraction of observations."""
+        if not self.total:
+            return None
+        target = fraction * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}" for bound in self.buckets] + ['le_inf']
+        return {
+            'count': self.total,
+            'errors': self.errors,
+            'avg_ms': round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+
+class Route:
+    """A callback route: handler, payload parser and middleware chain."""
+
+    def __init__(self, name: str, handler: Handler, payload_type: Optional[Callable[[str], Any]] = None,
+                 middleware: Optional[List[Middleware]] = None):
+        self.name = name
+        self.handler = handler
+        self.payload_type = payload_type
+        self.middleware = middleware or []
+        self.histogram = LatencyHistogram()
+
+
+class _TrieNode:
+    __slots__ = ('children', 'route')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.route: Optional[Route] = None
+
+
+class CallbackRouter:
+    """Dispatches callback data to routes by exact match or longest prefix."""
+
+    def __init__(self, middleware: Optional[List[Middleware]] = None):
+        self.exact: Dict[str, Route] = {}
+        self.prefixes = _TrieNode()
+        self.middleware = middleware or []
+        self.unmatched = 0
+
+    def add(self, data: str, handler: Handler, middleware: Optional[List[Middleware]] = None):
+        """Register an exact-match route."""
+        self.exact[data] = Route(data, handler, middleware=middleware)
+
+    def add_prefix(self, prefix: str, handler: Handler, payload_type: Callable[[str], Any] = str,
+                   middleware: Optional[List[Middleware]] = None):
+        """Register a parameterized route; the text after ``prefix`` is parsed with ``payload_type``."""
+        node = self.prefixes
+        for char in prefix:
+            node = node.children.setdefault(char, _TrieNode())
+        node.route = Route(f"{prefix}*", handler, payload_type, middleware)
+
+    def match(self, data: str) -> Tuple[Optional[Route], Optional[str]]:
+        """Find the route for callback data and the raw payload text."""
+        route = self.exact.get(data)
+        if route is not None:
+            return route, None
+
+        node = self.prefixes
+        best: Tuple[Optional[Route], Optional[str]] = (None, None)
+        for index, char in enumerate(data):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.route is not None:
+                best = (node.route, data[index + 1:])
+        return best
+
+    async def dispatch(self, update, context) -> bool:
+        """Route a callback query update. Returns False when nothing matched."""
+        data = update.callback_query.data or ''
+        route, raw_payload = self.match(data)
+        if route is None:
+            self.unmatched += 1
+            logger.warning(f"Unrouted callback data: {data}")
+            return False
+
+        try:
+            payload = route.payload_type(raw_payload) if route.payload_type else None
+        except (TypeError, ValueError):
+            self.unmatched += 1
+            logger.warning(f"Bad payload for route {route.name}: {data}")
+            return False
+
+        started = time.perf_counter()
+        try:
+            ctx = RouteContext(update, context, route, payload)
+            await self._call_chain(ctx, self.middleware + route.middleware)
+        except Exception:
+            route.histogram.errors += 1
+            raise
+        finally:
+            route.histogram.observe((time.perf_counter() - started) * 1000)
+        return True
+
+    async def _call_chain(self, ctx: RouteContext, chain: List[Middleware]):
+        async def call(index: int):
+            if index == len(chain):
+                return await ctx.route.handler(ctx)
+            return await chain[index](ctx, lambda: call(index + 1))
+        return await call(0)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return per-route latency histograms."""
+        routes = list(self.exact.values())
+        stack = [self.prefixes]
+        while stack:
+            node = stack.pop()
+            if node.route is not None:
+                routes.append(node.route)
+            stack.extend(node.children.values())
+        return {
+            'unmatched': self.unmatched,
+            'routes': {route.name: route.histogram.to_dict() for route in routes if route.histogram.total}
+        }
+
+
+async def resolve_user(ctx: RouteContext, call_next):
+    """Middleware: load the database user into ``ctx.user`` or stop with a /start hint."""
+    db = next(get_db())
+    ctx.user = db.query(User).filter(User.telegram_id == ctx.telegram_id).first()
+    if not ctx.user:
+        await ctx.query.edit_message_text("User not found. Please use /start first.")
+        return None
+    return await call_next()
+
+
+def rate_limit(min_interval: float, max_users: int = 100000) -> Middleware:
+    """Middleware factory: drop repeat taps from a user within ``min_interval`` seconds."""
+    last_seen: Dict[int, float] = {}
+
+    async def middleware(ctx: RouteContext, call_next):
+        now = time.monotonic()
+        previous = last_seen.get(ctx.telegram_id)
+        if previous is not None and now - previous < min_interval:
+            return None
+        if len(last_seen) >= max_users:
+            last_seen.clear()
+        last_seen[ctx.telegram_id] = now
+        return await call_next()
+
+    return middleware
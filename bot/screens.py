@@ -0,0 +1,402 @@
+"""
+Screen rendering for menu views.
+
+Screen text is built from module-level templates with a single ``join`` and
+static keyboards are built once at import time. ``ScreenRenderer`` remembers
+what each message currently shows and skips ``edit_message_text`` when a
+render produces the same content, which Telegram would otherwise reject with
+"message is not modified".
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
+from telegram.error import BadRequest
+
+from utils.helpers import format_currency, format_percentage
+
+# Static keyboards, shared by every render
+BACK_TO_MAIN_BUTTON = InlineKeyboardButton("⬅️ Back to Main Menu", callback_data="back_to_main")
+
+BACK_TO_MAIN_MARKUP = InlineKeyboardMarkup([[BACK_TO_MAIN_BUTTON]])
+
+MAIN_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Your Positions", callback_data="positions")],
+    [InlineKeyboardButton("💳 Wallet", callback_data="wallet")],
+    [InlineKeyboardButton("👥 Referral", callback_data="referral")],
+    [InlineKeyboardButton("📡 Community", url="https://t.me/polyfocus_portal")],
+    [InlineKeyboardButton("📈 Copy Trading", callback_data="copy_trading")],
+    [InlineKeyboardButton("👤 My Profile", callback_data="profile")],
+    [InlineKeyboardButton("⚙️ Settings", callback_data="settings")],
+    [InlineKeyboardButton("❓ Help", callback_data="help")],
+    [InlineKeyboardButton("📒 Docs", url="https://docs.polyfocus.com")],
+    [InlineKeyboardButton("🔄 Refresh", callback_data="refresh")]
+])
+
+WALLET_DISCONNECTED_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔗 Connect Wallet", callback_data="connect_wallet")],
+    [BACK_TO_MAIN_BUTTON]
+])
+
+WALLET_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("💸 Send", callback_data="send_tokens")],
+    [InlineKeyboardButton("🌉 Bridge", callback_data="bridge_tokens")],
+    [InlineKeyboardButton("📊 Portfolio", callback_data="portfolio")],
+    [InlineKeyboardButton("📜 History", callback_data="wallet_history")],
+    [BACK_TO_MAIN_BUTTON]
+])
+
+COPY_TRADING_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⚙️ Configure", callback_data="configure_copy_trading")],
+    [InlineKeyboardButton("👥 Follow Traders", callback_data="follow_traders")],
+    [InlineKeyboardButton("📊 Performance", callback_data="copy_performance")],
+    [BACK_TO_MAIN_BUTTON]
+])
+
+PROFILE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("⚙️ Edit Profile", callback_data="edit_profile")],
+    [BACK_TO_MAIN_BUTTON]
+])
+
+SETTINGS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Slippage", callback_data="set_slippage")],
+    [InlineKeyboardButton("⛽ Gas Fees", callback_data="set_gas_fees")],
+    [InlineKeyboardButton("🌐 Language", callback_data="set_language")],
+    [InlineKeyboardButton("🔒 Security", callback_data="security_settings")],
+    [BACK_TO_MAIN_BUTTON]
+])
+
+HELP_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📒 Documentation", url="https://docs.polyfocus.com")],
+    [InlineKeyboardButton("📡 Community", url="https://t.me/polyfocus_portal")],
+    [BACK_TO_MAIN_BUTTON]
+])
+
+# Templates
+USER_NOT_FOUND_TEXT = "User not found. Please use /start first."
+
+POSITIONS_EMPTY_TEXT = "📊 **Your Positions**\n\nNo positions found. Start trading to see your positions here!"
+POSITIONS_HEADER = "📊 **Your Positions**\n\n"
+POSITION_ENTRY = (
+    "{emoji} **{title}**\n"
+    "• Outcome: {outcome}\n"
+    "• Shares: {shares:.2f}\n"
+    "• Avg Price: ${average_price:.3f}\n"
+    "• Current: ${current_price:.3f}\n"
+    "• P&L: {pnl}\n\n"
+).format
+POSITIONS_FOOTER = "**Total P&L:** {}".format
+
+WALLET_DISCONNECTED_TEXT = "💳 **Wallet Management**\n\nNo wallet connected. Connect a wallet to start trading!"
+WALLET_TEXT = (
+    "💳 **Wallet Management**\n\n"
+    "**Address:** `{address}`\n"
+    "**Network:** {network}\n\n"
+    "**Balances:**\n"
+    "• POL: {pol}\n"
+    "• USDC.e: {usdc}\n\n"
+    "**Actions:**"
+).format
+
+HISTORY_EMPTY_TEXT = "📜 **Transaction History**\n\nNo token transfers yet."
+HISTORY_HEADER = "📜 **Transaction History**\n\n"
+HISTORY_ENTRY = "{emoji} {amount} {token} {preposition} `{counterparty}`\n   {when} · `{hash}`\n".format
+
+REFERRAL_TEXT = (
+    "👥 **Referral System**\n\n"
+    "**Your Referral Code:** `{code}`\n\n"
+    "**Stats:**\n"
+    "• Total Referrals: {referrals}\n"
+    "• Total Rewards: ${rewards}\n\n"
+    "**Share your link:**\n"
+    "`https://t.me/your_bot?start={code}`\n\n"
+    "**Referral Tree:**\n"
+    "🔗 You are at the top of the pyramid!\n"
+    "📊 Earn 10% commission from all your referrals' trades!"
+).format
+
+COPY_TRADING_TEXT = (
+    "📈 **Copy Trading**\n\n"
+    "**Status:** {status_emoji} {status}\n\n"
+    "**Settings:**\n"
+    "• Max Position Size: ${max_position_size}\n"
+    "• Max Daily Volume: ${max_daily_volume}\n"
+    "• Copy Percentage: {copy_percentage}\n"
+    "• Min Confidence: {min_confidence}\n\n"
+    "**How it works:**\n"
+    "1. Follow successful traders\n"
+    "2. Automatically copy their trades\n"
+    "3. Set your risk parameters\n"
+    "4. Earn while you sleep!"
+).format
+
+PROFILE_TEXT = (
+    "👤 **My Profile**\n\n"
+    "**User Info:**\n"
+    "• Username: @{username}\n"
+    "• Name: {first_name} {last_name}\n"
+    "• Language: {language}\n"
+    "• Member Since: {member_since}\n\n"
+    "**Trading Stats:**\n"
+    "• Total Trades: {total_trades}\n"
+    "• Active Positions: {total_positions}\n"
+    "• Referrals: {referrals}\n\n"
+    "**Settings:**\n"
+    "• Slippage: {slippage}\n"
+    "• Gas Mode: {gas_mode}\n"
+    "• Last Active: {last_active}"
+).format
+
+SETTINGS_TEXT = (
+    "⚙️ **Settings**\n\n"
+    "**Trading Settings:**\n"
+    "• Slippage Tolerance: {slippage}\n"
+    "• Gas Fee Mode: {gas_mode}\n\n"
+    "**Language Settings:**\n"
+    "• Current Language: {language}\n\n"
+    "**Security Settings:**\n"
+    "• Private Key: Encrypted ✅\n"
+    "• 2FA: Not enabled\n\n"
+    "**Gas Fee Modes:**\n"
+    "• Fast: 1.2x base fee\n"
+    "• Turbo: 1.5x base fee\n"
+    "• Ultra: 2.0x base fee"
+).format
+
+HELP_TEXT = (
+    "❓ **Help & FAQ**\n\n"
+    "**Getting Started:**\n"
+    "1. Connect your wallet\n"
+    "2. Search for markets\n"
+    "3. Place your first trade\n"
+    "4. Monitor your positions\n\n"
+    "**Trading:**\n"
+    "• Send any text to search markets\n"
+    "• Use limit orders for better prices\n"
+    "• Set slippage protection\n"
+    "• Monitor gas fees\n"
+    "• Get pinged at a price: /alert <market> <YES|NO> <above|below> <price>\n"
+    "• Exit automatically: /exit <position> <sl|tp> <price>\n"
+    "• Work large orders: /algo <market> <YES|NO> <buy|sell> <shares> <twap|iceberg|pov> [limit]\n"
+    "• Cancel open orders: /cancelall [market] [buy|sell]\n\n"
+    "• **Copy Trading:** Follow successful traders\n"
+    "• **Referrals:** Share your link to earn\n"
+    "• **Bridge:** Transfer tokens between chains\n\n"
+    "**Need More Help?**\n"
+    "• Join our community: @polyfocus_portal\n"
+    "• Read docs: docs.polyfocus.com\n"
+    "• Contact support: @polyfocus_support"
+)
+
+MARKET_TEXT = (
+    "📊 **{title}**\n\n"
+    "{description}\n\n"
+    "**Prices:**\n"
+    "• YES: {yes_price}\n"
+    "• NO: {no_price}\n\n"
+    "**Volume:** {volume}"
+).format
+
+REFERRAL_LINK_TEXT = "🔗 **Your referral link:**\n`https://t.me/your_bot?start={}`".format
+
+Screen = Tuple[str, InlineKeyboardMarkup]
+
+
+def render_positions(positions: List) -> Screen:
+    """Render the positions dashboard."""
+    if not positions:
+        return POSITIONS_EMPTY_TEXT, BACK_TO_MAIN_MARKUP
+
+    parts = [POSITIONS_HEADER]
+    total_pnl = 0
+    for pos in positions:
+        pnl = pos.unrealized_pnl
+        parts.append(POSITION_ENTRY(
+            emoji="📈" if pnl > 0 else "📉" if pnl < 0 else "➡️",
+            title=pos.market_title,
+            outcome=pos.outcome,
+            shares=pos.shares,
+            average_price=pos.average_price,
+            current_price=pos.current_price,
+            pnl=format_currency(pnl)
+        ))
+        total_pnl += pnl
+    parts.append(POSITIONS_FOOTER(format_currency(total_pnl)))
+    return "".join(parts), BACK_TO_MAIN_MARKUP
+
+
+def render_wallet(wallet, pol_balance: float = 0.0, usdc_balance: float = 0.0) -> Screen:
+    """Render the wallet management screen."""
+    if not wallet:
+        return WALLET_DISCONNECTED_TEXT, WALLET_DISCONNECTED_MARKUP
+    return WALLET_TEXT(
+        address=wallet.address,
+        network=wallet.network.upper(),
+        pol=format_currency(pol_balance),
+        usdc=format_currency(usdc_balance)
+    ), WALLET_MARKUP
+
+
+def render_history(transfers: List[Dict], next_cursor: Optional[Tuple[int, int]] = None) -> Screen:
+    """Render one page of wallet transfers; older pages are one button away."""
+    rows = [[InlineKeyboardButton("💳 Wallet", callback_data="wallet")], [BACK_TO_MAIN_BUTTON]]
+    if next_cursor is not None:
+        rows.insert(0, [InlineKeyboardButton(
+            "⬇️ Older", callback_data=f"wallet_history_{next_cursor[0]}_{next_cursor[1]}"
+        )])
+    if not transfers:
+        return HISTORY_EMPTY_TEXT, InlineKeyboardMarkup(rows)
+
+    parts = [HISTORY_HEADER]
+    for transfer in transfers:
+        sent = transfer['type'] == 'send'
+        counterparty = transfer['to'] if sent else transfer['from']
+        parts.append(HISTORY_ENTRY(
+            emoji="📤" if sent else "📥",
+            amount=format_currency(transfer['amount']),
+            token=transfer['token'],
+            preposition="to" if sent else "from",
+            counterparty=f"{counterparty[:6]}…{counterparty[-4:]}",
+            when=(transfer['timestamp'] or f"block {transfer['block']}")[:16].replace('T', ' '),
+            hash=f"{transfer['hash'][:10]}…"
+        ))
+    return "".join(parts), InlineKeyboardMarkup(rows)
+
+
+def render_referral(referral_code: str, referrals: int, total_rewards: float) -> Screen:
+    """Render the referral screen; its keyboard embeds the user's code."""
+    markup = InlineKeyboardMarkup([
+        [InlineKeyboardButton("📋 Copy Link", callback_data=f"copy_referral_{referral_code}")],
+        [InlineKeyboardButton("📊 View Tree", callback_data="referral_tree")],
+        [BACK_TO_MAIN_BUTTON]
+    ])
+    return REFERRAL_TEXT(
+        code=referral_code,
+        referrals=referrals,
+        rewards=format_currency(total_rewards)
+    ), markup
+
+
+def render_market(market: Dict) -> Screen:
+    """Render a market detail screen from Gamma market data."""
+    def price(key):
+        value = market.get(key)
+        return f"${float(value):.3f}" if value is not None else 'N/A'
+
+    description = market.get('description', '')
+    return MARKET_TEXT(
+        title=market.get('title', 'Unknown Market'),
+        description=description[:300] + '...' if len(description) > 300 else description,
+        yes_price=price('yes_price'),
+        no_price=price('no_price'),
+        volume=format_currency(float(market.get('volume', 0) or 0))
+    ), BACK_TO_MAIN_MARKUP
+
+
+def render_copy_trading(settings) -> Screen:
+    """Render the copy trading screen."""
+    return COPY_TRADING_TEXT(
+        status_emoji="✅" if settings.is_enabled else "❌",
+        status='Enabled' if settings.is_enabled else 'Disabled',
+        max_position_size=format_currency(settings.max_position_size),
+        max_daily_volume=format_currency(settings.max_daily_volume),
+        copy_percentage=format_percentage(settings.copy_percentage),
+        min_confidence=format_percentage(settings.min_confidence)
+    ), COPY_TRADING_MARKUP
+
+
+def render_profile(user, total_trades: int, total_positions: int, referrals: int) -> Screen:
+    """Render the profile screen."""
+    return PROFILE_TEXT(
+        username=user.username or 'N/A',
+        first_name=user.first_name,
+        last_name=user.last_name or '',
+        language=user.language.upper(),
+        member_since=user.created_at.strftime('%Y-%m-%d'),
+        total_trades=total_trades,
+        total_positions=total_positions,
+        referrals=referrals,
+        slippage=format_percentage(user.slippage_tolerance),
+        gas_mode=user.gas_fee_mode.title(),
+        last_active=user.last_active.strftime('%Y-%m-%d %H:%M')
+    ), PROFILE_MARKUP
+
+
+def render_settings(user) -> Screen:
+    """Render the settings screen."""
+    return SETTINGS_TEXT(
+        slippage=format_percentage(user.slippage_tolerance),
+        gas_mode=user.gas_fee_mode.title(),
+        language=user.language.upper()
+    ), SETTINGS_MARKUP
+
+
+def render_help() -> Screen:
+    """Render the help screen."""
+    return HELP_TEXT, HELP_MARKUP
+
+
+class ScreenRenderer:
+    """Edits messages only when their rendered content changes."""
+
+    def __init__(self, max_messages: int = 50000):
+        self.max_messages = max_messages
+        self._shown: "OrderedDict[Hashable, Tuple[bytes, Optional[InlineKeyboardMarkup]]]" = OrderedDict()
+        self.metrics = {'edits': 0, 'skipped': 0}
+
+    @staticmethod
+    def message_key(query) -> Optional[Hashable]:
+        """Identify the message a callback query belongs to."""
+        message = getattr(query, 'message', None)
+        if message is not None:
+            return (message.chat_id, message.message_id)
+        return getattr(query, 'inline_message_id', None)
+
+    @staticmethod
+    def _fingerprint(text: str, reply_markup: Optional[InlineKeyboardMarkup]):
+        # Markups compare by their buttons; the shared static ones short-circuit on identity
+        return hashlib.blake2b(text.encode(), digest_size=16).digest(), reply_markup
+
+    def _remember(self, key: Hashable, fingerprint):
+        self._shown[key] = fingerprint
+        self._shown.move_to_end(key)
+        if len(self._shown) > self.max_messages:
+            self._shown.popitem(last=False)
+
+    def forget(self, key: Hashable):
+        """Drop the cached content for a message."""
+        self._shown.pop(key, None)
+
+    async def edit(self, query, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                   parse_mode: Optional[str] = ParseMode.MARKDOWN) -> bool:
+        """Edit the query's message unless it already shows this content.
+
+        Returns True when Telegram was called.
+        """
+        key = self.message_key(query)
+        fingerprint = self._fingerprint(text, reply_markup)
+        if key is not None and self._shown.get(key) == fingerprint:
+            self.metrics['skipped'] += 1
+            return False
+
+        try:
+            await query.edit_message_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+        except BadRequest as e:
+            if 'not modified' not in str(e).lower():
+                raise
+        self.metrics['edits'] += 1
+        if key is not None:
+            self._remember(key, fingerprint)
+        return True
+
+    async def show(self, query, screen: Screen) -> bool:
+        """Edit the query's message with a rendered ``(text, markup)`` screen."""
+        text, reply_markup = screen
+        return await self.edit(query, text, reply_markup)
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Return edit and skip counters."""
+        return {**self.metrics, 'tracked_messages': len(self._shown)}
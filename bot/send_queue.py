@@ -0,0 +1,319 @@
+"""
+Outbound Telegram message scheduler.
+
+Messages are queued by priority and released through token buckets that
+model Telegram's limits: ~30 msg/s per bot, ~1 msg/s per private chat and
+20 msg/min per group. Pending edits of the same message are coalesced so only
+the newest text is sent, and 429 responses pause sending for Retry-After.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram.error import BadRequest, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, lower sends first
+PRIORITY_TRADE = 0
+PRIORITY_ALERT = 1
+PRIORITY_DEFAULT = 2
+PRIORITY_MARKETING = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_TRADE: 'trade',
+    PRIORITY_ALERT: 'alert',
+    PRIORITY_DEFAULT: 'default',
+    PRIORITY_MARKETING: 'marketing'
+}
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds until a token is available, without consuming one."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: Optional[float] = None):
+        """Take one token; callers check ``delay`` first."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+
+
+class OutboundMessage:
+    """A queued Telegram API call and the future that receives its result."""
+
+    def __init__(self, chat_id: int, method: str, kwargs: Dict[str, Any],
+                 priority: int = PRIORITY_DEFAULT, coalesce_key: Optional[Tuple] = None):
+        self.chat_id = chat_id
+        self.method = method
+        self.kwargs = kwargs
+        self.priority = priority
+        self.coalesce_key = coalesce_key
+        self.attempts = 0
+        self.superseded = False
+        self.enqueued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class SendQueue:
+    """Priority send queue with global, per-chat and per-group rate shaping."""
+
+    def __init__(self, bot=None, global_rate: float = 30.0, private_rate: float = 1.0,
+                 group_rate: float = 20 / 60, max_retries: int = 3,
+                 chat_bucket_ttl: float = 300.0):
+        self.bot = bot
+        self.global_rate = global_rate
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.chat_bucket_ttl = chat_bucket_ttl
+
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_buckets: Dict[int, TokenBucket] = {}
+
+        self._ready: List[Tuple] = []     # (priority, seq, message)
+        self._delayed: List[Tuple] = []   # (ready_at, priority, seq, message)
+        self._edits: Dict[Tuple, OutboundMessage] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._paused_until = 0.0
+        self._worker: Optional[asyncio.Task] = None
+
+        self.metrics = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'coalesced': 0,
+            'retry_after': 0,
+            'not_modified': 0
+        }
+
+    def bind(self, bot):
+        """Attach the Telegram bot used for sending."""
+        self.bot = bot
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            # Negative chat ids are groups and channels
+            rate = self.group_rate if chat_id < 0 else self.private_rate
+            bucket = TokenBucket(rate, 1)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def enqueue(self, message: OutboundMessage) -> asyncio.Future:
+        """Queue a message and return the future for its API result."""
+        if message.coalesce_key is not None:
+            previous = self._edits.get(message.coalesce_key)
+            if previous is not None and not previous.future.done():
+                # The newer edit replaces the older one; both resolve together
+                previous.superseded = True
+                message.priority = min(message.priority, previous.priority)
+                self.metrics['coalesced'] += 1
+                _chain_future(message.future, previous.future)
+            self._edits[message.coalesce_key] = message
+
+        heapq.heappush(self._ready, (message.priority, next(self._seq), message))
+        self.metrics['enqueued'] += 1
+        self._wakeup.set()
+        return message.future
+
+    def send_message(self, chat_id: int, text: str, priority: int = PRIORITY_DEFAULT,
+                     **kwargs) -> asyncio.Future:
+        """Queue ``bot.send_message``."""
+        kwargs.update(chat_id=chat_id, text=text)
+        return self.enqueue(OutboundMessage(chat_id, 'send_message', kwargs, priority))
+
+    def edit_message_text(self, chat_id: int, message_id: int, text: str,
+                          priority: int = PRIORITY_DEFAULT, **kwargs) -> asyncio.Future:
+        """Queue ``bot.edit_message_text``, coalescing with pending edits of the same message."""
+        kwargs.update(chat_id=chat_id, message_id=message_id, text=text)
+        return self.enqueue(OutboundMessage(
+            chat_id, 'edit_message_text', kwargs, priority,
+            coalesce_key=(chat_id, message_id)
+        ))
+
+    def _promote_delayed(self, now: float):
+        while self._delayed and self._delayed[0][0] <= now:
+            _, priority, seq, message = heapq.heappop(self._delayed)
+            heapq.heappush(self._ready, (priority, seq, message))
+
+    def _next_wakeup(self, now: float) -> Optional[float]:
+        if self._ready:
+            return max(0.0, self._paused_until - now)
+        if self._delayed:
+            return max(0.0, self._delayed[0][0] - now, self._paused_until - now)
+        return None
+
+    def _take_next(self, now: float) -> Optional[OutboundMessage]:
+        """Pop the best message whose chat bucket has a token."""
+        while self._ready:
+            priority, seq, message = heapq.heappop(self._ready)
+            if message.superseded or message.future.done():
+                continue
+            wait = self._chat_bucket(message.chat_id).delay(now)
+            if wait > 0:
+                # Park it without blocking messages for other chats
+                heapq.heappush(self._delayed, (now + wait, priority, seq, message))
+                continue
+            return message
+        return None
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            self._promote_delayed(now)
+
+            if now < self._paused_until or not self._ready:
+                timeout = self._next_wakeup(now)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            global_wait = self.global_bucket.delay(now)
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            message = self._take_next(now)
+            if message is None:
+                continue
+
+            self.global_bucket.consume(now)
+            self._chat_bucket(message.chat_id).consume(now)
+            await self._dispatch(message)
+            self._prune_buckets(now)
+
+    async def _dispatch(self, message: OutboundMessage):
+        message.attempts += 1
+        try:
+            result = await getattr(self.bot, message.method)(**message.kwargs)
+        except RetryAfter as e:
+            self.metrics['retry_after'] += 1
+            retry_after = e.retry_after
+            if hasattr(retry_after, 'total_seconds'):
+                retry_after = retry_after.total_seconds()
+            retry_after = float(retry_after)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            logger.warning(f"Telegram flood limit hit, pausing sends for {retry_after:.1f}s")
+            if message.attempts <= self.max_retries:
+                heapq.heappush(self._delayed, (self._paused_until, message.priority,
+                                               next(self._seq), message))
+                return
+            self._fail(message, e)
+        except BadRequest as e:
+            if 'not modified' in str(e).lower():
+                # Identical edit: nothing to do, treat as delivered
+                self.metrics['not_modified'] += 1
+                self._finish(message, None)
+            else:
+                self._fail(message, e)
+        except Exception as e:
+            self._fail(message, e)
+        else:
+            self.metrics['sent'] += 1
+            self._finish(message, result)
+
+    def _finish(self, message: OutboundMessage, result: Any):
+        if message.coalesce_key is not None and self._edits.get(message.coalesce_key) is message:
+            del self._edits[message.coalesce_key]
+        if not message.future.done():
+            message.future.set_result(result)
+
+    def _fail(self, message: OutboundMessage, error: Exception):
+        self.metrics['failed'] += 1
+        logger.error(f"Failed to send {message.method} to chat {message.chat_id}: {error}")
+        if message.coalesce_key is not None and self._edits.get(message.coalesce_key) is message:
+            del self._edits[message.coalesce_key]
+        if not message.future.done():
+            message.future.set_exception(error)
+            # Fire-and-forget callers never await the future
+            message.future.exception()
+
+    def _prune_buckets(self, now: float):
+        if len(self.chat_buckets) < 10000:
+            return
+        stale = [chat_id for chat_id, bucket in self.chat_buckets.items()
+                 if now - bucket.updated_at > self.chat_bucket_ttl]
+        for chat_id in stale:
+            del self.chat_buckets[chat_id]
+
+    async def start(self):
+        """Start the sender task."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run(), name='send_queue')
+
+    async def stop(self):
+        """Stop the sender task, failing anything still queued."""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        for entry in self._ready + self._delayed:
+            message = entry[-1]
+            if not message.future.done():
+                message.future.cancel()
+        self._ready.clear()
+        self._delayed.clear()
+        self._edits.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return queue depth and delivery counters."""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for entry in self._ready + self._delayed:
+            message = entry[-1]
+            if not message.superseded and not message.future.done():
+                depth[PRIORITY_NAMES.get(message.priority, 'default')] += 1
+        return {
+            **self.metrics,
+            'queue_depth': sum(depth.values()),
+            'queue_depth_by_priority': depth,
+            'delayed': len(self._delayed),
+            'paused_for': round(max(0.0, self._paused_until - time.monotonic()), 2),
+            'tracked_chats': len(self.chat_buckets)
+        }
+
+
+def _chain_future(source: asyncio.Future, target: asyncio.Future):
+    """Resolve ``target`` with whatever ``source`` resolves to."""
+    def copy_result(done: asyncio.Future):
+        if target.done():
+            return
+        if done.cancelled():
+            target.cancel()
+        elif done.exception() is not None:
+            target.set_exception(done.exception())
+            target.exception()
+        else:
+            target.set_result(done.result())
+    source.add_done_callback(copy_result)
@@ -18,10 +18,39 @@ class Config:
     POLYMARKET_CLOB_API_URL = os.getenv('POLYMARKET_CLOB_API_URL', 'https://clob.polymarket.com')
     POLYMARKET_API_KEY = os.getenv('POLYMARKET_API_KEY')
     
+    # Upstream API resilience
+    API_DEFAULT_TIMEOUT = float(os.getenv('API_DEFAULT_TIMEOUT', 10))
+    API_RETRY_ATTEMPTS = int(os.getenv('API_RETRY_ATTEMPTS', 3))
+    API_BREAKER_FAILURE_THRESHOLD = int(os.getenv('API_BREAKER_FAILURE_THRESHOLD', 5))
+    API_BREAKER_RESET_TIMEOUT = float(os.getenv('API_BREAKER_RESET_TIMEOUT', 30))
+    
+    # Client-side request budgets (requests per second)
+    API_RATE_LIMITS = {
+        'gamma': float(os.getenv('GAMMA_API_RATE_LIMIT', 10)),
+        'data': float(os.getenv('DATA_API_RATE_LIMIT', 10)),
+        'clob': float(os.getenv('CLOB_API_RATE_LIMIT', 20)),
+        'lifi': float(os.getenv('LIFI_API_RATE_LIMIT', 2)),
+        'rpc': float(os.getenv('RPC_RATE_LIMIT', 20)),
+        'coingecko': float(os.getenv('COINGECKO_API_RATE_LIMIT', 0.5))
+    }
+    API_DEFAULT_RATE_LIMIT = float(os.getenv('API_DEFAULT_RATE_LIMIT', 10))
+    API_KEY_RATE_LIMIT = float(os.getenv('API_KEY_RATE_LIMIT', 25))
+    
+    # Identical GETs within this many seconds share one response
+    API_MICRO_CACHE_TTL = float(os.getenv('API_MICRO_CACHE_TTL', 1.0))
+    
+    # Stale-while-revalidate response cache; set API_CACHE_DIR to persist it
+    API_CACHE_MAX_BYTES = int(os.getenv('API_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    API_CACHE_DIR = os.getenv('API_CACHE_DIR')
+    
     # LI.FI Bridge API
     LIFI_API_URL = os.getenv('LIFI_API_URL', 'https://li.quest/v1')
     LIFI_API_KEY = os.getenv('LIFI_API_KEY')
     
+    # Polygon JSON-RPC node
+    POLYGON_RPC_URL = os.getenv('POLYGON_RPC_URL', 'https://polygon-rpc.com')
+    MULTICALL3_ADDRESS = os.getenv('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')
+    
     # Google Translate API
     GOOGLE_TRANSLATE_API_KEY = os.getenv('GOOGLE_TRANSLATE_API_KEY')
     
@@ -33,14 +62,93 @@ class Config:
     PORT = int(os.getenv('PORT', 8000))
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     
+    # Outbound Telegram rate limits (messages per second)
+    TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+    TELEGRAM_PRIVATE_CHAT_RATE = float(os.getenv('TELEGRAM_PRIVATE_CHAT_RATE', 1))
+    TELEGRAM_GROUP_CHAT_RATE = float(os.getenv('TELEGRAM_GROUP_CHAT_RATE', 20 / 60))
+    
+    # Update processing concurrency
+    MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', 64))
+    MAX_PENDING_UPDATES_PER_USER = int(os.getenv('MAX_PENDING_UPDATES_PER_USER', 10))
+    
     # Trading Configuration
     DEFAULT_SLIPPAGE = 0.10  # 10%
+    SMART_ORDER_URGENCY = float(os.getenv('SMART_ORDER_URGENCY', 0.5))  # 0 prefers resting, 1 prefers taking
+    
+    # Order submission pipeline
+    ORDER_SUBMIT_CONCURRENCY = int(os.getenv('ORDER_SUBMIT_CONCURRENCY', 4))
+    ORDER_SUBMIT_ATTEMPTS = int(os.getenv('ORDER_SUBMIT_ATTEMPTS', 3))
+    ORDER_SUBMIT_WAIT = float(os.getenv('ORDER_SUBMIT_WAIT', 5))  # Seconds a handler waits for the outcome
+    ORDER_DEDUPE_WINDOW = float(os.getenv('ORDER_DEDUPE_WINDOW', 10))  # Seconds within which repeat taps are merged
+    ORDER_RECONCILE_INTERVAL = float(os.getenv('ORDER_RECONCILE_INTERVAL', 30))
+    ORDER_CANCEL_CONCURRENCY = int(os.getenv('ORDER_CANCEL_CONCURRENCY', 10))
+    # Cancel every resting order once these feeds have failed for this many seconds; 0 disables
+    ORDER_CANCEL_ON_STALE_FEED = float(os.getenv('ORDER_CANCEL_ON_STALE_FEED', 0))
+    ORDER_CANCEL_STALE_FEEDS = os.getenv('ORDER_CANCEL_STALE_FEEDS', 'clob').split(',')
+    ORDER_CANCEL_STALE_CHECK_INTERVAL = float(os.getenv('ORDER_CANCEL_STALE_CHECK_INTERVAL', 5))
+    
+    # Order status polling; faster the more orders are open
+    ORDER_STATUS_MIN_INTERVAL = float(os.getenv('ORDER_STATUS_MIN_INTERVAL', 5))
+    ORDER_STATUS_MAX_INTERVAL = float(os.getenv('ORDER_STATUS_MAX_INTERVAL', 60))
+    ORDER_STATUS_WALLET_CONCURRENCY = int(os.getenv('ORDER_STATUS_WALLET_CONCURRENCY', 5))
     GAS_FEE_MODES = {
         'fast': 1.2,
         'turbo': 1.5,
         'ultra': 2.0
     }
     
+    # Copy trading
+    COPY_TRADING_POLL_INTERVAL = float(os.getenv('COPY_TRADING_POLL_INTERVAL', 5))
+    COPY_TRADING_BATCH_SIZE = int(os.getenv('COPY_TRADING_BATCH_SIZE', 50))
+    COPY_TRADING_RELOAD_INTERVAL = float(os.getenv('COPY_TRADING_RELOAD_INTERVAL', 60))
+    COPY_TRADING_MIN_NOTIONAL = float(os.getenv('COPY_TRADING_MIN_NOTIONAL', 1.0))  # Smallest copy order in USD
+    
+    # Price alerts
+    PRICE_ALERT_POLL_INTERVAL = float(os.getenv('PRICE_ALERT_POLL_INTERVAL', 10))
+    PRICE_ALERT_CONCURRENCY = int(os.getenv('PRICE_ALERT_CONCURRENCY', 5))
+    PRICE_ALERT_MAX_PER_USER = int(os.getenv('PRICE_ALERT_MAX_PER_USER', 20))
+    
+    # Stop-loss / take-profit
+    CONDITIONAL_ORDER_POLL_INTERVAL = float(os.getenv('CONDITIONAL_ORDER_POLL_INTERVAL', 2))
+    CONDITIONAL_ORDER_CONCURRENCY = int(os.getenv('CONDITIONAL_ORDER_CONCURRENCY', 20))
+    CONDITIONAL_ORDER_BATCH_SIZE = int(os.getenv('CONDITIONAL_ORDER_BATCH_SIZE', 100))
+    CONDITIONAL_ORDER_SLIPPAGE = float(os.getenv('CONDITIONAL_ORDER_SLIPPAGE', 0.05))  # Exit price below the trigger tick
+    
+    # Sliced execution
+    EXECUTION_TICK_INTERVAL = float(os.getenv('EXECUTION_TICK_INTERVAL', 2))
+    EXECUTION_TWAP_DURATION = float(os.getenv('EXECUTION_TWAP_DURATION', 600))  # Seconds
+    EXECUTION_TWAP_SLICES = int(os.getenv('EXECUTION_TWAP_SLICES', 10))
+    EXECUTION_ICEBERG_DISPLAY = float(os.getenv('EXECUTION_ICEBERG_DISPLAY', 0.1))  # Visible fraction of the parent
+    EXECUTION_PARTICIPATION_RATE = float(os.getenv('EXECUTION_PARTICIPATION_RATE', 0.2))  # Share of visible depth per slice
+    EXECUTION_MIN_SLICE_SHARES = float(os.getenv('EXECUTION_MIN_SLICE_SHARES', 1))
+    
+    # On-chain balances; None as token address means the native coin
+    BALANCE_TOKENS = {
+        'POL': (None, 18),
+        'USDC': (os.getenv('USDC_TOKEN_ADDRESS', '0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174'), 6),
+        'ETH': (os.getenv('WETH_TOKEN_ADDRESS', '0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619'), 18)
+    }
+    BALANCE_MULTICALL_SIZE = int(os.getenv('BALANCE_MULTICALL_SIZE', 300))  # Calls per multicall
+    BALANCE_BLOCK_TTL = float(os.getenv('BALANCE_BLOCK_TTL', 2))  # Seconds to trust the last block number
+    BALANCE_REFRESH_INTERVAL = float(os.getenv('BALANCE_REFRESH_INTERVAL', 30))
+    BALANCE_ACTIVE_WINDOW = float(os.getenv('BALANCE_ACTIVE_WINDOW', 3600))  # Refresh users active this recently
+    
+    # ERC-20 transfer indexer for the tokens above
+    TRANSFER_INDEXER_POLL_INTERVAL = float(os.getenv('TRANSFER_INDEXER_POLL_INTERVAL', 5))
+    TRANSFER_INDEXER_CONFIRMATIONS = int(os.getenv('TRANSFER_INDEXER_CONFIRMATIONS', 20))  # Stay behind reorgs
+    TRANSFER_INDEXER_MAX_BLOCKS = int(os.getenv('TRANSFER_INDEXER_MAX_BLOCKS', 500))  # Blocks per eth_getLogs
+    
+    # Pre-generated wallets claimed at onboarding
+    WALLET_POOL_TARGET = int(os.getenv('WALLET_POOL_TARGET', 200))
+    WALLET_POOL_LOW_WATER = int(os.getenv('WALLET_POOL_LOW_WATER', 50))  # Refill below this many
+    WALLET_POOL_BATCH_SIZE = int(os.getenv('WALLET_POOL_BATCH_SIZE', 25))  # Wallets per worker job
+    WALLET_POOL_WORKERS = int(os.getenv('WALLET_POOL_WORKERS', 2))
+    WALLET_POOL_CHECK_INTERVAL = float(os.getenv('WALLET_POOL_CHECK_INTERVAL', 10))
+    
+    # Risk limits
+    RISK_VOLUME_WINDOW = float(os.getenv('RISK_VOLUME_WINDOW', 86400))  # Rolling volume window in seconds
+    RISK_VOLUME_BUCKETS = int(os.getenv('RISK_VOLUME_BUCKETS', 96))
+    
     # Supported Languages
     SUPPORTED_LANGUAGES = {
         'en': 'English',
@@ -1,9 +1,15 @@
-from .models import Base, User, Wallet, Position, Trade, CopyTradingSettings, ReferralReward, PriceUpdate
+from .models import (
+    Base, User, Wallet, PooledWallet, WalletTransfer, IndexerCursor, Position, Trade, OrderOutbox,
+    CopyTradingSettings, CopyTradingFollow, PriceAlert, ConditionalOrder, ExecutionOrder, ExecutionSlice,
+    ReferralReward, PriceUpdate
+)
 from .database import get_db, init_db
-from .encryption import encrypt_private_key, decrypt_private_key
+from .encryption import encrypt_private_key, encrypt_private_keys, decrypt_private_key
 
 __all__ = [
-    'Base', 'User', 'Wallet', 'Position', 'Trade', 'CopyTradingSettings', 
-    'ReferralReward', 'PriceUpdate', 'get_db', 'init_db',
-    'encrypt_private_key', 'decrypt_private_key'
+    'Base', 'User', 'Wallet', 'PooledWallet', 'WalletTransfer', 'IndexerCursor', 'Position', 'Trade',
+    'OrderOutbox', 'CopyTradingSettings', 'CopyTradingFollow',
+    'PriceAlert', 'ConditionalOrder', 'ExecutionOrder', 'ExecutionSlice', 'ReferralReward', 'PriceUpdate',
+    'get_db', 'init_db',
+    'encrypt_private_key', 'encrypt_private_keys', 'decrypt_private_key'
 ]
@@ -8,6 +8,9 @@ from .models import Base
 engine = create_engine(
     Config.DATABASE_URL,
     poolclass=StaticPool,
+    # Every session shares the one connection; a session dropped without close()
+    # must not roll back another session's open transaction when it is collected
+    pool_reset_on_return=None,
     connect_args={"check_same_thread": False} if "sqlite" in Config.DATABASE_URL else {}
 )
 
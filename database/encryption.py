@@ -3,15 +3,17 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 import os
+from typing import List, Optional
 from config import Config
 
-def get_encryption_key():
+def get_encryption_key(secret: Optional[str] = None):
     """Get or create encryption key."""
-    if not Config.ENCRYPTION_KEY:
+    secret = secret or Config.ENCRYPTION_KEY
+    if not secret:
         raise ValueError("ENCRYPTION_KEY must be set in environment variables")
     
     # Convert the key to bytes and create a Fernet key
-    key = Config.ENCRYPTION_KEY.encode()
+    key = secret.encode()
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
@@ -27,6 +29,11 @@ def encrypt_private_key(private_key: str) -> str:
     encrypted_key = f.encrypt(private_key.encode())
     return base64.urlsafe_b64encode(encrypted_key).decode()
 
+def encrypt_private_keys(private_keys: List[str], secret: Optional[str] = None) -> List[str]:
+    """Encrypt several private keys, deriving the key only once."""
+    f = Fernet(get_encryption_key(secret))
+    return [base64.urlsafe_b64encode(f.encrypt(private_key.encode())).decode() for private_key in private_keys]
+
 def decrypt_private_key(encrypted_key: str) -> str:
     """Decrypt a private key."""
     f = Fernet(get_encryption_key())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -46,6 +46,43 @@ class Wallet(Base):
     # Relationships
     user = relationship("User", back_populates="wallets")
 
+class PooledWallet(Base):
+    __tablename__ = 'wallet_pool'
+    
+    id = Column(Integer, primary_key=True)
+    address = Column(String(255), unique=True, nullable=False)
+    encrypted_private_key = Column(Text, nullable=False)  # Encrypted private key
+    network = Column(String(50), default='polygon', index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class WalletTransfer(Base):
+    __tablename__ = 'wallet_transfers'
+    __table_args__ = (
+        UniqueConstraint('wallet_address', 'tx_hash', 'log_index'),
+        # History pages walk this index newest first
+        Index('ix_wallet_transfers_history', 'wallet_address', 'block_number', 'log_index'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    wallet_address = Column(String(42), nullable=False)  # Lowercase; one row per side we own
+    direction = Column(String(10), nullable=False)  # in, out
+    counterparty = Column(String(42), nullable=False)
+    token_address = Column(String(42), nullable=False)
+    token = Column(String(20), nullable=False)
+    amount = Column(Float, nullable=False)
+    raw_amount = Column(String(78), nullable=False)  # Exact uint256
+    tx_hash = Column(String(66), nullable=False)
+    log_index = Column(Integer, nullable=False)
+    block_number = Column(Integer, nullable=False)
+    block_time = Column(DateTime)
+
+class IndexerCursor(Base):
+    __tablename__ = 'indexer_cursors'
+    
+    name = Column(String(50), primary_key=True)
+    block_number = Column(Integer, nullable=False)  # Last block fully indexed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Position(Base):
     __tablename__ = 'positions'
     
@@ -77,7 +114,7 @@ class Trade(Base):
     price = Column(Float, nullable=False)
     total_amount = Column(Float, nullable=False)
     fees = Column(Float, default=0.0)
-    status = Column(String(20), default='pending')  # pending, filled, cancelled, failed
+    status = Column(String(20), default='pending')  # queued, pending, filled, cancelled, failed
     order_id = Column(String(255))
     transaction_hash = Column(String(255))
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -86,6 +123,27 @@ class Trade(Base):
     # Relationships
     user = relationship("User", back_populates="trades")
 
+class OrderOutbox(Base):
+    __tablename__ = 'order_outbox'
+    
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String(64), unique=True, nullable=False)
+    fingerprint = Column(String(64), nullable=False, index=True)  # Same order from the same user
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    trade_id = Column(Integer, ForeignKey('trades.id'), nullable=False)
+    order_type = Column(String(20), nullable=False)  # LIMIT, MARKET
+    payload = Column(Text, nullable=False)  # JSON order data sent upstream
+    status = Column(String(20), default='queued')  # queued, submitting, submitted, unknown, failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    order_id = Column(String(255))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    submitted_at = Column(DateTime)
+    
+    # Relationships
+    trade = relationship("Trade")
+
 class CopyTradingSettings(Base):
     __tablename__ = 'copy_trading_settings'
     
@@ -102,6 +160,99 @@ class CopyTradingSettings(Base):
     # Relationships
     user = relationship("User", back_populates="copy_trading_settings")
 
+class CopyTradingFollow(Base):
+    __tablename__ = 'copy_trading_follows'
+    __table_args__ = (UniqueConstraint('user_id', 'leader_address'),)
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    leader_address = Column(String(255), nullable=False, index=True)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User")
+
+class PriceAlert(Base):
+    __tablename__ = 'price_alerts'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    market_id = Column(String(255), nullable=False)
+    outcome = Column(String(50), nullable=False)
+    direction = Column(String(10), nullable=False)  # above, below
+    threshold = Column(Float, nullable=False)
+    is_active = Column(Boolean, default=True, index=True)
+    triggered_price = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    triggered_at = Column(DateTime)
+    
+    # Relationships
+    user = relationship("User")
+
+class ConditionalOrder(Base):
+    __tablename__ = 'conditional_orders'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    position_id = Column(Integer, ForeignKey('positions.id'), nullable=False, index=True)
+    market_id = Column(String(255), nullable=False)
+    outcome = Column(String(100), nullable=False)
+    kind = Column(String(20), nullable=False)  # stop_loss, take_profit
+    trigger_price = Column(Float, nullable=False)
+    shares = Column(Float, nullable=False)
+    status = Column(String(20), default='armed', index=True)  # armed, triggered, submitted, failed, cancelled
+    triggered_price = Column(Float)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    triggered_at = Column(DateTime)
+    
+    # Relationships
+    user = relationship("User")
+    position = relationship("Position")
+
+class ExecutionOrder(Base):
+    __tablename__ = 'execution_orders'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    market_id = Column(String(255), nullable=False)
+    outcome = Column(String(100), nullable=False)
+    side = Column(String(10), nullable=False)  # BUY, SELL
+    strategy = Column(String(20), nullable=False)  # twap, iceberg, pov
+    params = Column(Text)  # JSON strategy parameters
+    total_shares = Column(Float, nullable=False)
+    limit_price = Column(Float)  # Worst price any slice may use
+    arrival_price = Column(Float)  # Mid price when the order arrived
+    filled_shares = Column(Float, default=0.0)
+    avg_fill_price = Column(Float)
+    slippage_bps = Column(Float)  # Against arrival price, positive is worse
+    slices_sent = Column(Integer, default=0)
+    status = Column(String(20), default='active', index=True)  # active, completed, cancelled, failed
+    next_slice_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime)
+    
+    # Relationships
+    user = relationship("User")
+
+class ExecutionSlice(Base):
+    __tablename__ = 'execution_slices'
+    __table_args__ = (UniqueConstraint('parent_id', 'seq'),)
+    
+    id = Column(Integer, primary_key=True)
+    parent_id = Column(Integer, ForeignKey('execution_orders.id'), nullable=False, index=True)
+    seq = Column(Integer, nullable=False)
+    idempotency_key = Column(String(64), unique=True, nullable=False)
+    shares = Column(Float, nullable=False)
+    price = Column(Float, nullable=False)
+    trade_id = Column(Integer, ForeignKey('trades.id'))  # Child state lives on the trade
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    parent = relationship("ExecutionOrder")
+    trade = relationship("Trade")
+
 class ReferralReward(Base):
     __tablename__ = 'referral_rewards'
     
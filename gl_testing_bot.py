@@ -8,34 +8,29 @@ Token: 8368872230:AAFp_NMUW9Ym1qS_qqhHtvJmOIObZr8l_GE
 import os
 import asyncio
 import logging
-from flask import Flask, jsonify
+from runtime import BotRuntime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create Flask app
-app = Flask(__name__)
-
-@app.route('/health')
 def health():
-    return jsonify({
+    return {
         'status': 'healthy',
         'service': 'gl-testing-bot',
         'version': '1.0.0',
         'bot': '@GLtestingsolbot'
-    })
+    }
 
-@app.route('/')
 def root():
-    return jsonify({
+    return {
         'message': 'GL Testing Bot is running!',
         'bot': '@GLtestingsolbot',
         'link': 'https://t.me/GLtestingsolbot'
-    })
+    }
 
-async def telegram_bot():
-    """GL Testing Telegram bot."""
+def telegram_bot():
+    """Build the GL Testing Telegram bot."""
     try:
         from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
         from telegram.constants import ParseMode
@@ -142,22 +137,27 @@ Start trading by sending any market search term!
         app.add_handler(CallbackQueryHandler(handle_callback))
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
         
-        logger.info("Starting GL Testing Bot...")
-        await app.run_polling()
+        return app
         
     except Exception as e:
         logger.error(f"Bot error: {e}")
 
-def run_bot():
-    """Run bot in background."""
-    import threading
-    def start_bot():
-        asyncio.run(telegram_bot())
+async def run_services():
+    """Run bot and web server on one event loop."""
+    runtime = BotRuntime()
+    
+    # Start web server
+    port = int(os.getenv('PORT', 8000))
+    print(f"🌐 Web server starting on port {port}")
+    runtime.add_health_server('0.0.0.0', port, {'/health': health, '/': root})
+    
+    # Start bot
+    bot_app = telegram_bot()
+    if bot_app:
+        logger.info("Starting GL Testing Bot...")
+        runtime.add_application(bot_app)
     
-    thread = threading.Thread(target=start_bot)
-    thread.daemon = True
-    thread.start()
-    return thread
+    await runtime.run()
 
 if __name__ == '__main__':
     print("🚀 Starting GL Testing Bot...")
@@ -165,10 +165,4 @@ if __name__ == '__main__':
     print("🔗 Link: https://t.me/GLtestingsolbot")
     print("=" * 50)
     
-    # Start bot
-    run_bot()
-    
-    # Start web server
-    port = int(os.getenv('PORT', 8000))
-    print(f"🌐 Web server starting on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=False)
+    asyncio.run(run_services())
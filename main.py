@@ -6,7 +6,6 @@ A comprehensive trading bot for Polymarket with advanced features.
 
 import asyncio
 import logging
-import signal
 import sys
 from pathlib import Path
 
@@ -16,8 +15,23 @@ sys.path.insert(0, str(project_root))
 
 from config import Config
 from database import init_db
-from bot.main import main as run_bot
+from bot.handlers import BotHandlers
+from bot.main import build_application
 from apis.price_tracker import PriceTracker
+from apis.resilience import close_upstreams, get_upstream_metrics, get_key_limiter_metrics
+from apis.response_cache import close_response_cache, get_response_cache
+from services.risk import get_risk_book
+from services.order_pipeline import get_order_pipeline
+from services.order_reconciler import get_order_reconciler
+from services.copy_trading import get_copy_trading_engine
+from services.price_alerts import get_price_alert_engine
+from services.conditional_orders import get_conditional_order_engine
+from services.execution import get_execution_scheduler
+from services.cancel_guard import get_stale_feed_guard
+from services.wallet_pool import get_wallet_pool
+from services.balances import get_balance_service
+from services.transfer_indexer import get_transfer_indexer
+from runtime import BotRuntime
 
 # Configure logging
 logging.basicConfig(
@@ -36,8 +50,96 @@ class PolyFocusBot:
     
     def __init__(self):
         self.price_tracker = PriceTracker()
+        self.runtime = BotRuntime()
+        self.handlers = None
+        self.application = None
         self.is_running = False
     
+    def _build_runtime(self):
+        """Register all services on the shared runtime in startup order."""
+        runtime = self.runtime
+        
+        # Health server first so platform health checks pass during startup
+        runtime.add_health_server(Config.HOST, Config.PORT, {
+            '/health': runtime.get_status,
+            '/metrics': self.get_metrics,
+            '/': lambda: {
+                'message': 'PolyFocus Bot API',
+                'version': '1.0.0',
+                'status': 'running'
+            }
+        })
+        
+        # Shared API sessions close after every service using them has stopped
+        runtime.add_component('upstreams', lambda: asyncio.sleep(0), close_upstreams)
+        runtime.add_component('response_cache', lambda: asyncio.sleep(0), close_response_cache)
+        
+        # Price tracking shares its cache with the handlers
+        runtime.add_background_task(
+            'price_tracker',
+            lambda: self.price_tracker.start_price_tracking(['POL', 'USDC', 'ETH'], interval=30),
+            stop=self.price_tracker.stop_price_tracking
+        )
+        
+        # Risk limits are rebuilt from trades before any order can be checked against them
+        runtime.add_component('risk_book', get_risk_book().start)
+        
+        # Orders left in the outbox by a previous run are resumed before users can trade
+        order_pipeline = get_order_pipeline()
+        runtime.add_component('order_pipeline', order_pipeline.start, order_pipeline.stop)
+        order_reconciler = get_order_reconciler()
+        runtime.add_background_task('order_reconciler', order_reconciler.run, stop=order_reconciler.stop)
+        copy_trading = get_copy_trading_engine()
+        runtime.add_background_task('copy_trading', copy_trading.run, stop=copy_trading.stop)
+        conditional_orders = get_conditional_order_engine()
+        runtime.add_background_task('conditional_orders', conditional_orders.run, stop=conditional_orders.stop)
+        execution = get_execution_scheduler()
+        runtime.add_background_task('execution', execution.run, stop=execution.stop)
+        wallet_pool = get_wallet_pool()
+        runtime.add_background_task('wallet_pool', wallet_pool.run, stop=wallet_pool.stop)
+        balances = get_balance_service()
+        runtime.add_background_task('balances', balances.run, stop=balances.stop)
+        transfer_indexer = get_transfer_indexer()
+        runtime.add_background_task('transfer_indexer', transfer_indexer.run, stop=transfer_indexer.stop)
+        stale_feed_guard = get_stale_feed_guard()
+        runtime.add_background_task('stale_feed_guard', stale_feed_guard.run, stop=stale_feed_guard.stop)
+        
+        # Telegram bot last, once its dependencies are serving
+        self.handlers = BotHandlers(price_tracker=self.price_tracker)
+        self.application = build_application(self.handlers)
+        runtime.add_application(self.application)
+        runtime.add_component('send_queue', self.handlers.send_queue.start,
+                              self.handlers.send_queue.stop)
+        
+        # Alerts notify through the send queue, so they stop before it does
+        price_alerts = get_price_alert_engine()
+        runtime.add_background_task('price_alerts', price_alerts.run, stop=price_alerts.stop)
+    
+    def get_metrics(self) -> dict:
+        """Collect metrics from every running service."""
+        metrics = {'status': 'healthy' if self.runtime.is_running else 'unhealthy'}
+        metrics['upstreams'] = get_upstream_metrics()
+        metrics['api_keys'] = get_key_limiter_metrics()
+        metrics['response_cache'] = get_response_cache().get_metrics()
+        metrics['risk'] = get_risk_book().get_metrics()
+        metrics['orders'] = get_order_pipeline().get_metrics()
+        metrics['order_status'] = get_order_reconciler().get_metrics()
+        metrics['copy_trading'] = get_copy_trading_engine().get_metrics()
+        metrics['price_alerts'] = get_price_alert_engine().get_metrics()
+        metrics['conditional_orders'] = get_conditional_order_engine().get_metrics()
+        metrics['execution'] = get_execution_scheduler().get_metrics()
+        metrics['stale_feed_guard'] = get_stale_feed_guard().get_metrics()
+        metrics['wallet_pool'] = get_wallet_pool().get_metrics()
+        metrics['balances'] = get_balance_service().get_metrics()
+        metrics['transfer_indexer'] = get_transfer_indexer().get_metrics()
+        if self.handlers:
+            metrics['send_queue'] = self.handlers.send_queue.get_metrics()
+            metrics['screens'] = self.handlers.renderer.get_metrics()
+            metrics['callbacks'] = self.handlers.router.get_metrics()
+        if self.application:
+            metrics['updates'] = self.application.update_processor.get_metrics()
+        return metrics
+    
     async def start(self):
         """Start the bot and all services."""
         logger.info("Starting PolyFocus Bot...")
@@ -47,61 +149,27 @@ class PolyFocusBot:
             logger.info("Initializing database...")
             init_db()
             
-            # Start price tracking
-            logger.info("Starting price tracking...")
-            price_task = asyncio.create_task(
-                self.price_tracker.start_price_tracking(['POL', 'USDC', 'ETH'], interval=30)
-            )
-            
-            # Start Telegram bot
-            logger.info("Starting Telegram bot...")
-            bot_task = asyncio.create_task(self._run_bot())
-            
+            self._build_runtime()
             self.is_running = True
             
-            # Wait for tasks
-            await asyncio.gather(price_task, bot_task)
+            # Run every service on this event loop until a shutdown signal
+            await self.runtime.run()
             
         except Exception as e:
             logger.error(f"Error starting bot: {e}")
             raise
-    
-    async def _run_bot(self):
-        """Run the Telegram bot."""
-        try:
-            # Import and run the bot in a separate thread to avoid event loop conflicts
-            import threading
-            import asyncio
-            
-            def run_bot_sync():
-                asyncio.run(run_bot())
-            
-            bot_thread = threading.Thread(target=run_bot_sync)
-            bot_thread.daemon = True
-            bot_thread.start()
-            bot_thread.join()
-        except Exception as e:
-            logger.error(f"Bot error: {e}")
-            raise
+        finally:
+            self.is_running = False
     
     def stop(self):
         """Stop the bot and all services."""
         logger.info("Stopping PolyFocus Bot...")
         self.is_running = False
-        self.price_tracker.stop_price_tracking()
-
-def signal_handler(signum, frame):
-    """Handle shutdown signals."""
-    logger.info(f"Received signal {signum}, shutting down...")
-    sys.exit(0)
+        self.runtime.request_stop()
 
 async def main():
     """Main entry point."""
-    # Set up signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Create and start bot
+    # Create and start bot; SIGINT/SIGTERM are handled by the runtime
     bot = PolyFocusBot()
     
     try:
@@ -8,12 +8,13 @@ import sys
 import asyncio
 import logging
 from pathlib import Path
-from flask import Flask, jsonify
 
 # Add project root to Python path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
+from runtime import BotRuntime
+
 # Load environment variables
 def load_env_file(env_file):
     """Load environment variables from a file."""
@@ -35,23 +36,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create Flask app for health check
-app = Flask(__name__)
-
-@app.route('/health')
 def health_check():
     """Health check endpoint for Railway/Heroku."""
-    return jsonify({
+    return {
         'status': 'healthy',
         'service': 'polyfocus-bot',
         'version': '1.0.0',
         'bot': '@Polymarketsolanabot'
-    })
+    }
 
-@app.route('/')
 def root():
     """Root endpoint."""
-    return jsonify({
+    return {
         'message': 'PolyFocus Bot API',
         'version': '1.0.0',
         'status': 'running',
@@ -60,10 +56,10 @@ def root():
             'health': '/health',
             'bot': 'https://t.me/Polymarketsolanabot'
         }
-    })
+    }
 
-async def run_telegram_bot():
-    """Run the Telegram bot."""
+def build_telegram_application():
+    """Build the Telegram bot application."""
     try:
         # Import telegram bot
         from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
@@ -181,26 +177,29 @@ Start trading by sending any market search term!
         application.add_handler(CallbackQueryHandler(handle_callback))
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
         
-        # Start the bot
-        logger.info("Telegram bot starting...")
-        await application.run_polling()
+        return application
         
     except Exception as e:
         logger.error(f"Telegram bot error: {e}")
         raise
 
-def run_bot():
-    """Run the bot in a separate thread."""
-    import threading
+async def run_services():
+    """Run the Telegram bot and health server on one event loop."""
+    runtime = BotRuntime()
     
-    def run_telegram():
-        asyncio.run(run_telegram_bot())
+    # Get port from environment
+    port = int(os.getenv('PORT', 8000))
     
-    bot_thread = threading.Thread(target=run_telegram)
-    bot_thread.daemon = True
-    bot_thread.start()
+    # Serve health checks first so the platform sees the service come up
+    logger.info(f"Starting web server on port {port}")
+    runtime.add_health_server('0.0.0.0', port, {'/health': health_check, '/': root})
     
-    return bot_thread
+    application = build_telegram_application()
+    if application:
+        logger.info("Telegram bot starting...")
+        runtime.add_application(application)
+    
+    await runtime.run()
 
 if __name__ == '__main__':
     print("🚀 Starting PolyFocus Bot...")
@@ -209,12 +208,5 @@ if __name__ == '__main__':
     print("🔗 Link: https://t.me/Polymarketsolanabot")
     print("=" * 40)
     
-    # Start the Telegram bot in background
-    bot_thread = run_bot()
-    
-    # Get port from environment
-    port = int(os.getenv('PORT', 8000))
-    
-    # Run Flask app for health check
-    logger.info(f"Starting web server on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=False)
+    # Run the Telegram bot and health server together
+    asyncio.run(run_services())
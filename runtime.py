@@ -0,0 +1,198 @@
+"""
+Single event loop runtime for PolyFocus Bot.
+
+The Telegram application, price tracker, background schedulers and the
+health server are all registered as components of one ``BotRuntime`` and
+run on the same asyncio event loop. Components start in registration order
+and stop in reverse order.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class RuntimeComponent:
+    """A named unit of work with async start and stop hooks."""
+
+    def __init__(self, name: str, start: Callable[[], Awaitable[Any]],
+                 stop: Optional[Callable[[], Awaitable[Any]]] = None):
+        self.name = name
+        self.start = start
+        self.stop = stop
+        self.started_at: Optional[float] = None
+
+
+class HealthServer:
+    """Async HTTP server for health checks, served from the runtime's loop."""
+
+    def __init__(self, host: str, port: int, routes: Dict[str, Callable[[], Dict]]):
+        self.host = host
+        self.port = port
+        self.routes = routes
+        self._runner: Optional[web.AppRunner] = None
+
+    def _make_handler(self, payload_factory: Callable[[], Dict]):
+        async def handler(request: web.Request) -> web.Response:
+            payload = payload_factory()
+            status = 200 if payload.get('status', 'healthy') in ('healthy', 'running') else 503
+            return web.json_response(payload, status=status)
+        return handler
+
+    async def start(self):
+        """Bind the HTTP listener."""
+        app = web.Application()
+        for path, payload_factory in self.routes.items():
+            app.router.add_get(path, self._make_handler(payload_factory))
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Health server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        """Close the HTTP listener."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class BotRuntime:
+    """Owns the event loop lifecycle for every long-running bot service."""
+
+    def __init__(self, shutdown_timeout: float = 10.0):
+        self.shutdown_timeout = shutdown_timeout
+        self.components: List[RuntimeComponent] = []
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._started: List[RuntimeComponent] = []
+        self._stop_event: Optional[asyncio.Event] = None
+        self.is_running = False
+
+    def add_component(self, name: str, start: Callable[[], Awaitable[Any]],
+                      stop: Optional[Callable[[], Awaitable[Any]]] = None):
+        """Register a component; components start in the order they are added."""
+        self.components.append(RuntimeComponent(name, start, stop))
+
+    def add_background_task(self, name: str, factory: Callable[[], Awaitable[Any]],
+                            stop: Optional[Callable[[], Any]] = None):
+        """Register a long-running coroutine as a component backed by a task."""
+        async def start():
+            self.tasks[name] = asyncio.create_task(factory(), name=name)
+
+        async def stop_task():
+            if stop:
+                stop()
+            task = self.tasks.pop(name, None)
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await asyncio.wait_for(task, timeout=self.shutdown_timeout)
+                except (asyncio.CancelledError, asyncio.TimeoutError):
+                    pass
+
+        self.add_component(name, start, stop_task)
+
+    def add_application(self, application, name: str = 'telegram', **polling_kwargs):
+        """Register a python-telegram-bot ``Application`` using manual lifecycle calls."""
+        async def start():
+            await application.initialize()
+            await application.updater.start_polling(**polling_kwargs)
+            await application.start()
+
+        async def stop():
+            if application.updater.running:
+                await application.updater.stop()
+            if application.running:
+                await application.stop()
+            await application.shutdown()
+
+        self.add_component(name, start, stop)
+
+    def add_health_server(self, host: str, port: int, routes: Dict[str, Callable[[], Dict]],
+                          name: str = 'health'):
+        """Register a health server and return it."""
+        server = HealthServer(host, port, routes)
+        self.add_component(name, server.start, server.stop)
+        return server
+
+    async def start(self):
+        """Start every component in order, unwinding on failure."""
+        self._stop_event = asyncio.Event()
+        for component in self.components:
+            logger.info(f"Starting {component.name}...")
+            try:
+                await component.start()
+            except Exception as e:
+                logger.error(f"Failed to start {component.name}: {e}")
+                await self.stop()
+                raise
+            component.started_at = time.monotonic()
+            self._started.append(component)
+        self.is_running = True
+
+    async def stop(self):
+        """Stop started components in reverse order."""
+        self.is_running = False
+        while self._started:
+            component = self._started.pop()
+            if not component.stop:
+                continue
+            logger.info(f"Stopping {component.name}...")
+            try:
+                await asyncio.wait_for(component.stop(), timeout=self.shutdown_timeout)
+            except Exception as e:
+                logger.error(f"Error stopping {component.name}: {e}")
+
+    def request_stop(self):
+        """Ask ``run`` to shut down; safe to call from signal handlers."""
+        if self._stop_event:
+            self._stop_event.set()
+
+    async def run(self):
+        """Start all components, wait for a stop request, then shut down."""
+        loop = asyncio.get_running_loop()
+        await self.start()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.request_stop)
+            except (NotImplementedError, RuntimeError):
+                # Signal handlers are unavailable on Windows event loops
+                pass
+
+        try:
+            await self._stop_event.wait()
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            await self.stop()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return component and task status for health endpoints."""
+        now = time.monotonic()
+        started = {component.name for component in self._started}
+        return {
+            'status': 'healthy' if self.is_running else 'unhealthy',
+            'components': {
+                component.name: {
+                    'running': component.name in started,
+                    'uptime_seconds': round(now - component.started_at, 1)
+                    if component.name in started and component.started_at else 0.0
+                }
+                for component in self.components
+            },
+            'tasks': {
+                name: 'done' if task.done() else 'running'
+                for name, task in self.tasks.items()
+            }
+        }
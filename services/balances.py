@@ -0,0 +1,182 @@
+"""
+On-chain wallet balances read through Multicall3.
+
+Reading POL, USDC and ETH one ``eth_call`` at a time costs three RPCs per
+wallet. Instead every (wallet, token) read becomes one call inside
+Multicall3 ``aggregate3``: native balances via ``getEthBalance`` and ERC-20
+balances via ``balanceOf``, with failures allowed per call. Large reads are
+split into multicalls of ``BALANCE_MULTICALL_SIZE`` calls, and those are
+sent together as one JSON-RPC batch pinned to the same block, so any number
+of wallets costs two HTTP round trips: the block number and the batch.
+
+Results are cached per block. A wallet read again before a new block is
+seen is answered from memory, and the block number itself is trusted for
+``BALANCE_BLOCK_TTL`` seconds. Wallets of recently active users are
+refreshed in the background so menus usually hit the cache.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth_abi import decode, encode
+from web3 import Web3
+
+from config import Config
+from database import get_db, User, Wallet
+from apis.polygon_rpc import PolygonRPC
+from apis.rate_limiter import background_requests
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE3 = bytes.fromhex('82ad56cb')
+GET_ETH_BALANCE = bytes.fromhex('4d2301cc')
+BALANCE_OF = bytes.fromhex('70a08231')
+
+
+def encode_balance_calls(multicall: str, calls: List[Tuple[str, Optional[str]]]) -> str:
+    """aggregate3 calldata reading each (wallet, token) balance; None token is native."""
+    encoded = []
+    for wallet, token in calls:
+        selector = GET_ETH_BALANCE if token is None else BALANCE_OF
+        encoded.append((multicall if token is None else Web3.to_checksum_address(token), True,
+                        selector + encode(['address'], [Web3.to_checksum_address(wallet)])))
+    return '0x' + (AGGREGATE3 + encode(['(address,bool,bytes)[]'], [encoded])).hex()
+
+
+def decode_balance_results(data: str) -> List[Optional[int]]:
+    """Raw balances from an aggregate3 result; None where a call failed."""
+    raw = bytes.fromhex(data[2:] if data.startswith('0x') else data)
+    results = decode(['(bool,bytes)[]'], raw)[0]
+    return [decode(['uint256'], value)[0] if success and len(value) >= 32 else None
+            for success, value in results]
+
+
+class BalanceService:
+    """Batched, per-block cached POL/USDC/ETH balances."""
+
+    def __init__(self, rpc: Optional[PolygonRPC] = None, tokens: Optional[Dict[str, Tuple[Optional[str], int]]] = None,
+                 multicall: Optional[str] = None, multicall_size: int = 300, block_ttl: float = 2.0,
+                 refresh_interval: float = 30.0, active_window: float = 3600.0):
+        self.rpc = rpc or PolygonRPC()
+        self.tokens = tokens or Config.BALANCE_TOKENS
+        self.multicall = Web3.to_checksum_address(multicall or Config.MULTICALL3_ADDRESS)
+        self.multicall_size = multicall_size
+        self.block_ttl = block_ttl
+        self.refresh_interval = refresh_interval
+        self.active_window = active_window
+        self.block: Optional[int] = None
+        self.block_checked_at = 0.0
+        # address -> (block, {symbol: balance})
+        self.cache: Dict[str, Tuple[int, Dict[str, float]]] = {}
+        self.is_running = False
+        self.metrics = {
+            'reads': 0,
+            'cache_hits': 0,
+            'rpc_batches': 0,
+            'multicalls': 0,
+            'failed_calls': 0,
+            'last_read_ms': 0.0
+        }
+
+    async def current_block(self) -> int:
+        if self.block is None or time.monotonic() - self.block_checked_at >= self.block_ttl:
+            self.block = await self.rpc.block_number()
+            self.block_checked_at = time.monotonic()
+        return self.block
+
+    def cached(self, address: str) -> Optional[Dict[str, float]]:
+        """Last known balances of a wallet, whatever block they are from."""
+        entry = self.cache.get(address.lower())
+        return dict(entry[1]) if entry else None
+
+    async def get_balances(self, addresses: List[str]) -> Dict[str, Dict[str, float]]:
+        """Balances of every address at the latest block, keyed by the given address."""
+        started = time.perf_counter()
+        block = await self.current_block()
+        self.metrics['reads'] += len(addresses)
+        missing = list(dict.fromkeys(
+            address for address in addresses
+            if self.cache.get(address.lower(), (None,))[0] != block
+        ))
+        self.metrics['cache_hits'] += len(addresses) - len(missing)
+
+        if missing:
+            symbols = list(self.tokens)
+            calls = [(address, self.tokens[symbol][0]) for address in missing for symbol in symbols]
+            chunks = [calls[start:start + self.multicall_size]
+                      for start in range(0, len(calls), self.multicall_size)]
+            results = await self.rpc.batch([
+                ('eth_call', [{'to': self.multicall, 'data': encode_balance_calls(self.multicall, chunk)}, hex(block)])
+                for chunk in chunks
+            ])
+            self.metrics['rpc_batches'] += 1
+            self.metrics['multicalls'] += len(chunks)
+            raw = [value for result in results for value in decode_balance_results(result)]
+
+            for index, address in enumerate(missing):
+                balances = {}
+                for offset, symbol in enumerate(symbols):
+                    value = raw[index * len(symbols) + offset]
+                    if value is None:
+                        self.metrics['failed_calls'] += 1
+                        value = 0
+                    balances[symbol] = value / 10 ** self.tokens[symbol][1]
+                self.cache[address.lower()] = (block, balances)
+
+        self.metrics['last_read_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return {address: dict(self.cache[address.lower()][1]) for address in addresses}
+
+    async def get_balance(self, address: str) -> Dict[str, float]:
+        """One wallet's balances; falls back to the last known (or zero) balances on RPC errors."""
+        try:
+            return (await self.get_balances([address]))[address]
+        except Exception as e:
+            logger.warning(f"Balance read failed for {address}: {e}")
+            return self.cached(address) or {symbol: 0.0 for symbol in self.tokens}
+
+    def active_wallets(self) -> List[str]:
+        db = next(get_db())
+        since = datetime.utcnow() - timedelta(seconds=self.active_window)
+        return [address for address, in db.query(Wallet.address).join(
+            User, User.id == Wallet.user_id
+        ).filter(Wallet.is_active == True, User.last_active >= since)]
+
+    async def run(self):
+        """Refresh balances of recently active users until stopped."""
+        self.is_running = True
+        while self.is_running:
+            try:
+                addresses = self.active_wallets()
+                if addresses:
+                    with background_requests():
+                        await self.get_balances(addresses)
+            except Exception as e:
+                logger.error(f"Balance refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def stop(self):
+        self.is_running = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'block': self.block,
+            'cached_wallets': len(self.cache)
+        }
+
+
+_balance_service: Optional[BalanceService] = None
+
+
+def get_balance_service() -> BalanceService:
+    """Return the process-wide balance service, creating it on first use."""
+    global _balance_service
+    if _balance_service is None:
+        _balance_service = BalanceService(
+            multicall_size=Config.BALANCE_MULTICALL_SIZE, block_ttl=Config.BALANCE_BLOCK_TTL,
+            refresh_interval=Config.BALANCE_REFRESH_INTERVAL, active_window=Config.BALANCE_ACTIVE_WINDOW
+        )
+    return _balance_service
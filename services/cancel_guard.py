@@ -0,0 +1,100 @@
+"""
+Cancel-on-disconnect for resting orders.
+
+When a watched upstream feed has been failing for longer than
+``ORDER_CANCEL_ON_STALE_FEED`` seconds, users can no longer see the prices
+their resting orders were placed against. The guard then bulk-cancels
+every user's resting orders once and re-arms after the feed recovers.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from database import get_db, Trade
+from apis.resilience import get_upstream
+from services.trading_service import TradingService
+
+logger = logging.getLogger(__name__)
+
+
+class StaleFeedGuard:
+    """Cancels resting orders while the upstream feed is stale."""
+
+    def __init__(self, window: float = 0.0, feeds: Optional[List[str]] = None, check_interval: float = 5.0):
+        self.window = window
+        self.feeds = feeds or ['clob']
+        self.check_interval = check_interval
+        self.trading_service = TradingService()
+        self.tripped = False
+        self.is_running = False
+        self.metrics = {
+            'trips': 0,
+            'orders_cancelled': 0,
+            'cancel_failures': 0
+        }
+
+    def stale_feed(self) -> Optional[str]:
+        """Name of a watched feed that has been failing longer than the window."""
+        for name in self.feeds:
+            if get_upstream(name).staleness() > self.window:
+                return name
+        return None
+
+    async def check(self) -> int:
+        """Cancel resting orders if a feed just went stale; returns the number cancelled."""
+        feed = self.stale_feed()
+        if feed is None:
+            self.tripped = False
+            return 0
+        if self.tripped:
+            return 0
+        self.tripped = True
+        self.metrics['trips'] += 1
+
+        db = next(get_db())
+        user_ids = [user_id for user_id, in db.query(Trade.user_id).filter(
+            Trade.status == 'pending', Trade.order_id.isnot(None)
+        ).distinct()]
+        logger.warning(f"{feed} stale for over {self.window:.0f}s; cancelling resting orders of "
+                       f"{len(user_ids)} users")
+        results = await asyncio.gather(*(self.trading_service.cancel_orders(user_id) for user_id in user_ids))
+        cancelled = sum(result['cancelled'] for result in results)
+        self.metrics['orders_cancelled'] += cancelled
+        self.metrics['cancel_failures'] += sum(result['failed'] for result in results)
+        return cancelled
+
+    async def run(self):
+        """Check the feeds until stopped; does nothing when the window is 0."""
+        self.is_running = self.window > 0
+        while self.is_running:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Stale feed check failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def stop(self):
+        self.is_running = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'enabled': self.window > 0,
+            'tripped': self.tripped
+        }
+
+
+_stale_feed_guard: Optional[StaleFeedGuard] = None
+
+
+def get_stale_feed_guard() -> StaleFeedGuard:
+    """Return the process-wide stale feed guard, creating it on first use."""
+    global _stale_feed_guard
+    if _stale_feed_guard is None:
+        _stale_feed_guard = StaleFeedGuard(
+            Config.ORDER_CANCEL_ON_STALE_FEED, Config.ORDER_CANCEL_STALE_FEEDS,
+            Config.ORDER_CANCEL_STALE_CHECK_INTERVAL
+        )
+    return _stale_feed_guard
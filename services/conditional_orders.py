@@ -0,0 +1,298 @@
+"""
+Stop-loss and take-profit exits on positions.
+
+Armed triggers are kept in the same per-outcome threshold heaps as price
+alerts: stop-losses fire when the price falls to the trigger, take-profits
+when it rises to it. Each tick fetches prices only for markets with armed
+triggers and evaluates all of them in memory before touching the database,
+so the cost of a tick is one heap pop per fired trigger rather than one
+check per trigger. The first trigger of a position to fire cancels its
+siblings. Fired exits are written in one bulk update and submitted as
+marketable limit sells through ``TradingService`` in batches; each carries
+an idempotency key, so exits left ``triggered`` by a restart are resubmitted
+safely.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import Config
+from database import get_db, Position, ConditionalOrder
+from apis import PolymarketCLOBAPI
+from apis.rate_limiter import background_requests
+from services.price_alerts import ABOVE, BELOW, AlertBook, outcome_prices
+from services.trading_service import TradingService
+
+logger = logging.getLogger(__name__)
+
+STOP_LOSS = 'stop_loss'
+TAKE_PROFIT = 'take_profit'
+
+KIND_DIRECTIONS = {STOP_LOSS: BELOW, TAKE_PROFIT: ABOVE}
+KIND_ALIASES = {'sl': STOP_LOSS, 'tp': TAKE_PROFIT, STOP_LOSS: STOP_LOSS, TAKE_PROFIT: TAKE_PROFIT}
+
+
+def exit_order_key(trigger_id: int) -> str:
+    """Idempotency key of the exit order placed for a trigger."""
+    return f"exit-{trigger_id}"
+
+
+class ConditionalOrderEngine:
+    """Evaluates armed SL/TP triggers per price tick and submits the exits."""
+
+    def __init__(self, poll_interval: float = 2.0, concurrency: int = 20,
+                 batch_size: int = 100, slippage: float = 0.05):
+        self.clob_api = PolymarketCLOBAPI()
+        self.trading_service = TradingService()
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.slippage = slippage
+        self.books: Dict[Tuple[str, str], AlertBook] = {}
+        # trigger_id -> position_id; absent once fired or cancelled
+        self.triggers: Dict[int, int] = {}
+        self.by_position: Dict[int, Set[int]] = {}
+        self.is_running = False
+        self.metrics = {
+            'ticks': 0,
+            'fired': 0,
+            'submitted': 0,
+            'failed': 0,
+            'poll_errors': 0,
+            'last_eval_ms': 0.0,
+            'last_poll_ms': 0.0
+        }
+
+    def _track(self, trigger_id: int, position_id: int, market_id: str, outcome: str,
+               kind: str, trigger_price: float):
+        self.triggers[trigger_id] = position_id
+        self.by_position.setdefault(position_id, set()).add(trigger_id)
+        self.books.setdefault((market_id, outcome), AlertBook()).add(
+            trigger_id, KIND_DIRECTIONS[kind], trigger_price
+        )
+
+    def _untrack(self, trigger_id: int):
+        position_id = self.triggers.pop(trigger_id, None)
+        siblings = self.by_position.get(position_id)
+        if siblings is not None:
+            siblings.discard(trigger_id)
+            if not siblings:
+                del self.by_position[position_id]
+
+    def load(self) -> List[Tuple[int, float]]:
+        """Rebuild the heaps from armed triggers; returns fired exits not yet submitted."""
+        db = next(get_db())
+        rows = db.query(ConditionalOrder).filter(
+            ConditionalOrder.status.in_(('armed', 'triggered'))
+        ).all()
+
+        self.books = {}
+        self.triggers = {}
+        self.by_position = {}
+        pending = []
+        for row in rows:
+            if row.status == 'armed':
+                self._track(row.id, row.position_id, row.market_id, row.outcome, row.kind, row.trigger_price)
+            else:
+                pending.append((row.id, row.triggered_price))
+        return pending
+
+    def arm(self, user_id: int, position_id: int, kind: str, trigger_price: float,
+            shares: Optional[float] = None) -> Dict:
+        """Attach a stop-loss or take-profit to one of the user's positions."""
+        try:
+            kind = KIND_ALIASES.get(kind.lower())
+            if kind is None:
+                return {'success': False, 'error': "Kind must be 'sl' or 'tp'"}
+            if not 0 < trigger_price < 1:
+                return {'success': False, 'error': 'Price must be between 0 and 1'}
+
+            db = next(get_db())
+            position = db.query(Position).filter(
+                Position.id == position_id, Position.user_id == user_id
+            ).first()
+            if position is None or position.shares <= 0:
+                return {'success': False, 'error': 'Position not found'}
+
+            order = ConditionalOrder(
+                user_id=user_id,
+                position_id=position.id,
+                market_id=position.market_id,
+                outcome=(position.outcome or 'YES').upper(),
+                kind=kind,
+                trigger_price=trigger_price,
+                shares=min(shares, position.shares) if shares else position.shares
+            )
+            db.add(order)
+            db.commit()
+            self._track(order.id, position.id, order.market_id, order.outcome, kind, trigger_price)
+            return {'success': True, 'trigger_id': order.id}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def cancel(self, user_id: int, trigger_id: int) -> Dict:
+        """Disarm one of the user's triggers."""
+        db = next(get_db())
+        order = db.query(ConditionalOrder).filter(
+            ConditionalOrder.id == trigger_id, ConditionalOrder.user_id == user_id,
+            ConditionalOrder.status == 'armed'
+        ).first()
+        if order is None:
+            return {'success': False, 'error': 'Trigger not found'}
+        order.status = 'cancelled'
+        db.commit()
+        # The heap entry is skipped when it reaches the top
+        self._untrack(trigger_id)
+        return {'success': True, 'message': f'Trigger {trigger_id} cancelled'}
+
+    def list_triggers(self, user_id: int) -> List[ConditionalOrder]:
+        db = next(get_db())
+        return db.query(ConditionalOrder).filter(
+            ConditionalOrder.user_id == user_id, ConditionalOrder.status == 'armed'
+        ).order_by(ConditionalOrder.created_at).all()
+
+    def evaluate(self, ticks: Iterable[Tuple[str, str, float]]) -> Tuple[List[Tuple[int, float]], List[int]]:
+        """Apply a batch of (market_id, outcome, price) ticks in memory.
+
+        Returns the fired (trigger_id, price) pairs and the sibling triggers
+        they cancelled.
+        """
+        started = time.perf_counter()
+        fired = []
+        cancelled = []
+        for market_id, outcome, price in ticks:
+            self.metrics['ticks'] += 1
+            key = (market_id, outcome.upper())
+            book = self.books.get(key)
+            if book is None:
+                continue
+            for trigger_id in book.crossed(price):
+                position_id = self.triggers.get(trigger_id)
+                if position_id is None:
+                    continue
+                fired.append((trigger_id, price))
+                for sibling in self.by_position.pop(position_id, ()):
+                    self.triggers.pop(sibling, None)
+                    if sibling != trigger_id:
+                        cancelled.append(sibling)
+            if not book:
+                del self.books[key]
+        self.metrics['last_eval_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return fired, cancelled
+
+    async def submit(self, fired: List[Tuple[int, float]], cancelled: Optional[List[int]] = None):
+        """Record fired triggers and place their exit orders in batches."""
+        if not fired and not cancelled:
+            return
+        db = next(get_db())
+        triggered_at = datetime.utcnow()
+        updates = [{'id': trigger_id, 'status': 'cancelled'} for trigger_id in cancelled or ()]
+        updates += [
+            {'id': trigger_id, 'status': 'triggered', 'triggered_price': price, 'triggered_at': triggered_at}
+            for trigger_id, price in fired
+        ]
+        db.bulk_update_mappings(ConditionalOrder, updates)
+        db.commit()
+        if not fired:
+            return
+        self.metrics['fired'] += len(fired)
+
+        prices = dict(fired)
+        orders = db.query(ConditionalOrder).filter(ConditionalOrder.id.in_(list(prices))).all()
+        positions = {position.id: position for position in db.query(Position).filter(
+            Position.id.in_({order.position_id for order in orders})
+        ).all()}
+
+        exits = []
+        results = []
+        for order in orders:
+            position = positions.get(order.position_id)
+            shares = min(order.shares, position.shares) if position is not None else 0.0
+            if shares <= 0:
+                results.append({'id': order.id, 'status': 'failed', 'last_error': 'Position already closed'})
+            else:
+                exits.append((order, shares, round(max(0.01, prices[order.id] * (1 - self.slippage)), 2)))
+
+        for start in range(0, len(exits), self.batch_size):
+            batch = exits[start:start + self.batch_size]
+            placed = await asyncio.gather(*(
+                self.trading_service.place_limit_order(
+                    order.user_id, order.market_id, order.outcome, 'SELL', shares, price,
+                    slippage_tolerance=self.slippage, idempotency_key=exit_order_key(order.id),
+                    wait_timeout=0
+                )
+                for order, shares, price in batch
+            ), return_exceptions=True)
+            for (order, _, _), result in zip(batch, placed):
+                if isinstance(result, dict) and result.get('success'):
+                    results.append({'id': order.id, 'status': 'submitted'})
+                else:
+                    error = result.get('error') if isinstance(result, dict) else str(result)
+                    results.append({'id': order.id, 'status': 'failed', 'last_error': error})
+
+        db.bulk_update_mappings(ConditionalOrder, results)
+        db.commit()
+        submitted = sum(1 for result in results if result['status'] == 'submitted')
+        self.metrics['submitted'] += submitted
+        self.metrics['failed'] += len(results) - submitted
+
+    async def poll_once(self):
+        """Fetch prices of every market with armed triggers and run one tick."""
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def poll(market_id: str) -> List[Tuple[str, str, float]]:
+            async with semaphore:
+                try:
+                    data = await self.clob_api.get_market_prices(market_id)
+                except Exception as e:
+                    self.metrics['poll_errors'] += 1
+                    logger.warning(f"Price poll failed for {market_id}: {e}")
+                    return []
+            return [(market_id, outcome, price) for outcome, price in outcome_prices(data).items()]
+
+        markets = {market_id for market_id, _ in self.books}
+        with background_requests():
+            results = await asyncio.gather(*(poll(market_id) for market_id in markets))
+        self.metrics['last_poll_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        fired, cancelled = self.evaluate(tick for ticks in results for tick in ticks)
+        await self.submit(fired, cancelled)
+
+    async def run(self):
+        """Load armed triggers, finish interrupted exits and tick until stopped."""
+        self.is_running = True
+        await self.submit(self.load())
+        while self.is_running:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Conditional order tick failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def stop(self):
+        self.is_running = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'armed': len(self.triggers),
+            'markets': len({market_id for market_id, _ in self.books})
+        }
+
+
+_conditional_order_engine: Optional[ConditionalOrderEngine] = None
+
+
+def get_conditional_order_engine() -> ConditionalOrderEngine:
+    """Return the process-wide conditional order engine, creating it on first use."""
+    global _conditional_order_engine
+    if _conditional_order_engine is None:
+        _conditional_order_engine = ConditionalOrderEngine(
+            Config.CONDITIONAL_ORDER_POLL_INTERVAL, Config.CONDITIONAL_ORDER_CONCURRENCY,
+            Config.CONDITIONAL_ORDER_BATCH_SIZE, Config.CONDITIONAL_ORDER_SLIPPAGE
+        )
+    return _conditional_order_engine
@@ -0,0 +1,282 @@
+"""
+Copy-trading execution engine.
+
+Leader wallets are polled through the Data API. Every new leader trade is
+fanned out to that leader's followers in one pass over a columnar book of
+follower limits, checked against the in-memory risk book and recorded in it
+before submission. Follower orders go through the order pipeline in batches,
+each with an idempotency key derived from the leader trade, so a restart or
+a repeated poll never copies the same trade twice.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from array import array
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from database import get_db, Wallet, CopyTradingSettings, CopyTradingFollow
+from apis import PolymarketDataAPI
+from apis.rate_limiter import background_requests
+from services.trading_service import TradingService
+from services.risk import RiskBook, get_risk_book
+
+logger = logging.getLogger(__name__)
+
+COPY_KEY_PREFIX = 'copy-'
+
+
+def copy_order_key(leader_address: str, trade_id: str, user_id: int) -> str:
+    """Idempotency key of one follower's copy of one leader trade."""
+    digest = hashlib.sha256(f"{leader_address}:{trade_id}:{user_id}".encode()).hexdigest()
+    return COPY_KEY_PREFIX + digest[:64 - len(COPY_KEY_PREFIX)]
+
+
+class FollowerBook:
+    """Columnar follower limits for one leader."""
+
+    def __init__(self):
+        self.user_ids = array('q')
+        self.copy_percentage = array('d')
+        self.max_position_size = array('d')
+        self.max_daily_volume = array('d')
+        self.min_confidence = array('d')
+
+    def add(self, user_id: int, settings: CopyTradingSettings):
+        self.user_ids.append(user_id)
+        self.copy_percentage.append(settings.copy_percentage or 0.0)
+        self.max_position_size.append(settings.max_position_size or 0.0)
+        self.max_daily_volume.append(settings.max_daily_volume or 0.0)
+        self.min_confidence.append(settings.min_confidence or 0.0)
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+
+def allocate(book: FollowerBook, risk: RiskBook, market_id: str, side: str,
+             notional: float, confidence: float, min_notional: float) -> List[Tuple[int, float]]:
+    """Size every follower's copy of a leader trade in one pass; returns (user_id, notional)."""
+    buying = side == 'BUY'
+    allocations = []
+    for user_id, percentage, max_position, max_daily, min_confidence in zip(
+        book.user_ids, book.copy_percentage, book.max_position_size,
+        book.max_daily_volume, book.min_confidence
+    ):
+        if confidence < min_confidence:
+            continue
+        held = risk.position(user_id, market_id)
+        # Buys are capped by position room; sells only unwind what is held
+        room = max_position - held if buying else held
+        amount = min(notional * percentage, room, max_daily - risk.daily_volume(user_id))
+        if amount >= min_notional:
+            allocations.append((user_id, amount))
+    return allocations
+
+
+class CopyTradingEngine:
+    """Watches leader wallets and mirrors their trades for followers."""
+
+    def __init__(self, poll_interval: float = 5.0, batch_size: int = 50,
+                 reload_interval: float = 60.0, min_notional: float = 1.0):
+        self.data_api = PolymarketDataAPI()
+        self.trading_service = TradingService()
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.reload_interval = reload_interval
+        self.min_notional = min_notional
+        self.books: Dict[str, FollowerBook] = {}
+        self.risk = get_risk_book()
+        self.is_running = False
+        self._loaded_at = 0.0
+        self._seen: Dict[str, deque] = {}
+        self._seen_ids: Dict[str, set] = {}
+        self.recent_events: deque = deque(maxlen=100)
+        self.metrics = {
+            'leader_polls': 0,
+            'poll_errors': 0,
+            'events': 0,
+            'follower_orders': 0,
+            'rejected_orders': 0,
+            'total_latency_ms': 0.0,
+            'max_latency_ms': 0.0
+        }
+
+    def follow_leader(self, user_id: int, leader_address: str) -> Dict:
+        """Start copying a leader wallet."""
+        db = next(get_db())
+        follow = db.query(CopyTradingFollow).filter(
+            CopyTradingFollow.user_id == user_id, CopyTradingFollow.leader_address == leader_address
+        ).first()
+        if follow is None:
+            follow = CopyTradingFollow(user_id=user_id, leader_address=leader_address)
+            db.add(follow)
+        follow.is_active = True
+        db.commit()
+        self._loaded_at = 0.0
+        return {'success': True, 'message': f'Now following {leader_address}'}
+
+    def unfollow_leader(self, user_id: int, leader_address: str) -> Dict:
+        """Stop copying a leader wallet."""
+        db = next(get_db())
+        follow = db.query(CopyTradingFollow).filter(
+            CopyTradingFollow.user_id == user_id, CopyTradingFollow.leader_address == leader_address
+        ).first()
+        if follow is None:
+            return {'success': False, 'error': 'Not following this trader'}
+        follow.is_active = False
+        db.commit()
+        self._loaded_at = 0.0
+        return {'success': True, 'message': f'Stopped following {leader_address}'}
+
+    def load_followers(self):
+        """Rebuild the follower books of every followed leader."""
+        db = next(get_db())
+        rows = db.query(CopyTradingFollow.leader_address, CopyTradingFollow.user_id, CopyTradingSettings).join(
+            CopyTradingSettings, CopyTradingSettings.user_id == CopyTradingFollow.user_id
+        ).join(
+            Wallet, (Wallet.user_id == CopyTradingFollow.user_id) & (Wallet.is_active == True)
+        ).filter(
+            CopyTradingFollow.is_active == True, CopyTradingSettings.is_enabled == True
+        ).distinct().all()
+
+        books: Dict[str, FollowerBook] = {}
+        for leader_address, user_id, settings in rows:
+            books.setdefault(leader_address, FollowerBook()).add(user_id, settings)
+        self.books = books
+        self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _trade_id(trade: Dict) -> Optional[str]:
+        trade_id = trade.get('id') or trade.get('trade_id') or trade.get('transaction_hash')
+        return str(trade_id) if trade_id is not None else None
+
+    async def poll_leader(self, leader_address: str) -> List[Dict]:
+        """Return the leader's trades not seen before; the first poll only sets a baseline."""
+        trades = await self.data_api.get_user_trades(leader_address, limit=50)
+        self.metrics['leader_polls'] += 1
+        first_poll = leader_address not in self._seen
+        seen = self._seen.setdefault(leader_address, deque(maxlen=500))
+        seen_ids = self._seen_ids.setdefault(leader_address, set())
+
+        fresh = []
+        for trade in trades:
+            trade_id = self._trade_id(trade)
+            if trade_id is None or trade_id in seen_ids:
+                continue
+            if len(seen) == seen.maxlen:
+                seen_ids.discard(seen[0])
+            seen.append(trade_id)
+            seen_ids.add(trade_id)
+            if not first_poll:
+                fresh.append(trade)
+        return fresh
+
+    async def handle_trade(self, leader_address: str, trade: Dict, detected_at: float) -> Dict:
+        """Fan a leader trade out to followers and submit their orders in batches."""
+        book = self.books.get(leader_address)
+        market_id = trade.get('market_id')
+        side = str(trade.get('side', '')).upper()
+        price = float(trade.get('price') or 0)
+        shares = float(trade.get('shares') or trade.get('size') or 0)
+        if book is None or not market_id or side not in ('BUY', 'SELL') or price <= 0 or shares <= 0:
+            return {'followers': 0, 'orders': 0}
+
+        trade_id = self._trade_id(trade)
+        allocations = allocate(book, self.risk, market_id, side, shares * price,
+                               float(trade.get('confidence', 1.0)), self.min_notional)
+        # Record before the first await so concurrent events see the room taken;
+        # the pipeline records the same key again as a no-op
+        keys = {user_id: copy_order_key(leader_address, trade_id, user_id) for user_id, _ in allocations}
+        for user_id, notional in allocations:
+            self.risk.record(keys[user_id], user_id, market_id, side, notional)
+
+        first_submit_ms = None
+        placed = 0
+        for start in range(0, len(allocations), self.batch_size):
+            batch = allocations[start:start + self.batch_size]
+            results = await asyncio.gather(*(
+                self.trading_service.place_limit_order(
+                    user_id, market_id, trade.get('outcome'), side, notional / price, price,
+                    idempotency_key=keys[user_id], wait_timeout=0
+                )
+                for user_id, notional in batch
+            ), return_exceptions=True)
+            if first_submit_ms is None:
+                first_submit_ms = (time.perf_counter() - detected_at) * 1000
+            for (user_id, notional), result in zip(batch, results):
+                if isinstance(result, dict) and result.get('success'):
+                    placed += 1
+                else:
+                    self.risk.release(keys[user_id])
+                    self.metrics['rejected_orders'] += 1
+
+        latency_ms = (time.perf_counter() - detected_at) * 1000
+        event = {
+            'leader': leader_address,
+            'trade_id': trade_id,
+            'followers': len(book),
+            'orders': placed,
+            'first_submit_ms': round(first_submit_ms or 0.0, 2),
+            'last_submit_ms': round(latency_ms, 2)
+        }
+        self.recent_events.append(event)
+        self.metrics['events'] += 1
+        self.metrics['follower_orders'] += placed
+        self.metrics['total_latency_ms'] += latency_ms
+        self.metrics['max_latency_ms'] = max(self.metrics['max_latency_ms'], latency_ms)
+        return event
+
+    async def _poll_and_copy(self, leader_address: str):
+        try:
+            # Polling is background work; the copy orders themselves are not
+            with background_requests():
+                trades = await self.poll_leader(leader_address)
+        except Exception as e:
+            self.metrics['poll_errors'] += 1
+            logger.warning(f"Polling leader {leader_address} failed: {e}")
+            return
+        detected_at = time.perf_counter()
+        for trade in trades:
+            try:
+                await self.handle_trade(leader_address, trade, detected_at)
+            except Exception as e:
+                logger.error(f"Copying trade from {leader_address} failed: {e}")
+
+    async def run(self):
+        """Poll leaders and copy their trades until stopped."""
+        self.is_running = True
+        while self.is_running:
+            if time.monotonic() - self._loaded_at >= self.reload_interval:
+                self.load_followers()
+            await asyncio.gather(*(self._poll_and_copy(leader) for leader in list(self.books)))
+            await asyncio.sleep(self.poll_interval)
+
+    def stop(self):
+        self.is_running = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        events = self.metrics['events']
+        return {
+            **self.metrics,
+            'avg_latency_ms': round(self.metrics['total_latency_ms'] / events, 2) if events else 0.0,
+            'leaders': len(self.books),
+            'followers': sum(len(book) for book in self.books.values()),
+            'last_event': self.recent_events[-1] if self.recent_events else None
+        }
+
+
+_copy_trading_engine: Optional[CopyTradingEngine] = None
+
+
+def get_copy_trading_engine() -> CopyTradingEngine:
+    """Return the process-wide copy-trading engine, creating it on first use."""
+    global _copy_trading_engine
+    if _copy_trading_engine is None:
+        _copy_trading_engine = CopyTradingEngine(
+            Config.COPY_TRADING_POLL_INTERVAL, Config.COPY_TRADING_BATCH_SIZE,
+            Config.COPY_TRADING_RELOAD_INTERVAL, Config.COPY_TRADING_MIN_NOTIONAL
+        )
+    return _copy_trading_engine
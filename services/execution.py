@@ -0,0 +1,320 @@
+"""
+Sliced execution of large orders.
+
+A parent order is worked as a series of child limit orders priced at the
+touch, never beyond the parent's limit price, instead of one order that
+walks the book:
+
+- ``twap`` sends equal slices at a fixed interval over a duration;
+- ``iceberg`` keeps one slice of ``display`` shares resting and sends the
+  next only once it is done;
+- ``pov`` sizes each slice as a fraction of the visible depth within the
+  limit price.
+
+Parents and slices are rows in ``execution_orders`` and ``execution_slices``;
+a slice's state is the state of the trade the order pipeline created for it.
+Slices are written before they are submitted and carry an idempotency key,
+so a restart resumes every active parent without sending a slice twice.
+Fill progress and realized slippage against the arrival mid price are
+recomputed from the slice trades on every tick.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from database import get_db, Trade, ExecutionOrder, ExecutionSlice
+from apis import PolymarketCLOBAPI
+from apis.rate_limiter import background_requests
+from services.trading_service import TradingService
+from services.order_router import book_levels, mid_price
+
+logger = logging.getLogger(__name__)
+
+TWAP = 'twap'
+ICEBERG = 'iceberg'
+POV = 'pov'
+STRATEGIES = (TWAP, ICEBERG, POV)
+
+OPEN_STATUSES = ('queued', 'pending')
+
+
+def slice_order_key(parent_id: int, seq: int) -> str:
+    """Idempotency key of one child slice."""
+    return f"exec-{parent_id}-{seq}"
+
+
+def slippage_bps(side: str, arrival_price: float, avg_price: float) -> float:
+    """Slippage in basis points against the arrival price; positive is worse."""
+    move = (avg_price - arrival_price) / arrival_price * 10000
+    return move if side == 'BUY' else -move
+
+
+class ExecutionScheduler:
+    """Works active parent orders into child limit orders on every tick."""
+
+    def __init__(self, tick_interval: float = 2.0, twap_duration: float = 600.0, twap_slices: int = 10,
+                 iceberg_display: float = 0.1, participation_rate: float = 0.2,
+                 min_slice_shares: float = 1.0):
+        self.clob_api = PolymarketCLOBAPI()
+        self.trading_service = TradingService()
+        self.tick_interval = tick_interval
+        self.twap_duration = twap_duration
+        self.twap_slices = twap_slices
+        self.iceberg_display = iceberg_display
+        self.participation_rate = participation_rate
+        self.min_slice_shares = min_slice_shares
+        self.is_running = False
+        self.active = 0
+        self.metrics = {
+            'parents': 0,
+            'completed': 0,
+            'slices': 0,
+            'rejected_slices': 0,
+            'book_errors': 0,
+            'last_tick_ms': 0.0
+        }
+
+    async def submit(self, user_id: int, market_id: str, outcome: str, side: str, shares: float,
+                     strategy: str = TWAP, limit_price: Optional[float] = None, **params) -> Dict:
+        """Create a parent order; slicing starts on the next tick."""
+        try:
+            strategy = strategy.lower()
+            side = side.upper()
+            if strategy not in STRATEGIES:
+                return {'success': False, 'error': f"Strategy must be one of {', '.join(STRATEGIES)}"}
+            if side not in ('BUY', 'SELL') or shares <= 0:
+                return {'success': False, 'error': 'Invalid side or size'}
+
+            defaults = {
+                TWAP: {'duration': self.twap_duration, 'slices': self.twap_slices},
+                ICEBERG: {'display': max(self.min_slice_shares, shares * self.iceberg_display)},
+                POV: {'rate': self.participation_rate}
+            }[strategy]
+            orderbook = await self.clob_api.get_orderbook(market_id)
+
+            db = next(get_db())
+            parent = ExecutionOrder(
+                user_id=user_id,
+                market_id=market_id,
+                outcome=outcome.upper(),
+                side=side,
+                strategy=strategy,
+                params=json.dumps({**defaults, **params}),
+                total_shares=shares,
+                limit_price=limit_price,
+                arrival_price=mid_price(orderbook),
+                next_slice_at=datetime.utcnow()
+            )
+            db.add(parent)
+            db.commit()
+            self.metrics['parents'] += 1
+            return {'success': True, 'execution_id': parent.id}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def cancel(self, user_id: int, execution_id: int) -> Dict:
+        """Stop slicing a parent; resting slices are left to the order reconciler."""
+        db = next(get_db())
+        parent = db.query(ExecutionOrder).filter(
+            ExecutionOrder.id == execution_id, ExecutionOrder.user_id == user_id,
+            ExecutionOrder.status == 'active'
+        ).first()
+        if parent is None:
+            return {'success': False, 'error': 'Execution not found'}
+        parent.status = 'cancelled'
+        parent.completed_at = datetime.utcnow()
+        db.commit()
+        return {'success': True, 'message': f'Execution {execution_id} cancelled'}
+
+    def report(self, execution_id: int) -> Optional[Dict]:
+        """Progress and realized slippage of a parent order."""
+        db = next(get_db())
+        parent = db.get(ExecutionOrder, execution_id)
+        if parent is None:
+            return None
+        return {
+            'execution_id': parent.id,
+            'strategy': parent.strategy,
+            'status': parent.status,
+            'total_shares': parent.total_shares,
+            'filled_shares': parent.filled_shares,
+            'slices_sent': parent.slices_sent,
+            'arrival_price': parent.arrival_price,
+            'avg_fill_price': parent.avg_fill_price,
+            'slippage_bps': parent.slippage_bps
+        }
+
+    def _progress(self, db, parents: List[ExecutionOrder]) -> Dict[int, Dict[str, float]]:
+        """Open, filled and filled-notional shares of every parent, from its slice trades."""
+        progress = {parent.id: {'open': 0.0, 'filled': 0.0, 'notional': 0.0} for parent in parents}
+        rows = db.query(
+            ExecutionSlice.parent_id, ExecutionSlice.shares, ExecutionSlice.price, Trade.status
+        ).outerjoin(Trade, Trade.id == ExecutionSlice.trade_id).filter(ExecutionSlice.parent_id.in_(list(progress))).all()
+        for parent_id, shares, price, status in rows:
+            entry = progress[parent_id]
+            if status is None or status in OPEN_STATUSES:
+                entry['open'] += shares
+            elif status == 'filled':
+                entry['filled'] += shares
+                entry['notional'] += shares * price
+        return progress
+
+    def _slice_size(self, parent: ExecutionOrder, params: Dict, remaining: float, open_shares: float,
+                    levels: List[Tuple[float, float]], now: datetime) -> Tuple[float, Optional[datetime]]:
+        """Shares for the next slice and when the one after it is due."""
+        if parent.strategy == TWAP:
+            slices_left = max(1, int(params['slices']) - parent.slices_sent)
+            interval = float(params['duration']) / max(1, int(params['slices']))
+            return remaining / slices_left, now + timedelta(seconds=interval)
+        if parent.strategy == ICEBERG:
+            if open_shares > 0:
+                return 0.0, now
+            return min(float(params['display']), remaining), now
+        # Participation in the depth a taker could reach without crossing the limit
+        if parent.limit_price is None:
+            depth = levels[0][1]
+        elif parent.side == 'BUY':
+            depth = sum(size for price, size in levels if price <= parent.limit_price)
+        else:
+            depth = sum(size for price, size in levels if price >= parent.limit_price)
+        return depth * float(params['rate']), now + timedelta(seconds=self.tick_interval)
+
+    def _slice_price(self, parent: ExecutionOrder, levels: List[Tuple[float, float]]) -> float:
+        touch = levels[0][0]
+        if parent.limit_price is None:
+            return touch
+        return min(touch, parent.limit_price) if parent.side == 'BUY' else max(touch, parent.limit_price)
+
+    async def _place(self, parent: ExecutionOrder, child: ExecutionSlice) -> Dict:
+        return await self.trading_service.place_limit_order(
+            parent.user_id, parent.market_id, parent.outcome, parent.side, child.shares, child.price,
+            idempotency_key=child.idempotency_key, wait_timeout=0
+        )
+
+    async def tick(self):
+        """Update progress of every active parent and send the slices that are due."""
+        started = time.perf_counter()
+        db = next(get_db())
+        parents = db.query(ExecutionOrder).filter(ExecutionOrder.status == 'active').all()
+        self.active = len(parents)
+        if not parents:
+            return
+        progress = self._progress(db, parents)
+        now = datetime.utcnow()
+
+        async def fetch(market_id: str):
+            try:
+                return market_id, await self.clob_api.get_orderbook(market_id)
+            except Exception as e:
+                self.metrics['book_errors'] += 1
+                logger.warning(f"Orderbook fetch failed for {market_id}: {e}")
+                return market_id, None
+
+        due = {parent.id: parent.market_id for parent in parents
+               if parent.next_slice_at is None or parent.next_slice_at <= now}
+        with background_requests():
+            books = dict(await asyncio.gather(*(fetch(market_id) for market_id in set(due.values()))))
+
+        children = []
+        for parent in parents:
+            entry = progress[parent.id]
+            parent.filled_shares = entry['filled']
+            if entry['filled'] > 0:
+                parent.avg_fill_price = entry['notional'] / entry['filled']
+                if parent.arrival_price:
+                    parent.slippage_bps = round(slippage_bps(parent.side, parent.arrival_price,
+                                                             parent.avg_fill_price), 2)
+            remaining = parent.total_shares - entry['filled'] - entry['open']
+            if parent.total_shares - entry['filled'] < 1e-6:
+                parent.status = 'completed'
+                parent.completed_at = now
+                self.metrics['completed'] += 1
+                continue
+            orderbook = books.get(parent.market_id)
+            if parent.id not in due or not orderbook or remaining <= 0:
+                continue
+            levels = book_levels(orderbook, parent.side)
+            if not levels:
+                continue
+
+            shares, next_at = self._slice_size(parent, json.loads(parent.params or '{}'), remaining,
+                                               entry['open'], levels, now)
+            if shares <= 0:
+                continue
+            shares = round(min(max(shares, self.min_slice_shares), remaining), 6)
+            parent.slices_sent += 1
+            parent.next_slice_at = next_at
+            child = ExecutionSlice(
+                parent_id=parent.id, seq=parent.slices_sent,
+                idempotency_key=slice_order_key(parent.id, parent.slices_sent),
+                shares=shares, price=round(self._slice_price(parent, levels), 4)
+            )
+            db.add(child)
+            children.append((parent, child))
+        # Slices are durable before they are sent; a crash resends them with the same key
+        db.commit()
+
+        await self._send(db, children)
+        self.metrics['last_tick_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _send(self, db, children: List[Tuple[ExecutionOrder, ExecutionSlice]]):
+        results = await asyncio.gather(*(self._place(parent, child) for parent, child in children),
+                                       return_exceptions=True)
+        for (parent, child), result in zip(children, results):
+            if isinstance(result, dict) and result.get('trade_id'):
+                # Accepted or failed in the pipeline; either way the trade now holds its state
+                child.trade_id = result['trade_id']
+                self.metrics['slices' if result.get('success') else 'rejected_slices'] += 1
+            else:
+                # Rejected before reaching the pipeline, e.g. no wallet; retrying will not help
+                logger.warning(f"Execution {parent.id} slice rejected: {result}")
+                db.delete(child)
+                parent.status = 'failed'
+                parent.completed_at = datetime.utcnow()
+                self.metrics['rejected_slices'] += 1
+        db.commit()
+
+    async def resume(self):
+        """Resend slices written before a restart but never handed to the pipeline."""
+        db = next(get_db())
+        rows = db.query(ExecutionOrder, ExecutionSlice).join(
+            ExecutionSlice, ExecutionSlice.parent_id == ExecutionOrder.id
+        ).filter(ExecutionOrder.status == 'active', ExecutionSlice.trade_id.is_(None)).all()
+        await self._send(db, rows)
+
+    async def run(self):
+        """Resume interrupted slices and tick until stopped."""
+        self.is_running = True
+        await self.resume()
+        while self.is_running:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Execution tick failed: {e}")
+            await asyncio.sleep(self.tick_interval)
+
+    def stop(self):
+        self.is_running = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self.metrics, 'active': self.active}
+
+
+_execution_scheduler: Optional[ExecutionScheduler] = None
+
+
+def get_execution_scheduler() -> ExecutionScheduler:
+    """Return the process-wide execution scheduler, creating it on first use."""
+    global _execution_scheduler
+    if _execution_scheduler is None:
+        _execution_scheduler = ExecutionScheduler(
+            Config.EXECUTION_TICK_INTERVAL, Config.EXECUTION_TWAP_DURATION, Config.EXECUTION_TWAP_SLICES,
+            Config.EXECUTION_ICEBERG_DISPLAY, Config.EXECUTION_PARTICIPATION_RATE,
+            Config.EXECUTION_MIN_SLICE_SHARES
+        )
+    return _execution_scheduler
@@ -0,0 +1,392 @@
+"""
+Idempotent order submission pipeline.
+
+Orders are written to the ``order_outbox`` table, together with a queued
+``Trade`` row, before anything is sent upstream. A bounded pool of workers
+submits them, so an order outlives the handler that placed it and a restart
+picks up whatever was still queued. Each order carries its idempotency key
+upstream as ``client_order_id``; after an ambiguous failure (timeout, 5xx)
+the reconciler looks the key up in the user's upstream orders before
+resubmitting, so a retry never creates a second order.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from database import get_db, Trade, OrderOutbox
+from apis import PolymarketGammaAPI
+from apis.errors import APIError
+from services.order_reconciler import get_order_reconciler
+from services.risk import get_risk_book
+
+logger = logging.getLogger(__name__)
+
+# Outbox states
+QUEUED = 'queued'
+SUBMITTING = 'submitting'
+SUBMITTED = 'submitted'
+UNKNOWN = 'unknown'
+FAILED = 'failed'
+
+# States in which the caller can be given a final answer
+SETTLED = (SUBMITTED, UNKNOWN, FAILED)
+
+
+class OrderPipeline:
+    """Outbox-backed order submission with bounded concurrency and dedupe."""
+
+    def __init__(self, concurrency: int = 4, max_attempts: int = 3,
+                 dedupe_window: float = 10.0, reconcile_interval: float = 30.0):
+        self.gamma_api = PolymarketGammaAPI()
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.dedupe_window = dedupe_window
+        self.reconcile_interval = reconcile_interval
+        self._loop = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._reconciler: Optional[asyncio.Task] = None
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._retry_handles: List[asyncio.TimerHandle] = []
+        self.in_flight = 0
+        self.metrics = {
+            'enqueued': 0,
+            'submitted': 0,
+            'duplicates': 0,
+            'retries': 0,
+            'unknown': 0,
+            'failed': 0,
+            'reconciled': 0,
+            'total_submit_ms': 0.0,
+            'max_submit_ms': 0.0
+        }
+
+    @staticmethod
+    def fingerprint(user_id: int, order_type: str, market_id: str, outcome: str,
+                    side: str, shares: float, price: Optional[float] = None) -> str:
+        """Identify repeated taps of the same order by the same user."""
+        raw = f"{user_id}:{order_type}:{market_id}:{outcome}:{side.upper()}:{shares}:{price}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def find_duplicate(self, db, fingerprint: str, idempotency_key: Optional[str] = None) -> Optional[OrderOutbox]:
+        """Return an earlier outbox row this order repeats, if any."""
+        if idempotency_key:
+            return db.query(OrderOutbox).filter(OrderOutbox.idempotency_key == idempotency_key).first()
+        since = datetime.utcnow() - timedelta(seconds=self.dedupe_window)
+        return db.query(OrderOutbox).filter(
+            OrderOutbox.fingerprint == fingerprint,
+            OrderOutbox.created_at >= since,
+            OrderOutbox.status != FAILED
+        ).order_by(OrderOutbox.created_at.desc()).first()
+
+    async def place(self, db, user_id: int, order_type: str, order_data: Dict, trade_price: float,
+                    fingerprint: str, idempotency_key: Optional[str] = None,
+                    wait_timeout: Optional[float] = None) -> Dict:
+        """Record the order in the outbox, queue it and wait briefly for the outcome."""
+        # No await between the duplicate check and the insert, so taps cannot race
+        existing = self.find_duplicate(db, fingerprint, idempotency_key)
+        if existing is not None:
+            self.metrics['duplicates'] += 1
+            return await self.wait_for_result(existing.id, duplicate=True, timeout=wait_timeout)
+
+        key = idempotency_key or uuid.uuid4().hex
+        payload = {**order_data, 'client_order_id': key}
+        trade = Trade(
+            user_id=user_id,
+            market_id=order_data['market_id'],
+            outcome=order_data['outcome'],
+            side=order_data['side'],
+            order_type=order_type,
+            shares=order_data['shares'],
+            price=trade_price,
+            total_amount=order_data['shares'] * trade_price,
+            status=QUEUED
+        )
+        db.add(trade)
+        db.flush()
+        outbox = OrderOutbox(
+            idempotency_key=key,
+            fingerprint=fingerprint,
+            user_id=user_id,
+            trade_id=trade.id,
+            order_type=order_type,
+            payload=json.dumps(payload),
+            status=QUEUED
+        )
+        db.add(outbox)
+        db.commit()
+        get_risk_book().record(key, user_id, order_data['market_id'], order_data['side'],
+                               order_data['shares'] * trade_price)
+
+        self.enqueue(outbox.id)
+        return await self.wait_for_result(outbox.id, timeout=wait_timeout)
+
+    def enqueue(self, outbox_id: int):
+        self._ensure_workers()
+        self._waiter(outbox_id)
+        self.metrics['enqueued'] += 1
+        self._queue.put_nowait(outbox_id)
+
+    def _waiter(self, outbox_id: int) -> asyncio.Future:
+        future = self._waiters.get(outbox_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters[outbox_id] = future
+        return future
+
+    def _resolve(self, outbox_id: int):
+        future = self._waiters.pop(outbox_id, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    async def wait_for_result(self, outbox_id: int, duplicate: bool = False,
+                              timeout: Optional[float] = None) -> Dict:
+        """Wait up to ``timeout`` for the order to settle, then describe its state."""
+        timeout = Config.ORDER_SUBMIT_WAIT if timeout is None else timeout
+        future = self._waiters.get(outbox_id)
+        if future is not None and timeout > 0:
+            try:
+                # The handler may give up waiting; the submission carries on regardless
+                await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.result_for(outbox_id, duplicate)
+
+    def result_for(self, outbox_id: int, duplicate: bool = False) -> Dict:
+        db = next(get_db())
+        row = db.get(OrderOutbox, outbox_id)
+        if row is None:
+            return {'success': False, 'error': 'Order not found'}
+        if row.status == FAILED:
+            return {'success': False, 'error': row.last_error or 'Order failed', 'trade_id': row.trade_id}
+
+        result = {
+            'success': True,
+            'order_id': row.order_id,
+            'trade_id': row.trade_id,
+            'status': row.status,
+            'duplicate': duplicate
+        }
+        if row.status == SUBMITTED:
+            result['message'] = f"{row.order_type.capitalize()} order placed successfully"
+        else:
+            result['message'] = 'Order accepted and is being submitted'
+        if duplicate:
+            result['message'] = 'This order was already placed'
+        return result
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        # First use, or a new event loop: anything bound to the old one is gone
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._waiters = {}
+        self._retry_handles = []
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"order-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def _worker(self):
+        while True:
+            outbox_id = await self._queue.get()
+            self.in_flight += 1
+            try:
+                await self._submit(outbox_id)
+            except Exception as e:
+                logger.error(f"Order {outbox_id} submission crashed: {e}")
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    async def _submit(self, outbox_id: int):
+        db = next(get_db())
+        row = db.get(OrderOutbox, outbox_id)
+        if row is None or row.status in SETTLED:
+            self._resolve(outbox_id)
+            return
+
+        row.status = SUBMITTING
+        row.attempts = (row.attempts or 0) + 1
+        db.commit()
+
+        payload = json.loads(row.payload)
+        started = time.perf_counter()
+        try:
+            if row.order_type == 'LIMIT':
+                result = await self.gamma_api.place_limit_order(payload)
+            else:
+                result = await self.gamma_api.place_market_order(payload)
+        except APIError as e:
+            if not e.retryable:
+                self._fail(db, row, str(e))
+            elif row.attempts < self.max_attempts:
+                # Ambiguous: the order may be live. Check upstream before sending again
+                row.status = UNKNOWN
+                row.last_error = str(e)
+                db.commit()
+                self.metrics['retries'] += 1
+                self._schedule_reconcile(row.id, row.attempts)
+                return
+            else:
+                row.status = UNKNOWN
+                row.last_error = str(e)
+                db.commit()
+                self.metrics['unknown'] += 1
+        except Exception as e:
+            self._fail(db, row, str(e))
+        else:
+            self._mark_submitted(db, row, result.get('order_id'))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.metrics['total_submit_ms'] += elapsed_ms
+            self.metrics['max_submit_ms'] = max(self.metrics['max_submit_ms'], elapsed_ms)
+        self._resolve(outbox_id)
+
+    def _mark_submitted(self, db, row: OrderOutbox, order_id: Optional[str]):
+        row.status = SUBMITTED
+        row.order_id = order_id
+        row.submitted_at = datetime.utcnow()
+        trade = db.get(Trade, row.trade_id)
+        if trade is not None:
+            trade.order_id = order_id
+            trade.status = 'pending'
+        db.commit()
+        self.metrics['submitted'] += 1
+        # Market orders usually fill at once; let the status poll pick it up now
+        get_order_reconciler().wake()
+
+    def _fail(self, db, row: OrderOutbox, error: str):
+        row.status = FAILED
+        row.last_error = error
+        trade = db.get(Trade, row.trade_id)
+        if trade is not None:
+            trade.status = 'failed'
+        db.commit()
+        get_risk_book().release(row.idempotency_key)
+        self.metrics['failed'] += 1
+
+    def _schedule_reconcile(self, outbox_id: int, attempt: int):
+        loop = asyncio.get_running_loop()
+        delay = min(5.0, 0.5 * (2 ** (attempt - 1)))
+        self._retry_handles = [handle for handle in self._retry_handles if handle.when() > loop.time()]
+        self._retry_handles.append(
+            loop.call_later(delay, lambda: asyncio.ensure_future(self._reconcile_one(outbox_id)))
+        )
+
+    async def _reconcile_one(self, outbox_id: int):
+        db = next(get_db())
+        row = db.get(OrderOutbox, outbox_id)
+        if row is None or row.status != UNKNOWN:
+            return
+        try:
+            await self._reconcile(db, row)
+        except Exception as e:
+            # Leave it unknown; the periodic pass tries again
+            logger.warning(f"Could not reconcile order {outbox_id}: {e}")
+            self._resolve(outbox_id)
+
+    async def _reconcile(self, db, row: OrderOutbox):
+        """Settle an order whose submission outcome is unknown."""
+        payload = json.loads(row.payload)
+        orders = await self.gamma_api.get_user_orders(payload['wallet_address'])
+        match = next((o for o in orders if o.get('client_order_id') == row.idempotency_key), None)
+        self.metrics['reconciled'] += 1
+        if match is not None:
+            self._mark_submitted(db, row, match.get('order_id') or match.get('id'))
+            self._resolve(row.id)
+        elif (row.attempts or 0) < self.max_attempts:
+            # Never reached upstream; safe to send again with the same key
+            row.status = QUEUED
+            db.commit()
+            self._ensure_workers()
+            self._waiter(row.id)
+            self._queue.put_nowait(row.id)
+        else:
+            self._fail(db, row, row.last_error or 'Order not found upstream')
+            self._resolve(row.id)
+
+    async def recover(self):
+        """Requeue orders left behind by a previous run and settle unknown ones."""
+        self._ensure_workers()
+        db = next(get_db())
+        rows = db.query(OrderOutbox).filter(
+            OrderOutbox.status.in_([QUEUED, SUBMITTING, UNKNOWN])
+        ).order_by(OrderOutbox.id).all()
+        for row in rows:
+            if row.id in self._waiters:
+                continue
+            if row.status == QUEUED:
+                self.enqueue(row.id)
+                continue
+            # Submitting when the process died, or never confirmed: ask upstream first
+            row.status = UNKNOWN
+            db.commit()
+            self._waiter(row.id)
+            try:
+                await self._reconcile(db, row)
+            except Exception as e:
+                logger.warning(f"Could not reconcile order {row.id}: {e}")
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            db = next(get_db())
+            stale = datetime.utcnow() - timedelta(seconds=self.reconcile_interval)
+            rows = db.query(OrderOutbox).filter(
+                OrderOutbox.status == UNKNOWN, OrderOutbox.updated_at <= stale
+            ).all()
+            for row in rows:
+                try:
+                    await self._reconcile(db, row)
+                except Exception as e:
+                    logger.warning(f"Could not reconcile order {row.id}: {e}")
+
+    async def start(self):
+        """Start the workers, recover the outbox and schedule reconciliation."""
+        await self.recover()
+        self._reconciler = asyncio.create_task(self._reconcile_loop(), name='order-reconciler')
+
+    async def stop(self):
+        """Stop the workers; queued orders stay in the outbox for the next run."""
+        for handle in self._retry_handles:
+            handle.cancel()
+        tasks = self._workers + ([self._reconciler] if self._reconciler else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._reconciler = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        submitted = self.metrics['submitted']
+        return {
+            **self.metrics,
+            'avg_submit_ms': round(self.metrics['total_submit_ms'] / submitted, 2) if submitted else 0.0,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'in_flight': self.in_flight,
+            'concurrency': self.concurrency,
+            'waiting_callers': len(self._waiters)
+        }
+
+
+_order_pipeline: Optional[OrderPipeline] = None
+
+
+def get_order_pipeline() -> OrderPipeline:
+    """Return the process-wide order pipeline, creating it on first use."""
+    global _order_pipeline
+    if _order_pipeline is None:
+        _order_pipeline = OrderPipeline(
+            Config.ORDER_SUBMIT_CONCURRENCY, Config.ORDER_SUBMIT_ATTEMPTS,
+            Config.ORDER_DEDUPE_WINDOW, Config.ORDER_RECONCILE_INTERVAL
+        )
+    return _order_pipeline
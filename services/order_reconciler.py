@@ -0,0 +1,192 @@
+"""
+Batched reconciliation of open Trade rows with upstream order status.
+
+Each cycle groups pending trades by wallet, fetches every wallet's orders
+with one ``get_user_orders`` call and writes all status changes in a single
+bulk update. The cycle interval shrinks as more orders are open and backs
+off to ``max_interval`` when there is nothing to watch.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from database import get_db, Trade, Wallet
+from apis import PolymarketGammaAPI
+from apis.rate_limiter import background_requests
+from services.risk import get_risk_book
+
+logger = logging.getLogger(__name__)
+
+# Upstream order states mapped onto Trade.status
+STATUS_MAP = {
+    'filled': 'filled',
+    'matched': 'filled',
+    'cancelled': 'cancelled',
+    'canceled': 'cancelled',
+    'expired': 'cancelled',
+    'rejected': 'failed',
+    'failed': 'failed'
+}
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, (int, float)):
+        return datetime.utcfromtimestamp(value)
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    return None
+
+
+class OrderStatusReconciler:
+    """Moves pending trades to filled/cancelled/failed with one request per wallet."""
+
+    def __init__(self, min_interval: float = 5.0, max_interval: float = 60.0, wallet_concurrency: int = 5):
+        self.gamma_api = PolymarketGammaAPI()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.wallet_concurrency = wallet_concurrency
+        self.interval = max_interval
+        self.open_orders = 0
+        self.is_running = False
+        self._wake = asyncio.Event()
+        self.metrics = {
+            'cycles': 0,
+            'wallets_polled': 0,
+            'wallet_errors': 0,
+            'trades_updated': 0,
+            'last_cycle_ms': 0.0
+        }
+
+    def next_interval(self, open_orders: int) -> float:
+        """Poll faster the more orders are open; idle at ``max_interval``."""
+        if open_orders == 0:
+            return self.max_interval
+        return max(self.min_interval, self.max_interval / math.sqrt(open_orders))
+
+    def _pending_by_wallet(self, db) -> Dict[str, List[Trade]]:
+        rows = db.query(Trade, Wallet.address).join(
+            Wallet, (Wallet.user_id == Trade.user_id) & (Wallet.is_active == True)
+        ).filter(Trade.status == 'pending', Trade.order_id.isnot(None)).all()
+        grouped: Dict[str, List[Trade]] = defaultdict(list)
+        for trade, address in rows:
+            grouped[address].append(trade)
+        return grouped
+
+    @staticmethod
+    def _changes(trades: List[Trade], orders: List[Dict]) -> List[Dict]:
+        by_id = {}
+        for order in orders:
+            order_id = order.get('order_id') or order.get('id')
+            if order_id is not None:
+                by_id[str(order_id)] = order
+
+        changes = []
+        for trade in trades:
+            order = by_id.get(str(trade.order_id))
+            if order is None:
+                continue
+            status = STATUS_MAP.get(str(order.get('status', '')).lower())
+            if status is None:
+                continue
+            change = {'id': trade.id, 'status': status}
+            if status == 'filled':
+                change['filled_at'] = (_parse_time(order.get('filled_at'))
+                                       or _parse_time(order.get('updated_at'))
+                                       or datetime.utcnow())
+            if order.get('transaction_hash'):
+                change['transaction_hash'] = order['transaction_hash']
+            if order.get('fees') is not None:
+                change['fees'] = order['fees']
+            changes.append(change)
+        return changes
+
+    async def reconcile_once(self) -> int:
+        """Run one cycle; returns the number of trades updated."""
+        started = time.perf_counter()
+        db = next(get_db())
+        grouped = self._pending_by_wallet(db)
+        self.open_orders = sum(len(trades) for trades in grouped.values())
+
+        semaphore = asyncio.Semaphore(self.wallet_concurrency)
+
+        async def poll(address: str, trades: List[Trade]) -> List[Dict]:
+            async with semaphore:
+                try:
+                    orders = await self.gamma_api.get_user_orders(address)
+                except Exception as e:
+                    self.metrics['wallet_errors'] += 1
+                    logger.warning(f"Order status poll failed for {address}: {e}")
+                    return []
+                self.metrics['wallets_polled'] += 1
+                return self._changes(trades, orders)
+
+        with background_requests():
+            results = await asyncio.gather(*(poll(address, trades) for address, trades in grouped.items()))
+
+        changes = [change for result in results for change in result]
+        if changes:
+            db.bulk_update_mappings(Trade, changes)
+            db.commit()
+            get_risk_book().apply_trade_statuses(db, changes)
+            self.open_orders -= len(changes)
+            self.metrics['trades_updated'] += len(changes)
+
+        self.metrics['cycles'] += 1
+        self.metrics['last_cycle_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return len(changes)
+
+    def wake(self):
+        """Start the next cycle now; called when a new order goes live."""
+        self._wake.set()
+
+    async def run(self):
+        """Reconcile until stopped, adapting the interval to the open order count."""
+        self.is_running = True
+        while self.is_running:
+            try:
+                await self.reconcile_once()
+            except Exception as e:
+                logger.error(f"Order status reconciliation failed: {e}")
+            self.interval = self.next_interval(self.open_orders)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def stop(self):
+        self.is_running = False
+        self._wake.set()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'open_orders': self.open_orders,
+            'interval': round(self.interval, 2)
+        }
+
+
+_order_reconciler: Optional[OrderStatusReconciler] = None
+
+
+def get_order_reconciler() -> OrderStatusReconciler:
+    """Return the process-wide reconciler, creating it on first use."""
+    global _order_reconciler
+    if _order_reconciler is None:
+        _order_reconciler = OrderStatusReconciler(
+            Config.ORDER_STATUS_MIN_INTERVAL, Config.ORDER_STATUS_MAX_INTERVAL,
+            Config.ORDER_STATUS_WALLET_CONCURRENCY
+        )
+    return _order_reconciler
@@ -0,0 +1,146 @@
+"""
+Depth-aware choice between taking liquidity and resting a limit order.
+
+Given a size, a maximum slippage and the current book, the router scores
+one candidate plan per book level inside the slippage bound: take every
+level up to it immediately and rest the remainder one tick inside the
+spread. Candidates are scored from cumulative depth columns built in one
+pass, so choosing a plan costs O(levels) with no extra requests beyond the
+book fetch.
+
+A plan's cost is measured per share against the mid price. Taken shares
+cost their VWAP. Resting shares cost their passive price plus ``urgency``
+times the distance to the slippage bound, which is what chasing an
+unfilled remainder would cost. ``urgency`` 0 always prefers resting and 1
+prefers taking whenever the depth is there.
+"""
+
+from array import array
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+TICK_SIZE = 0.01
+
+
+def book_levels(orderbook: Dict, side: str) -> List[Tuple[float, float]]:
+    """(price, size) levels a taker on ``side`` would hit, best first."""
+    levels = []
+    for level in orderbook.get('asks' if side == 'BUY' else 'bids') or []:
+        if isinstance(level, dict):
+            price, size = level.get('price'), level.get('size')
+        else:
+            price, size = level[0], level[1]
+        levels.append((float(price), float(size)))
+    levels.sort(reverse=side != 'BUY')
+    return levels
+
+
+def mid_price(orderbook: Dict) -> Optional[float]:
+    asks = book_levels(orderbook, 'BUY')
+    bids = book_levels(orderbook, 'SELL')
+    if asks and bids:
+        return (asks[0][0] + bids[0][0]) / 2
+    if asks or bids:
+        return (asks or bids)[0][0]
+    return None
+
+
+class OrderPlan:
+    """How much to take now, at what limit, and what to rest at what price."""
+
+    def __init__(self, side: str, take_shares: float, take_price: Optional[float],
+                 rest_shares: float, rest_price: Optional[float], reference_price: float,
+                 expected_cost_bps: float):
+        self.side = side
+        self.take_shares = take_shares
+        self.take_price = take_price
+        self.rest_shares = rest_shares
+        self.rest_price = rest_price
+        self.reference_price = reference_price
+        self.expected_cost_bps = expected_cost_bps
+
+    def to_dict(self) -> Dict:
+        return {
+            'side': self.side,
+            'take_shares': self.take_shares,
+            'take_price': self.take_price,
+            'rest_shares': self.rest_shares,
+            'rest_price': self.rest_price,
+            'reference_price': self.reference_price,
+            'expected_cost_bps': self.expected_cost_bps
+        }
+
+
+def _passive_price(orderbook: Dict, side: str, bound: float) -> float:
+    """One tick inside the spread on our side, never past the bound."""
+    own = book_levels(orderbook, 'SELL' if side == 'BUY' else 'BUY')
+    other = book_levels(orderbook, side)
+    if side == 'BUY':
+        price = own[0][0] + TICK_SIZE if own else bound
+        if other:
+            price = min(price, other[0][0] - TICK_SIZE)
+        return round(min(price, bound), 4)
+    price = own[0][0] - TICK_SIZE if own else bound
+    if other:
+        price = max(price, other[0][0] + TICK_SIZE)
+    return round(max(price, bound), 4)
+
+
+def plan_order(orderbook: Dict, side: str, shares: float, max_slippage: float,
+               urgency: float = 0.5) -> Optional[OrderPlan]:
+    """Pick the cheapest take/rest split for ``shares``; None without a reference price."""
+    side = side.upper()
+    reference = mid_price(orderbook)
+    if reference is None or shares <= 0:
+        return None
+    sign = 1 if side == 'BUY' else -1
+    if side == 'BUY':
+        bound = min(1 - TICK_SIZE, reference * (1 + max_slippage))
+    else:
+        bound = max(TICK_SIZE, reference * (1 - max_slippage))
+
+    levels = [(price, size) for price, size in book_levels(orderbook, side)
+              if (price <= bound if side == 'BUY' else price >= bound)]
+    prices = array('d', (price for price, _ in levels))
+    # Cumulative shares and notional, each capped at the order size
+    depth = array('d', (min(value, shares) for value in accumulate(size for _, size in levels)))
+    notional = array('d', accumulate(
+        price * (depth[i] - (depth[i - 1] if i else 0.0)) for i, price in enumerate(prices)
+    ))
+
+    rest_price = _passive_price(orderbook, side, bound)
+    rest_cost = sign * (rest_price - reference) + urgency * abs(bound - rest_price)
+
+    # Candidate 0 rests everything; candidate i + 1 takes levels 0..i
+    best: Tuple[float, int] = (rest_cost * shares, -1)
+    for i in range(len(prices)):
+        taken = depth[i]
+        cost = sign * (notional[i] - reference * taken) + rest_cost * (shares - taken)
+        # Ties go to the plan that takes more, it fills for sure
+        if cost <= best[0] + 1e-12:
+            best = (cost, i)
+        if taken >= shares:
+            break
+
+    cost, index = best
+    take_shares = depth[index] if index >= 0 else 0.0
+    rest_shares = round(shares - take_shares, 6)
+    return OrderPlan(
+        side=side,
+        take_shares=round(take_shares, 6),
+        take_price=prices[index] if index >= 0 else None,
+        rest_shares=rest_shares,
+        rest_price=rest_price if rest_shares > 0 else None,
+        reference_price=reference,
+        expected_cost_bps=round(cost / (shares * reference) * 10000, 2)
+    )
+
+
+def plan_legs(plan: OrderPlan) -> List[Tuple[str, float, float]]:
+    """(leg name, shares, limit price) of the orders a plan needs."""
+    legs = []
+    if plan.take_shares > 0:
+        legs.append(('take', plan.take_shares, plan.take_price))
+    if plan.rest_shares > 0:
+        legs.append(('rest', plan.rest_shares, plan.rest_price))
+    return legs
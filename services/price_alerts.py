@@ -0,0 +1,259 @@
+"""
+Price alerts on market outcomes.
+
+Untriggered thresholds of each market outcome sit in two heaps: a min-heap
+of "above" thresholds and a max-heap of "below" thresholds. A price tick
+only pops the thresholds it crossed, so firing costs O(log n + k) for k
+triggered alerts. Alerts persist in ``price_alerts``; cancelled ones are
+dropped lazily when they reach the top of a heap. Ticks come from polling
+the CLOB prices of markets with open alerts, or from ``on_tick`` for a
+streaming feed. Notifications go out through the bot's send queue at alert
+priority, one message per user per tick.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from database import get_db, User, PriceAlert
+from apis import PolymarketCLOBAPI
+from apis.rate_limiter import background_requests
+
+logger = logging.getLogger(__name__)
+
+ABOVE = 'above'
+BELOW = 'below'
+
+# Send queue priority of alert messages, matching bot.send_queue.PRIORITY_ALERT
+ALERT_PRIORITY = 1
+
+
+class AlertBook:
+    """Untriggered thresholds of one market outcome."""
+
+    def __init__(self):
+        self.above: List[Tuple[float, int]] = []   # (threshold, alert_id)
+        self.below: List[Tuple[float, int]] = []   # (-threshold, alert_id)
+
+    def add(self, alert_id: int, direction: str, threshold: float):
+        if direction == ABOVE:
+            heapq.heappush(self.above, (threshold, alert_id))
+        else:
+            heapq.heappush(self.below, (-threshold, alert_id))
+
+    def crossed(self, price: float) -> List[int]:
+        """Pop and return the ids of every threshold ``price`` has reached."""
+        fired = []
+        while self.above and self.above[0][0] <= price:
+            fired.append(heapq.heappop(self.above)[1])
+        while self.below and -self.below[0][0] >= price:
+            fired.append(heapq.heappop(self.below)[1])
+        return fired
+
+    def __len__(self) -> int:
+        return len(self.above) + len(self.below)
+
+
+def outcome_prices(data: Dict) -> Dict[str, float]:
+    """Outcome prices from a CLOB prices response."""
+    prices = {}
+    for outcome in ('YES', 'NO'):
+        value = data.get(f'{outcome.lower()}_price')
+        if value is not None:
+            prices[outcome] = float(value)
+    for outcome, value in (data.get('prices') or {}).items():
+        if value is not None:
+            prices[str(outcome).upper()] = float(value)
+    return prices
+
+
+class PriceAlertEngine:
+    """Keeps open alerts in per-market heaps and fires them on price ticks."""
+
+    def __init__(self, poll_interval: float = 10.0, concurrency: int = 5, max_per_user: int = 20):
+        self.clob_api = PolymarketCLOBAPI()
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.max_per_user = max_per_user
+        self.send_queue = None
+        self.books: Dict[Tuple[str, str], AlertBook] = {}
+        # alert_id -> (chat_id, market_id, outcome, direction, threshold); absent once cancelled
+        self.alerts: Dict[int, Tuple[int, str, str, str, float]] = {}
+        self.is_running = False
+        self.metrics = {
+            'ticks': 0,
+            'fired': 0,
+            'notifications': 0,
+            'poll_errors': 0,
+            'last_poll_ms': 0.0
+        }
+
+    def bind(self, send_queue):
+        """Attach the send queue used for notifications."""
+        self.send_queue = send_queue
+
+    def _track(self, alert_id: int, chat_id: int, market_id: str, outcome: str,
+               direction: str, threshold: float):
+        self.alerts[alert_id] = (chat_id, market_id, outcome, direction, threshold)
+        self.books.setdefault((market_id, outcome), AlertBook()).add(alert_id, direction, threshold)
+
+    def load(self):
+        """Rebuild the heaps from active alerts in the database."""
+        db = next(get_db())
+        rows = db.query(PriceAlert, User.telegram_id).join(
+            User, User.id == PriceAlert.user_id
+        ).filter(PriceAlert.is_active == True).all()
+
+        self.books = {}
+        self.alerts = {}
+        for alert, chat_id in rows:
+            self._track(alert.id, chat_id, alert.market_id, alert.outcome, alert.direction, alert.threshold)
+
+    def create_alert(self, user_id: int, market_id: str, outcome: str, direction: str,
+                     threshold: float) -> Dict:
+        """Store a new alert and start watching it."""
+        try:
+            direction = direction.lower()
+            outcome = outcome.upper()
+            if direction not in (ABOVE, BELOW):
+                return {'success': False, 'error': "Direction must be 'above' or 'below'"}
+            if not 0 < threshold < 1:
+                return {'success': False, 'error': 'Price must be between 0 and 1'}
+
+            db = next(get_db())
+            user = db.get(User, user_id)
+            if user is None:
+                return {'success': False, 'error': 'User not found'}
+            active = db.query(PriceAlert).filter(
+                PriceAlert.user_id == user_id, PriceAlert.is_active == True
+            ).count()
+            if active >= self.max_per_user:
+                return {'success': False, 'error': f'You can have at most {self.max_per_user} active alerts'}
+
+            alert = PriceAlert(user_id=user_id, market_id=market_id, outcome=outcome,
+                               direction=direction, threshold=threshold)
+            db.add(alert)
+            db.commit()
+            self._track(alert.id, user.telegram_id, market_id, outcome, direction, threshold)
+            return {'success': True, 'alert_id': alert.id}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def cancel_alert(self, user_id: int, alert_id: int) -> Dict:
+        """Deactivate one of the user's alerts."""
+        db = next(get_db())
+        alert = db.query(PriceAlert).filter(
+            PriceAlert.id == alert_id, PriceAlert.user_id == user_id, PriceAlert.is_active == True
+        ).first()
+        if alert is None:
+            return {'success': False, 'error': 'Alert not found'}
+        alert.is_active = False
+        db.commit()
+        # The heap entry is skipped when it reaches the top
+        self.alerts.pop(alert_id, None)
+        return {'success': True, 'message': f'Alert {alert_id} cancelled'}
+
+    def list_alerts(self, user_id: int) -> List[PriceAlert]:
+        db = next(get_db())
+        return db.query(PriceAlert).filter(
+            PriceAlert.user_id == user_id, PriceAlert.is_active == True
+        ).order_by(PriceAlert.created_at).all()
+
+    def on_tick(self, market_id: str, outcome: str, price: float) -> List[int]:
+        """Fire every alert crossed by ``price``; returns the fired alert ids."""
+        self.metrics['ticks'] += 1
+        key = (market_id, outcome.upper())
+        book = self.books.get(key)
+        if book is None:
+            return []
+        fired = [alert_id for alert_id in book.crossed(price) if alert_id in self.alerts]
+        if not book:
+            del self.books[key]
+        if not fired:
+            return []
+
+        triggered_at = datetime.utcnow()
+        db = next(get_db())
+        db.bulk_update_mappings(PriceAlert, [
+            {'id': alert_id, 'is_active': False, 'triggered_price': price, 'triggered_at': triggered_at}
+            for alert_id in fired
+        ])
+        db.commit()
+
+        by_chat: Dict[int, List[str]] = defaultdict(list)
+        for alert_id in fired:
+            chat_id, _, outcome, direction, threshold = self.alerts.pop(alert_id)
+            by_chat[chat_id].append(f"• {market_id} {outcome} {direction} {threshold:.2f}")
+        self.metrics['fired'] += len(fired)
+        self._notify(by_chat, price)
+        return fired
+
+    def _notify(self, by_chat: Dict[int, List[str]], price: float):
+        if self.send_queue is None:
+            logger.warning(f"Dropping {len(by_chat)} alert notifications; no send queue bound")
+            return
+        for chat_id, lines in by_chat.items():
+            text = f"🔔 Price alert: now {price:.2f}\n" + "\n".join(lines)
+            self.send_queue.send_message(chat_id, text, priority=ALERT_PRIORITY)
+            self.metrics['notifications'] += 1
+
+    async def poll_once(self):
+        """Fetch prices of every market with open alerts and apply them as ticks."""
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def poll(market_id: str):
+            async with semaphore:
+                try:
+                    data = await self.clob_api.get_market_prices(market_id)
+                except Exception as e:
+                    self.metrics['poll_errors'] += 1
+                    logger.warning(f"Price poll failed for {market_id}: {e}")
+                    return
+            for outcome, price in outcome_prices(data).items():
+                self.on_tick(market_id, outcome, price)
+
+        markets = {market_id for market_id, _ in self.books}
+        with background_requests():
+            await asyncio.gather(*(poll(market_id) for market_id in markets))
+        self.metrics['last_poll_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def run(self):
+        """Load alerts and poll prices until stopped."""
+        self.is_running = True
+        self.load()
+        while self.is_running:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Price alert poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def stop(self):
+        self.is_running = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'open_alerts': len(self.alerts),
+            'markets': len(self.books)
+        }
+
+
+_price_alert_engine: Optional[PriceAlertEngine] = None
+
+
+def get_price_alert_engine() -> PriceAlertEngine:
+    """Return the process-wide price alert engine, creating it on first use."""
+    global _price_alert_engine
+    if _price_alert_engine is None:
+        _price_alert_engine = PriceAlertEngine(
+            Config.PRICE_ALERT_POLL_INTERVAL, Config.PRICE_ALERT_CONCURRENCY,
+            Config.PRICE_ALERT_MAX_PER_USER
+        )
+    return _price_alert_engine
@@ -0,0 +1,205 @@
+"""
+In-memory risk accounting for pre-trade checks.
+
+Per-user traded volume is kept over a rolling 24h window in fixed-width ring
+buckets, and per-market exposure as a running USD total, so a pre-trade
+check is a couple of dict lookups instead of a SUM over ``trades``. Orders
+are recorded under their idempotency key, which makes recording the same
+order twice (copy engine, then order pipeline) harmless, and released by it
+if they fail or are cancelled. The book is rebuilt from the ``trades`` table
+on startup.
+"""
+
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from database import get_db, Trade, OrderOutbox
+
+# Trade states that count towards volume and exposure
+LIVE_STATUSES = ('queued', 'pending', 'filled')
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RollingCounter:
+    """Sum over a sliding window, kept in a ring of fixed-width buckets."""
+
+    def __init__(self, window: float = 86400.0, buckets: int = 96):
+        self.buckets = buckets
+        self.width = window / buckets
+        self.slots = array('d', [0.0] * buckets)
+        self.head = -1
+        self.total = 0.0
+
+    def _epoch(self, at: float) -> int:
+        return int(at // self.width)
+
+    def _advance(self, epoch: int):
+        if epoch <= self.head:
+            return
+        if self.head < 0 or epoch - self.head >= self.buckets:
+            for i in range(self.buckets):
+                self.slots[i] = 0.0
+            self.total = 0.0
+        else:
+            # Amortised O(1): each bucket is cleared once per lap of the ring
+            for expired in range(self.head + 1, epoch + 1):
+                i = expired % self.buckets
+                self.total -= self.slots[i]
+                self.slots[i] = 0.0
+        self.head = epoch
+
+    def add(self, amount: float, at: Optional[float] = None):
+        epoch = self._epoch(time.time() if at is None else at)
+        self._advance(epoch)
+        if epoch <= self.head - self.buckets:
+            return
+        self.slots[epoch % self.buckets] += amount
+        self.total += amount
+
+    def value(self, now: Optional[float] = None) -> float:
+        self._advance(self._epoch(time.time() if now is None else now))
+        return max(0.0, self.total)
+
+
+class RiskBook:
+    """Rolling per-user volume and per-market exposure, keyed by order."""
+
+    def __init__(self, window: float = 86400.0, buckets: int = 96):
+        self.window = window
+        self.buckets = buckets
+        self.volume: Dict[int, RollingCounter] = {}
+        self.exposure: Dict[Tuple[int, str], float] = {}
+        self._orders: Dict[str, Tuple[int, str, str, float, float]] = {}
+        self.metrics = {
+            'checks': 0,
+            'rejections': 0,
+            'recorded': 0,
+            'released': 0,
+            'rebuilt_orders': 0
+        }
+
+    def daily_volume(self, user_id: int, now: Optional[float] = None) -> float:
+        """USD traded by the user over the rolling window."""
+        counter = self.volume.get(user_id)
+        return counter.value(now) if counter is not None else 0.0
+
+    def position(self, user_id: int, market_id: str) -> float:
+        """Net USD bought in a market by the user."""
+        return self.exposure.get((user_id, market_id), 0.0)
+
+    def check(self, user_id: int, market_id: str, side: str, notional: float,
+              max_daily_volume: Optional[float] = None,
+              max_position_size: Optional[float] = None) -> Optional[str]:
+        """Return why the order breaches a limit, or None if it fits."""
+        self.metrics['checks'] += 1
+        reason = None
+        if max_daily_volume is not None and self.daily_volume(user_id) + notional > max_daily_volume:
+            reason = f"Daily volume limit of {max_daily_volume:.2f} USD reached"
+        elif (max_position_size is not None and side.upper() == 'BUY'
+              and self.position(user_id, market_id) + notional > max_position_size):
+            reason = f"Position limit of {max_position_size:.2f} USD reached"
+        if reason:
+            self.metrics['rejections'] += 1
+        return reason
+
+    def record(self, key: str, user_id: int, market_id: str, side: str, notional: float,
+               at: Optional[float] = None) -> bool:
+        """Account for an order once; returns False if ``key`` was already recorded."""
+        if key in self._orders:
+            return False
+        at = time.time() if at is None else at
+        side = side.upper()
+        self._orders[key] = (user_id, market_id, side, notional, at)
+        if at > time.time() - self.window:
+            counter = self.volume.get(user_id)
+            if counter is None:
+                counter = self.volume[user_id] = RollingCounter(self.window, self.buckets)
+            counter.add(notional, at)
+        self._move_exposure(user_id, market_id, notional if side == 'BUY' else -notional)
+        self.metrics['recorded'] += 1
+        return True
+
+    def release(self, key: str) -> bool:
+        """Undo an order that was rejected or cancelled before filling."""
+        order = self._orders.pop(key, None)
+        if order is None:
+            return False
+        user_id, market_id, side, notional, at = order
+        counter = self.volume.get(user_id)
+        if counter is not None:
+            counter.add(-notional, at)
+        self._move_exposure(user_id, market_id, -notional if side == 'BUY' else notional)
+        self.metrics['released'] += 1
+        return True
+
+    def _move_exposure(self, user_id: int, market_id: str, delta: float):
+        key = (user_id, market_id)
+        value = max(0.0, self.exposure.get(key, 0.0) + delta)
+        if value:
+            self.exposure[key] = value
+        else:
+            self.exposure.pop(key, None)
+
+    def settle(self, key: str):
+        """Forget a filled order; its volume and exposure stay."""
+        self._orders.pop(key, None)
+
+    def rebuild(self):
+        """Reload the book from live and filled trades."""
+        db = next(get_db())
+        rows = db.query(Trade, OrderOutbox.idempotency_key).outerjoin(
+            OrderOutbox, OrderOutbox.trade_id == Trade.id
+        ).filter(Trade.status.in_(LIVE_STATUSES)).all()
+
+        self.volume = {}
+        self.exposure = {}
+        self._orders = {}
+        for trade, key in rows:
+            key = key or f"trade-{trade.id}"
+            self.record(key, trade.user_id, trade.market_id, trade.side,
+                        trade.total_amount, _timestamp(trade.created_at))
+            if trade.status == 'filled':
+                self.settle(key)
+        self.metrics['rebuilt_orders'] = len(rows)
+
+    def apply_trade_statuses(self, db, changes: List[Dict]):
+        """Settle filled trades and release cancelled or failed ones, by trade id."""
+        keys = dict(db.query(OrderOutbox.trade_id, OrderOutbox.idempotency_key).filter(
+            OrderOutbox.trade_id.in_([change['id'] for change in changes])
+        ).all())
+        for change in changes:
+            key = keys.get(change['id']) or f"trade-{change['id']}"
+            if change['status'] == 'filled':
+                self.settle(key)
+            else:
+                self.release(key)
+
+    async def start(self):
+        self.rebuild()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'users': len(self.volume),
+            'open_exposures': len(self.exposure),
+            'tracked_orders': len(self._orders)
+        }
+
+
+_risk_book: Optional[RiskBook] = None
+
+
+def get_risk_book() -> RiskBook:
+    """Return the process-wide risk book, creating it on first use."""
+    global _risk_book
+    if _risk_book is None:
+        _risk_book = RiskBook(Config.RISK_VOLUME_WINDOW, Config.RISK_VOLUME_BUCKETS)
+    return _risk_book
@@ -2,6 +2,10 @@ from typing import Dict, List, Optional, Any
 from database import get_db, User, Trade, Position
 from apis import PolymarketGammaAPI, PolymarketDataAPI, PolymarketCLOBAPI
 from services.wallet_service import WalletService
+from services.order_pipeline import get_order_pipeline
+from services.order_router import plan_order, plan_legs
+from services.risk import get_risk_book
+from config import Config
 import asyncio
 from datetime import datetime
 
@@ -13,10 +17,13 @@ class TradingService:
         self.data_api = PolymarketDataAPI()
         self.clob_api = PolymarketCLOBAPI()
         self.wallet_service = WalletService()
+        self.order_pipeline = get_order_pipeline()
     
     async def place_limit_order(self, user_id: int, market_id: str, outcome: str, 
                               side: str, shares: float, price: float, 
-                              slippage_tolerance: float = 0.10) -> Dict:
+                              slippage_tolerance: float = 0.10,
+                              idempotency_key: Optional[str] = None,
+                              wait_timeout: Optional[float] = None) -> Dict:
         """Place a limit order."""
         db = next(get_db())
         user = db.query(User).filter(User.id == user_id).first()
@@ -37,39 +44,20 @@ class TradingService:
                 'wallet_address': wallet.address
             }
             
-            # Place order via Gamma API
-            result = await self.gamma_api.place_limit_order(order_data)
-            
-            # Create trade record
-            trade = Trade(
-                user_id=user_id,
-                market_id=market_id,
-                outcome=outcome,
-                side=side.upper(),
-                order_type='LIMIT',
-                shares=shares,
-                price=price,
-                total_amount=shares * price,
-                status='pending',
-                order_id=result.get('order_id')
+            # Outbox first, then submission from the pipeline's workers
+            fingerprint = self.order_pipeline.fingerprint(user_id, 'LIMIT', market_id, outcome, side, shares, price)
+            return await self.order_pipeline.place(
+                db, user_id, 'LIMIT', order_data, price, fingerprint, idempotency_key, wait_timeout
             )
             
-            db.add(trade)
-            db.commit()
-            
-            return {
-                'success': True,
-                'order_id': result.get('order_id'),
-                'trade_id': trade.id,
-                'message': 'Limit order placed successfully'
-            }
-            
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
     async def place_market_order(self, user_id: int, market_id: str, outcome: str, 
                                side: str, shares: float, 
-                               slippage_tolerance: float = 0.10) -> Dict:
+                               slippage_tolerance: float = 0.10,
+                               idempotency_key: Optional[str] = None,
+                               wait_timeout: Optional[float] = None) -> Dict:
         """Place a market order."""
         db = next(get_db())
         user = db.query(User).filter(User.id == user_id).first()
@@ -79,6 +67,15 @@ class TradingService:
             return {'success': False, 'error': 'User or wallet not found'}
         
         try:
+            # Repeated taps are answered before spending a price lookup on them
+            fingerprint = self.order_pipeline.fingerprint(user_id, 'MARKET', market_id, outcome, side, shares)
+            duplicate = self.order_pipeline.find_duplicate(db, fingerprint, idempotency_key)
+            if duplicate is not None:
+                self.order_pipeline.metrics['duplicates'] += 1
+                return await self.order_pipeline.wait_for_result(
+                    duplicate.id, duplicate=True, timeout=wait_timeout
+                )
+            
             # Get current market price
             market_data = await self.clob_api.get_market_prices(market_id)
             current_price = market_data.get('yes_price' if outcome == 'YES' else 'no_price', 0)
@@ -100,31 +97,45 @@ class TradingService:
                 'wallet_address': wallet.address
             }
             
-            # Place order via Gamma API
-            result = await self.gamma_api.place_market_order(order_data)
-            
-            # Create trade record
-            trade = Trade(
-                user_id=user_id,
-                market_id=market_id,
-                outcome=outcome,
-                side=side.upper(),
-                order_type='MARKET',
-                shares=shares,
-                price=max_price,
-                total_amount=shares * max_price,
-                status='pending',
-                order_id=result.get('order_id')
+            # Outbox first, then submission from the pipeline's workers
+            return await self.order_pipeline.place(
+                db, user_id, 'MARKET', order_data, max_price, fingerprint, idempotency_key, wait_timeout
             )
             
-            db.add(trade)
-            db.commit()
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    async def place_smart_order(self, user_id: int, market_id: str, outcome: str,
+                                side: str, shares: float,
+                                max_slippage: float = Config.DEFAULT_SLIPPAGE,
+                                urgency: Optional[float] = None,
+                                idempotency_key: Optional[str] = None,
+                                wait_timeout: Optional[float] = None) -> Dict:
+        """Split an order between an immediate fill and a resting limit using the book."""
+        try:
+            orderbook = await self.clob_api.get_orderbook(market_id)
+            plan = plan_order(orderbook, side, shares, max_slippage,
+                              Config.SMART_ORDER_URGENCY if urgency is None else urgency)
+            if plan is None:
+                return {'success': False, 'error': 'No prices in the order book'}
             
+            legs = plan_legs(plan)
+            results = await asyncio.gather(*(
+                self.place_limit_order(
+                    user_id, market_id, outcome, side, leg_shares, leg_price,
+                    slippage_tolerance=max_slippage,
+                    idempotency_key=f"{idempotency_key}-{leg}" if idempotency_key else None,
+                    wait_timeout=wait_timeout
+                )
+                for leg, leg_shares, leg_price in legs
+            ))
+            orders = {leg: result for (leg, _, _), result in zip(legs, results)}
+            failed = [result['error'] for result in results if not result.get('success')]
             return {
-                'success': True,
-                'order_id': result.get('order_id'),
-                'trade_id': trade.id,
-                'message': 'Market order placed successfully'
+                'success': len(failed) < len(results),
+                'plan': plan.to_dict(),
+                'orders': orders,
+                'error': '; '.join(failed) if failed else None
             }
             
         except Exception as e:
@@ -154,6 +165,54 @@ class TradingService:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    async def cancel_orders(self, user_id: int, market_id: Optional[str] = None,
+                            side: Optional[str] = None, outcome: Optional[str] = None) -> Dict:
+        """Cancel the user's resting orders, optionally only in one market or on one side."""
+        db = next(get_db())
+        query = db.query(Trade.id, Trade.order_id).filter(
+            Trade.user_id == user_id, Trade.status == 'pending', Trade.order_id.isnot(None)
+        )
+        if market_id:
+            query = query.filter(Trade.market_id == market_id)
+        if side:
+            query = query.filter(Trade.side == side.upper())
+        if outcome:
+            query = query.filter(Trade.outcome == outcome.upper())
+        orders = query.all()
+        if not orders:
+            return {'success': True, 'cancelled': 0, 'failed': 0, 'message': 'No open orders to cancel'}
+        
+        semaphore = asyncio.Semaphore(Config.ORDER_CANCEL_CONCURRENCY)
+        
+        async def cancel(order_id: str) -> Optional[str]:
+            async with semaphore:
+                try:
+                    await self.gamma_api.cancel_order(order_id)
+                    return None
+                except Exception as e:
+                    return str(e)
+        
+        errors = await asyncio.gather(*(cancel(order_id) for _, order_id in orders))
+        cancelled = [trade_id for (trade_id, _), error in zip(orders, errors) if error is None]
+        if cancelled:
+            db.query(Trade).filter(Trade.id.in_(cancelled)).update(
+                {'status': 'cancelled'}, synchronize_session=False
+            )
+            db.commit()
+            get_risk_book().apply_trade_statuses(db, [{'id': trade_id, 'status': 'cancelled'}
+                                                      for trade_id in cancelled])
+        
+        failed = len(orders) - len(cancelled)
+        result = {
+            'success': failed == 0,
+            'cancelled': len(cancelled),
+            'failed': failed,
+            'message': f'Cancelled {len(cancelled)} of {len(orders)} open orders'
+        }
+        if failed:
+            result['error'] = next(error for error in errors if error is not None)
+        return result
+    
     async def get_user_orders(self, user_id: int, status: str = None) -> List[Dict]:
         """Get user's orders."""
         db = next(get_db())
@@ -0,0 +1,219 @@
+"""
+Local index of ERC-20 transfers to and from our users' wallets.
+
+The indexer follows the chain ``TRANSFER_INDEXER_CONFIRMATIONS`` blocks
+behind the head, so reorgs are already settled by the time it reads a block.
+Each step asks the node for every ``Transfer`` log of the tracked tokens in
+a range of up to ``TRANSFER_INDEXER_MAX_BLOCKS`` blocks. Topic filters
+cannot express "from or to any of these thousands of addresses", so the
+logs are filtered locally against a hash set of our lowercase wallet
+addresses. The set is reloaded only when the wallet count changes.
+
+Matching transfers are written to ``wallet_transfers`` together with the
+cursor in one transaction, so a crash never skips or duplicates a range.
+A transfer between two of our wallets gets a row for each side. History is
+read newest first with keyset pagination on (block_number, log_index),
+served from the table's composite index.
+
+The first run starts at the current head; earlier history is not
+backfilled.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, or_
+
+from config import Config
+from database import get_db, Wallet, WalletTransfer, IndexerCursor
+from apis.polygon_rpc import PolygonRPC
+from apis.rate_limiter import background_requests
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+CURSOR_NAME = 'erc20_transfers'
+
+
+def topic_address(topic: str) -> str:
+    """Lowercase address held in an indexed address topic."""
+    return '0x' + topic[-40:].lower()
+
+
+class TransferIndexer:
+    """Follows confirmed blocks and records transfers touching our wallets."""
+
+    def __init__(self, rpc: Optional[PolygonRPC] = None, tokens: Optional[Dict[str, Tuple[Optional[str], int]]] = None,
+                 confirmations: int = 20, max_blocks: int = 500, poll_interval: float = 5.0):
+        self.rpc = rpc or PolygonRPC()
+        # token address -> (symbol, decimals); the native coin has no logs
+        self.tokens = {
+            address.lower(): (symbol, decimals)
+            for symbol, (address, decimals) in (tokens or Config.BALANCE_TOKENS).items() if address
+        }
+        self.confirmations = confirmations
+        self.max_blocks = max_blocks
+        self.poll_interval = poll_interval
+        self.addresses: Set[str] = set()
+        self.is_running = False
+        self.metrics = {
+            'blocks': 0,
+            'logs_scanned': 0,
+            'transfers': 0,
+            'last_block': None,
+            'lag': 0,
+            'last_step_ms': 0.0
+        }
+
+    def load_addresses(self) -> Set[str]:
+        """Reload the wallet set when wallets were added or removed."""
+        db = next(get_db())
+        if db.query(Wallet).count() != len(self.addresses):
+            self.addresses = {address.lower() for address, in db.query(Wallet.address)}
+        return self.addresses
+
+    def cursor(self) -> Optional[int]:
+        db = next(get_db())
+        row = db.get(IndexerCursor, CURSOR_NAME)
+        return row.block_number if row else None
+
+    def match(self, logs: List[Dict]) -> List[Dict]:
+        """Transfer rows for every side of ``logs`` that is one of our wallets."""
+        rows = []
+        for log in logs:
+            topics = log.get('topics') or []
+            token = self.tokens.get(log.get('address', '').lower())
+            # ERC-721 transfers share the topic but index the token id as a fourth topic
+            if token is None or len(topics) != 3 or topics[0] != TRANSFER_TOPIC:
+                continue
+            sender, recipient = topic_address(topics[1]), topic_address(topics[2])
+            sides = [(wallet, direction, other) for wallet, direction, other in (
+                (sender, 'out', recipient), (recipient, 'in', sender)
+            ) if wallet in self.addresses]
+            if not sides:
+                continue
+            symbol, decimals = token
+            value = int(log['data'], 16) if log.get('data') not in (None, '0x') else 0
+            for wallet, direction, other in sides:
+                rows.append({
+                    'wallet_address': wallet,
+                    'direction': direction,
+                    'counterparty': other,
+                    'token_address': log['address'].lower(),
+                    'token': symbol,
+                    'amount': value / 10 ** decimals,
+                    'raw_amount': str(value),
+                    'tx_hash': log['transactionHash'],
+                    'log_index': int(log['logIndex'], 16),
+                    'block_number': int(log['blockNumber'], 16)
+                })
+        return rows
+
+    async def block_times(self, blocks: Set[int]) -> Dict[int, datetime]:
+        """Timestamps of the given blocks in one batch request."""
+        ordered = sorted(blocks)
+        results = await self.rpc.batch([('eth_getBlockByNumber', [hex(block), False]) for block in ordered])
+        return {block: datetime.utcfromtimestamp(int(result['timestamp'], 16))
+                for block, result in zip(ordered, results) if result}
+
+    async def step(self) -> int:
+        """Index the next range of confirmed blocks; returns the number of transfers stored."""
+        started = time.perf_counter()
+        safe_head = await self.rpc.block_number() - self.confirmations
+        last = self.cursor()
+        if last is None:
+            last = safe_head
+        if last >= safe_head:
+            self.metrics['lag'] = 0
+            return 0
+        start, end = last + 1, min(safe_head, last + self.max_blocks)
+
+        logs = await self.rpc.call('eth_getLogs', [{
+            'fromBlock': hex(start),
+            'toBlock': hex(end),
+            'address': list(self.tokens),
+            'topics': [TRANSFER_TOPIC]
+        }]) if self.tokens else []
+        self.load_addresses()
+        rows = self.match(logs)
+        if rows:
+            times = await self.block_times({row['block_number'] for row in rows})
+            for row in rows:
+                row['block_time'] = times.get(row['block_number'])
+
+        db = next(get_db())
+        if rows:
+            db.bulk_insert_mappings(WalletTransfer, rows)
+        cursor = db.get(IndexerCursor, CURSOR_NAME)
+        if cursor is None:
+            db.add(IndexerCursor(name=CURSOR_NAME, block_number=end))
+        else:
+            cursor.block_number = end
+        db.commit()
+
+        self.metrics['blocks'] += end - last
+        self.metrics['logs_scanned'] += len(logs)
+        self.metrics['transfers'] += len(rows)
+        self.metrics['last_block'] = end
+        self.metrics['lag'] = safe_head - end
+        self.metrics['last_step_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return len(rows)
+
+    async def run(self):
+        """Follow the chain until stopped; catches up without sleeping while behind."""
+        self.is_running = True
+        while self.is_running:
+            try:
+                with background_requests():
+                    await self.step()
+            except Exception as e:
+                logger.error(f"Transfer indexing failed: {e}")
+            if self.metrics['lag'] == 0:
+                await asyncio.sleep(self.poll_interval)
+            else:
+                await asyncio.sleep(0)
+
+    def stop(self):
+        self.is_running = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'wallets': len(self.addresses)
+        }
+
+
+def get_history(address: str, limit: int = 10,
+                before: Optional[Tuple[int, int]] = None) -> Tuple[List[WalletTransfer], Optional[Tuple[int, int]]]:
+    """One page of a wallet's transfers, newest first, and the cursor of the next page."""
+    db = next(get_db())
+    query = db.query(WalletTransfer).filter(WalletTransfer.wallet_address == address.lower())
+    if before is not None:
+        block, log_index = before
+        query = query.filter(or_(
+            WalletTransfer.block_number < block,
+            and_(WalletTransfer.block_number == block, WalletTransfer.log_index < log_index)
+        ))
+    rows = query.order_by(
+        WalletTransfer.block_number.desc(), WalletTransfer.log_index.desc()
+    ).limit(limit + 1).all()
+    page = rows[:limit]
+    next_cursor = (page[-1].block_number, page[-1].log_index) if len(rows) > limit else None
+    return page, next_cursor
+
+
+_transfer_indexer: Optional[TransferIndexer] = None
+
+
+def get_transfer_indexer() -> TransferIndexer:
+    """Return the process-wide transfer indexer, creating it on first use."""
+    global _transfer_indexer
+    if _transfer_indexer is None:
+        _transfer_indexer = TransferIndexer(
+            confirmations=Config.TRANSFER_INDEXER_CONFIRMATIONS, max_blocks=Config.TRANSFER_INDEXER_MAX_BLOCKS,
+            poll_interval=Config.TRANSFER_INDEXER_POLL_INTERVAL
+        )
+    return _transfer_indexer
@@ -0,0 +1,164 @@
+"""
+Pool of pre-generated wallets for onboarding.
+
+Encrypting a private key runs a 100k-iteration PBKDF2, far too slow for the
+event loop when many users sign up at once. Worker processes of a
+``ProcessPoolExecutor`` generate and encrypt keypairs in batches ahead of
+time, deriving the encryption key once per batch, and the results are
+stored in ``wallet_pool``. Onboarding claims one row and moves it into
+``wallets`` in a single transaction. The pool is refilled to its target
+whenever it drops below the low-water mark.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth_account import Account
+
+from config import Config
+from database import get_db, Wallet, PooledWallet, encrypt_private_keys
+
+logger = logging.getLogger(__name__)
+
+
+def generate_encrypted_wallets(count: int, secret: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(address, encrypted private key) pairs; runs in a worker process."""
+    accounts = [Account.create() for _ in range(count)]
+    encrypted = encrypt_private_keys([account.key.hex() for account in accounts], secret)
+    return [(account.address, key) for account, key in zip(accounts, encrypted)]
+
+
+class WalletPool:
+    """Keeps pre-encrypted wallets ready and hands them out at onboarding."""
+
+    def __init__(self, target: int = 200, low_water: int = 50, batch_size: int = 25,
+                 workers: int = 2, check_interval: float = 10.0, network: str = 'polygon'):
+        self.target = target
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.workers = workers
+        self.check_interval = check_interval
+        self.network = network
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.level = 0
+        self.is_running = False
+        self.metrics = {
+            'generated': 0,
+            'claimed': 0,
+            'misses': 0,
+            'refills': 0,
+            'refill_rate': 0.0,  # Wallets per second over the last refill
+            'last_refill_ms': 0.0
+        }
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    def count(self) -> int:
+        """Refresh the pool level from the database."""
+        db = next(get_db())
+        self.level = db.query(PooledWallet).filter(PooledWallet.network == self.network).count()
+        return self.level
+
+    def claim(self, user_id: int) -> Optional[Wallet]:
+        """Move one pooled wallet to the user; None when the pool is empty."""
+        db = next(get_db())
+        while True:
+            pooled = db.query(PooledWallet).filter(
+                PooledWallet.network == self.network
+            ).order_by(PooledWallet.id).first()
+            if pooled is None:
+                self.metrics['misses'] += 1
+                return None
+            # Another claimer may have taken the same row first
+            if db.query(PooledWallet).filter(PooledWallet.id == pooled.id).delete() == 1:
+                break
+            db.rollback()
+
+        wallet = Wallet(
+            user_id=user_id,
+            address=pooled.address,
+            encrypted_private_key=pooled.encrypted_private_key,
+            network=self.network
+        )
+        db.add(wallet)
+        db.commit()
+        db.refresh(wallet)
+        self.level = max(0, self.level - 1)
+        self.metrics['claimed'] += 1
+        return wallet
+
+    async def generate(self, count: int) -> List[Tuple[str, str]]:
+        """Generate ``count`` encrypted wallets in the worker processes."""
+        loop = asyncio.get_running_loop()
+        batches = [min(self.batch_size, count - start) for start in range(0, count, self.batch_size)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor(), generate_encrypted_wallets, size, Config.ENCRYPTION_KEY)
+            for size in batches
+        ))
+        return [wallet for batch in results for wallet in batch]
+
+    async def refill(self) -> int:
+        """Top the pool up to its target; returns the number of wallets added."""
+        missing = self.target - self.count()
+        if missing <= 0:
+            return 0
+        started = time.perf_counter()
+        wallets = await self.generate(missing)
+
+        db = next(get_db())
+        db.bulk_insert_mappings(PooledWallet, [
+            {'address': address, 'encrypted_private_key': key, 'network': self.network}
+            for address, key in wallets
+        ])
+        db.commit()
+        elapsed = time.perf_counter() - started
+        self.level += len(wallets)
+        self.metrics['generated'] += len(wallets)
+        self.metrics['refills'] += 1
+        self.metrics['refill_rate'] = round(len(wallets) / elapsed, 2) if elapsed > 0 else 0.0
+        self.metrics['last_refill_ms'] = round(elapsed * 1000, 2)
+        return len(wallets)
+
+    async def run(self):
+        """Keep the pool above its low-water mark until stopped."""
+        self.is_running = True
+        while self.is_running:
+            try:
+                if self.count() < self.low_water:
+                    await self.refill()
+            except Exception as e:
+                logger.error(f"Wallet pool refill failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def stop(self):
+        self.is_running = False
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'level': self.level,
+            'target': self.target
+        }
+
+
+_wallet_pool: Optional[WalletPool] = None
+
+
+def get_wallet_pool() -> WalletPool:
+    """Return the process-wide wallet pool, creating it on first use."""
+    global _wallet_pool
+    if _wallet_pool is None:
+        _wallet_pool = WalletPool(
+            Config.WALLET_POOL_TARGET, Config.WALLET_POOL_LOW_WATER, Config.WALLET_POOL_BATCH_SIZE,
+            Config.WALLET_POOL_WORKERS, Config.WALLET_POOL_CHECK_INTERVAL
+        )
+    return _wallet_pool
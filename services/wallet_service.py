@@ -1,11 +1,17 @@
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from eth_account import Account
 from web3 import Web3
 from database import get_db, User, Wallet
 from database.encryption import encrypt_private_key, decrypt_private_key
 from apis import LifiBridgeAPI
+from services.wallet_pool import get_wallet_pool
+from services.balances import get_balance_service
+from services.transfer_indexer import get_history
+import logging
 import secrets
 
+logger = logging.getLogger(__name__)
+
 class WalletService:
     """Service for wallet management and operations."""
     
@@ -22,9 +28,15 @@ class WalletService:
     
     def create_wallet_for_user(self, user_id: int, network: str = 'polygon') -> Optional[Wallet]:
         """Create a new wallet for a user."""
+        pool = get_wallet_pool()
+        if network == pool.network:
+            wallet = pool.claim(user_id)
+            if wallet:
+                return wallet
+        
         db = next(get_db())
         
-        # Generate new wallet
+        # Generate new wallet; blocks on key encryption
         wallet_data = self.generate_wallet()
         
         # Encrypt private key
@@ -43,20 +55,39 @@ class WalletService:
         
         return wallet
     
+    async def provision_wallet(self, user_id: int) -> Optional[Wallet]:
+        """Give a new user a wallet without blocking the event loop."""
+        pool = get_wallet_pool()
+        try:
+            wallet = pool.claim(user_id)
+            if wallet:
+                return wallet
+            
+            # Pool ran dry; generate this one in a worker process too
+            (address, encrypted_private_key), = await pool.generate(1)
+            db = next(get_db())
+            wallet = Wallet(
+                user_id=user_id,
+                address=address,
+                encrypted_private_key=encrypted_private_key,
+                network=pool.network
+            )
+            db.add(wallet)
+            db.commit()
+            db.refresh(wallet)
+            return wallet
+        except Exception as e:
+            logger.error(f"Wallet provisioning failed for user {user_id}: {e}")
+            return None
+    
     def get_user_wallet(self, user_id: int) -> Optional[Wallet]:
         """Get user's active wallet."""
         db = next(get_db())
         return db.query(Wallet).filter(Wallet.user_id == user_id, Wallet.is_active == True).first()
     
-    def get_wallet_balance(self, wallet_address: str, token_address: str = None) -> Dict[str, float]:
+    async def get_wallet_balance(self, wallet_address: str) -> Dict[str, float]:
         """Get wallet balance for different tokens."""
-        # In a real implementation, this would connect to the blockchain
-        # For now, return mock data
-        return {
-            'POL': 1000.0,
-            'USDC': 500.0,
-            'ETH': 0.5
-        }
+        return await get_balance_service().get_balance(wallet_address)
     
     def send_tokens(self, from_wallet: Wallet, to_address: str, amount: float, token: str) -> Dict:
         """Send tokens from user's wallet."""
@@ -98,30 +129,23 @@ class WalletService:
                 'error': str(e)
             }
     
-    def get_transaction_history(self, wallet_address: str) -> List[Dict]:
-        """Get transaction history for a wallet."""
-        # In a real implementation, this would fetch from blockchain
-        # For now, return mock data
+    def get_transaction_history(self, wallet_address: str, limit: int = 10,
+                                before: Optional[Tuple[int, int]] = None) -> Tuple[List[Dict], Optional[Tuple[int, int]]]:
+        """Get one page of indexed token transfers and the cursor of the next page."""
+        transfers, next_cursor = get_history(wallet_address, limit, before)
         return [
             {
-                'hash': '0x' + secrets.token_hex(32),
-                'type': 'send',
-                'amount': 100.0,
-                'token': 'POL',
-                'to': '0x742d35Cc6634C0532925a3b8D4C9db96C4b4d8b6',
-                'timestamp': '2024-01-15T10:30:00Z',
-                'status': 'confirmed'
-            },
-            {
-                'hash': '0x' + secrets.token_hex(32),
-                'type': 'receive',
-                'amount': 50.0,
-                'token': 'USDC',
-                'from': '0x8ba1f109551bD432803012645Hac136c',
-                'timestamp': '2024-01-15T09:15:00Z',
+                'hash': transfer.tx_hash,
+                'type': 'send' if transfer.direction == 'out' else 'receive',
+                'amount': transfer.amount,
+                'token': transfer.token,
+                'to' if transfer.direction == 'out' else 'from': transfer.counterparty,
+                'timestamp': transfer.block_time.isoformat() + 'Z' if transfer.block_time else None,
+                'block': transfer.block_number,
                 'status': 'confirmed'
             }
-        ]
+            for transfer in transfers
+        ], next_cursor
     
     def validate_address(self, address: str) -> bool:
         """Validate if an address is a valid Ethereum address."""
@@ -8,14 +8,14 @@ import os
 import sys
 import asyncio
 import logging
-import threading
 from pathlib import Path
-from flask import Flask, jsonify
 
 # Add project root to Python path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
+from runtime import BotRuntime
+
 # Load environment variables
 def load_env_file(env_file):
     """Load environment variables from a file."""
@@ -37,24 +37,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create Flask app for health check
-app = Flask(__name__)
-
-@app.route('/health')
 def health_check():
     """Health check endpoint for Railway/Heroku."""
-    return jsonify({
+    return {
         'status': 'healthy',
         'service': 'polyfocus-bot',
         'version': '1.0.0',
         'bot': '@Polymarketsolanabot',
         'message': 'Bot is running successfully!'
-    })
+    }
 
-@app.route('/')
 def root():
     """Root endpoint."""
-    return jsonify({
+    return {
         'message': 'PolyFocus Bot API',
         'version': '1.0.0',
         'status': 'running',
@@ -64,10 +59,10 @@ def root():
             'health': '/health',
             'bot': 'https://t.me/Polymarketsolanabot'
         }
-    })
+    }
 
-async def run_telegram_bot():
-    """Run the Telegram bot."""
+def build_telegram_application():
+    """Build the Telegram bot application."""
     try:
         # Import telegram bot
         from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
@@ -185,27 +180,29 @@ Start trading by sending any market search term!
         application.add_handler(CallbackQueryHandler(handle_callback))
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
         
-        # Start the bot
-        logger.info("Telegram bot starting...")
-        await application.run_polling()
+        return application
         
     except Exception as e:
         logger.error(f"Telegram bot error: {e}")
         raise
 
-def run_bot():
-    """Run the bot in a separate thread."""
-    def run_telegram():
-        try:
-            asyncio.run(run_telegram_bot())
-        except Exception as e:
-            logger.error(f"Bot thread error: {e}")
+async def run_services():
+    """Run the Telegram bot and health server on one event loop."""
+    runtime = BotRuntime()
+    
+    # Get port from environment
+    port = int(os.getenv('PORT', 8000))
+    
+    # Serve health checks first so the platform sees the service come up
+    logger.info(f"Starting web server on port {port}")
+    runtime.add_health_server('0.0.0.0', port, {'/health': health_check, '/': root})
     
-    bot_thread = threading.Thread(target=run_telegram)
-    bot_thread.daemon = True
-    bot_thread.start()
+    application = build_telegram_application()
+    if application:
+        logger.info("Telegram bot starting...")
+        runtime.add_application(application)
     
-    return bot_thread
+    await runtime.run()
 
 if __name__ == '__main__':
     print("🚀 Starting PolyFocus Bot...")
@@ -214,20 +211,9 @@ if __name__ == '__main__':
     print("🔗 Link: https://t.me/Polymarketsolanabot")
     print("=" * 40)
     
-    # Start the Telegram bot in background
-    try:
-        bot_thread = run_bot()
-        logger.info("Bot thread started successfully")
-    except Exception as e:
-        logger.error(f"Failed to start bot thread: {e}")
-    
-    # Get port from environment
-    port = int(os.getenv('PORT', 8000))
-    
-    # Run Flask app for health check
-    logger.info(f"Starting web server on port {port}")
+    # Run the Telegram bot and health server together
     try:
-        app.run(host='0.0.0.0', port=port, debug=False)
+        asyncio.run(run_services())
     except Exception as e:
-        logger.error(f"Failed to start web server: {e}")
+        logger.error(f"Failed to start services: {e}")
         sys.exit(1)
@@ -0,0 +1,100 @@
+"""
+Tests for multicall balance reads
+"""
+
+import os
+import pytest
+from eth_abi import decode, encode
+from web3 import Web3
+from apis.polygon_rpc import PolygonRPC
+from services.balances import BalanceService, encode_balance_calls, decode_balance_results
+
+MULTICALL = '0xcA11bde05977b3631167028862bE2a173976CA11'
+USDC = '0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174'
+TOKENS = {'POL': (None, 18), 'USDC': (USDC, 6)}
+WALLETS = [Web3.to_checksum_address('0x' + f'{i:040x}') for i in range(1, 4)]
+
+class FakeNode:
+    """Answers aggregate3 eth_calls; balance is the wallet number, in token units."""
+    
+    def __init__(self):
+        self.block = 100
+        self.batches = []
+    
+    async def block_number(self):
+        return self.block
+    
+    async def batch(self, calls):
+        self.batches.append(calls)
+        results = []
+        for method, (tx, block) in calls:
+            assert method == 'eth_call' and tx['to'] == MULTICALL and block == hex(self.block)
+            inner = decode(['(address,bool,bytes)[]'], bytes.fromhex(tx['data'][10:]))[0]
+            answers = []
+            for target, _, data in inner:
+                wallet = int.from_bytes(data[4:], 'big')
+                if data[:4].hex() == '4d2301cc':
+                    answers.append((True, encode(['uint256'], [wallet * 10 ** 18])))
+                elif target == USDC.lower():
+                    answers.append((True, encode(['uint256'], [wallet * 10 ** 6])))
+                else:
+                    answers.append((False, b''))
+            results.append('0x' + encode(['(bool,bytes)[]'], [answers]).hex())
+        return results
+
+class TestBalanceService:
+    """Test batching and per-block caching."""
+    
+    def test_calldata_round_trip(self):
+        """Encoded calls target the multicall for native and the token for ERC-20 reads."""
+        data = encode_balance_calls(MULTICALL, [(WALLETS[0], None), (WALLETS[0], USDC)])
+        assert data.startswith('0x82ad56cb')
+        calls = decode(['(address,bool,bytes)[]'], bytes.fromhex(data[10:]))[0]
+        assert [call[0] for call in calls] == [MULTICALL.lower(), USDC.lower()]
+        result = '0x' + encode(['(bool,bytes)[]'], [[(True, encode(['uint256'], [7])), (False, b'')]]).hex()
+        assert decode_balance_results(result) == [7, None]
+    
+    @pytest.mark.asyncio
+    async def test_many_wallets_cost_one_batch_per_block(self):
+        """Reads are chunked into multicalls sent in one batch and cached until the next block."""
+        node = FakeNode()
+        service = BalanceService(rpc=node, tokens=TOKENS, multicall=MULTICALL, multicall_size=4, block_ttl=0)
+        
+        balances = await service.get_balances(WALLETS)
+        assert balances[WALLETS[2]] == {'POL': 3.0, 'USDC': 3.0}
+        assert len(node.batches) == 1 and len(node.batches[0]) == 2
+        
+        await service.get_balances(WALLETS[:2])
+        assert len(node.batches) == 1
+        assert service.get_metrics()['cache_hits'] == 2
+        
+        node.block = 101
+        await service.get_balances(WALLETS[:1])
+        assert len(node.batches) == 2 and len(node.batches[1][0][1][0]['data']) < len(node.batches[0][0][1][0]['data'])
+    
+    @pytest.mark.asyncio
+    async def test_failed_reads_fall_back(self):
+        """A failing token read counts as zero and an RPC outage serves the last known balances."""
+        node = FakeNode()
+        service = BalanceService(rpc=node, tokens={**TOKENS, 'BAD': ('0x' + '11' * 20, 18)},
+                                 multicall=MULTICALL, block_ttl=0)
+        assert (await service.get_balance(WALLETS[0]))['BAD'] == 0.0
+        assert service.get_metrics()['failed_calls'] == 1
+        
+        async def down():
+            raise ConnectionError('node down')
+        node.block_number = down
+        assert (await service.get_balance(WALLETS[0]))['POL'] == 1.0
+
+@pytest.mark.skipif(not os.getenv('ANVIL_RPC_URL'),
+                    reason="set ANVIL_RPC_URL to a dev node with Multicall3, e.g. anvil --fork-url <polygon rpc>")
+class TestDevChain:
+    """Read balances from a local anvil or hardhat node."""
+    
+    @pytest.mark.asyncio
+    async def test_reads_prefunded_account(self):
+        """The first dev account is funded with 10000 of the native coin."""
+        rpc = PolygonRPC(os.getenv('ANVIL_RPC_URL'))
+        service = BalanceService(rpc=rpc, tokens={'POL': (None, 18)}, multicall=MULTICALL)
+        account = '0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266'
+        assert (await service.get_balances([account]))[account]['POL'] >= 1000
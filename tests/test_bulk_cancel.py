@@ -0,0 +1,104 @@
+"""
+Tests for bulk cancellation and cancel-on-disconnect
+"""
+
+import pytest
+import asyncio
+import time
+import uuid
+from unittest.mock import AsyncMock
+from database import init_db, get_db, User, Trade
+from apis.resilience import get_upstream
+from services.trading_service import TradingService
+from services.cancel_guard import StaleFeedGuard
+
+def create_orders(specs):
+    db = next(get_db())
+    user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+    db.add(user)
+    db.flush()
+    for market_id, side in specs:
+        db.add(Trade(user_id=user.id, market_id=market_id, outcome='YES', side=side, order_type='LIMIT',
+                     shares=1.0, price=0.5, total_amount=0.5, status='pending',
+                     order_id=f'o-{uuid.uuid4().hex[:8]}'))
+    db.commit()
+    return user.id
+
+def statuses(user_id):
+    db = next(get_db())
+    return sorted((trade.market_id, trade.side, trade.status)
+                  for trade in db.query(Trade).filter(Trade.user_id == user_id))
+
+class TestBulkCancel:
+    """Test filtered, concurrent cancellation."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        init_db()
+    
+    @pytest.mark.asyncio
+    async def test_cancel_by_market_and_side(self):
+        """Only matching resting orders are cancelled."""
+        user_id = create_orders([('a', 'BUY'), ('a', 'SELL'), ('b', 'BUY')])
+        service = TradingService()
+        service.gamma_api = AsyncMock()
+        
+        result = await service.cancel_orders(user_id, market_id='a', side='buy')
+        assert (result['cancelled'], result['failed']) == (1, 0)
+        assert statuses(user_id) == [('a', 'BUY', 'cancelled'), ('a', 'SELL', 'pending'), ('b', 'BUY', 'pending')]
+        
+        result = await service.cancel_orders(user_id)
+        assert result['cancelled'] == 2
+        assert service.gamma_api.cancel_order.await_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_cancels_run_concurrently_and_failures_stay_open(self):
+        """Upstream cancels overlap, and an order whose cancel failed stays pending."""
+        user_id = create_orders([('a', 'BUY')] * 4)
+        service = TradingService()
+        in_flight = []
+        peak = []
+        failing = []
+        
+        async def cancel(order_id):
+            if not failing:
+                failing.append(order_id)
+            in_flight.append(order_id)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(order_id)
+            if order_id == failing[0]:
+                raise RuntimeError('upstream down')
+        
+        service.gamma_api = AsyncMock()
+        service.gamma_api.cancel_order.side_effect = cancel
+        result = await service.cancel_orders(user_id)
+        assert max(peak) == 4
+        assert (result['cancelled'], result['failed'], result['success']) == (3, 1, False)
+        assert [status for _, _, status in statuses(user_id)].count('pending') == 1
+
+class TestStaleFeedGuard:
+    """Test cancel-on-disconnect."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        init_db()
+    
+    @pytest.mark.asyncio
+    async def test_trips_once_per_stale_episode(self):
+        """A feed failing past the window cancels resting orders once, then re-arms on recovery."""
+        user_id = create_orders([('a', 'BUY')])
+        feed = get_upstream(f'feed-{uuid.uuid4().hex[:6]}')
+        guard = StaleFeedGuard(window=30, feeds=[feed.name])
+        guard.trading_service.gamma_api = AsyncMock()
+        
+        assert await guard.check() == 0
+        feed.last_success = time.monotonic() - 60
+        feed.last_failure = time.monotonic()
+        assert await guard.check() >= 1
+        assert statuses(user_id) == [('a', 'BUY', 'cancelled')]
+        assert await guard.check() == 0
+        
+        feed.last_success = time.monotonic()
+        assert await guard.check() == 0
+        assert not guard.tripped and guard.get_metrics()['trips'] == 1
@@ -0,0 +1,102 @@
+"""
+Tests for stop-loss / take-profit conditional orders
+"""
+
+import pytest
+import uuid
+from unittest.mock import AsyncMock
+from database import init_db, get_db, User, Position, ConditionalOrder
+from services.conditional_orders import ConditionalOrderEngine, exit_order_key
+
+def create_position(shares=10.0):
+    db = next(get_db())
+    user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+    db.add(user)
+    db.flush()
+    position = Position(user_id=user.id, market_id=f'm-{uuid.uuid4().hex[:8]}', outcome='YES',
+                        shares=shares, average_price=0.5)
+    db.add(position)
+    db.commit()
+    return user.id, position.id, position.market_id
+
+class TestEvaluation:
+    """Test in-memory evaluation of armed triggers."""
+    
+    def test_first_trigger_cancels_siblings(self):
+        """When the stop-loss fires, the take-profit on the same position is cancelled."""
+        engine = ConditionalOrderEngine()
+        engine._track(1, 10, 'm', 'YES', 'stop_loss', 0.4)
+        engine._track(2, 10, 'm', 'YES', 'take_profit', 0.8)
+        engine._track(3, 11, 'm', 'YES', 'take_profit', 0.6)
+        
+        assert engine.evaluate([('m', 'YES', 0.5)]) == ([], [])
+        assert engine.evaluate([('m', 'YES', 0.35)]) == ([(1, 0.35)], [2])
+        assert engine.evaluate([('m', 'YES', 0.9)]) == ([(3, 0.9)], [])
+        assert engine.triggers == {} and engine.books == {}
+    
+    def test_batch_of_ticks_across_markets(self):
+        """One evaluation pass handles every market's tick."""
+        engine = ConditionalOrderEngine()
+        for i in range(1000):
+            engine._track(i, i, f'm{i % 100}', 'YES', 'stop_loss', 0.3 + (i % 2) * 0.2)
+        fired, _ = engine.evaluate((f'm{j}', 'YES', 0.4) for j in range(100))
+        assert len(fired) == 500
+        assert engine.get_metrics()['armed'] == 500
+
+class TestConditionalOrderEngine:
+    """Test arming, persistence and exit submission."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        init_db()
+    
+    @pytest.mark.asyncio
+    async def test_fired_trigger_submits_exit(self):
+        """A fired stop-loss places an idempotent marketable sell and is marked submitted."""
+        user_id, position_id, market = create_position()
+        engine = ConditionalOrderEngine(slippage=0.05)
+        engine.trading_service = AsyncMock()
+        engine.trading_service.place_limit_order.return_value = {'success': True}
+        sl = engine.arm(user_id, position_id, 'sl', 0.4)['trigger_id']
+        tp = engine.arm(user_id, position_id, 'tp', 0.8)['trigger_id']
+        engine.clob_api = AsyncMock()
+        engine.clob_api.get_market_prices.return_value = {'yes_price': 0.38, 'no_price': 0.62}
+        
+        await engine.poll_once()
+        call = engine.trading_service.place_limit_order.await_args
+        assert call.args == (user_id, market, 'YES', 'SELL', 10.0, 0.36)
+        assert call.kwargs['idempotency_key'] == exit_order_key(sl)
+        
+        db = next(get_db())
+        assert db.get(ConditionalOrder, sl).status == 'submitted'
+        assert db.get(ConditionalOrder, tp).status == 'cancelled'
+    
+    @pytest.mark.asyncio
+    async def test_closed_position_fails_exit(self):
+        """An exit for a position that no longer has shares is not submitted."""
+        user_id, position_id, _ = create_position()
+        engine = ConditionalOrderEngine()
+        engine.trading_service = AsyncMock()
+        trigger = engine.arm(user_id, position_id, 'tp', 0.7)['trigger_id']
+        db = next(get_db())
+        db.get(Position, position_id).shares = 0
+        db.commit()
+        
+        await engine.submit([(trigger, 0.75)])
+        engine.trading_service.place_limit_order.assert_not_awaited()
+        assert db.get(ConditionalOrder, trigger).status == 'failed'
+    
+    def test_arm_validation_and_reload(self):
+        """Triggers need an owned position, a known kind and a valid price; armed ones reload."""
+        user_id, position_id, _ = create_position()
+        engine = ConditionalOrderEngine()
+        assert not engine.arm(user_id, position_id, 'trailing', 0.5)['success']
+        assert not engine.arm(user_id, position_id, 'sl', 1.2)['success']
+        assert not engine.arm(user_id + 1, position_id, 'sl', 0.5)['success']
+        trigger = engine.arm(user_id, position_id, 'sl', 0.5)['trigger_id']
+        
+        restarted = ConditionalOrderEngine()
+        restarted.load()
+        assert restarted.triggers[trigger] == position_id
+        assert engine.cancel(user_id, trigger)['success']
+        assert trigger not in engine.triggers
@@ -0,0 +1,120 @@
+"""
+Tests for the copy-trading engine
+"""
+
+import pytest
+import time
+import uuid
+from unittest.mock import AsyncMock
+from database import init_db, get_db, User, Wallet, CopyTradingSettings
+from services.copy_trading import CopyTradingEngine, FollowerBook, allocate, copy_order_key
+from services.risk import RiskBook
+
+def settings(**kwargs):
+    values = dict(copy_percentage=1.0, max_position_size=100.0, max_daily_volume=1000.0, min_confidence=0.0)
+    values.update(kwargs)
+    return CopyTradingSettings(**values)
+
+class TestAllocation:
+    """Test follower sizing against per-follower limits."""
+    
+    def test_limits_applied_per_follower(self):
+        """Copy percentage, position room, daily volume and confidence all cap allocations."""
+        book = FollowerBook()
+        book.add(1, settings(copy_percentage=0.5))
+        book.add(2, settings(max_position_size=30.0))
+        book.add(3, settings(max_daily_volume=10.0))
+        book.add(4, settings(min_confidence=0.9))
+        risk = RiskBook()
+        risk.record('o1', 2, 'm', 'BUY', 20.0)
+        
+        allocations = dict(allocate(book, risk, 'm', 'BUY', 50.0, confidence=0.8, min_notional=1.0))
+        assert allocations == {1: 25.0, 2: 10.0, 3: 10.0}
+    
+    def test_sells_only_unwind_held_exposure(self):
+        """A follower without exposure in the market does not sell."""
+        book = FollowerBook()
+        book.add(1, settings())
+        book.add(2, settings())
+        risk = RiskBook()
+        risk.record('o1', 1, 'm', 'BUY', 15.0)
+        assert allocate(book, risk, 'm', 'SELL', 50.0, 1.0, 1.0) == [(1, 15.0)]
+
+class TestCopyTradingEngine:
+    """Test leader polling and batched follower submission."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        init_db()
+    
+    @pytest.mark.asyncio
+    async def test_first_poll_is_baseline(self):
+        """Trades present on the first poll are not copied; later ones are."""
+        engine = CopyTradingEngine()
+        engine.data_api = AsyncMock()
+        engine.data_api.get_user_trades.return_value = [{'id': 't1'}]
+        assert await engine.poll_leader('0xleader') == []
+        engine.data_api.get_user_trades.return_value = [{'id': 't2'}, {'id': 't1'}]
+        assert await engine.poll_leader('0xleader') == [{'id': 't2'}]
+    
+    @pytest.mark.asyncio
+    async def test_fan_out_in_batches(self):
+        """Each follower gets one idempotent order and the event latency is recorded."""
+        engine = CopyTradingEngine(batch_size=2)
+        engine.risk = RiskBook()
+        engine.trading_service = AsyncMock()
+        engine.trading_service.place_limit_order.return_value = {'success': True}
+        book = FollowerBook()
+        for user_id in range(1, 6):
+            book.add(user_id, settings())
+        engine.books['0xleader'] = book
+        
+        trade = {'id': 't9', 'market_id': 'm', 'outcome': 'YES', 'side': 'buy', 'price': 0.5, 'shares': 20}
+        event = await engine.handle_trade('0xleader', trade, time.perf_counter())
+        
+        calls = engine.trading_service.place_limit_order.await_args_list
+        assert event['orders'] == 5
+        assert [call.kwargs['idempotency_key'] for call in calls] == [
+            copy_order_key('0xleader', 't9', user_id) for user_id in range(1, 6)
+        ]
+        assert calls[0].args[4] == 20.0
+        assert engine.risk.daily_volume(1) == 10.0
+        assert engine.get_metrics()['max_latency_ms'] >= event['first_submit_ms'] > 0
+    
+    @pytest.mark.asyncio
+    async def test_rejected_orders_release_limits(self):
+        """Reserved room is returned when a follower order fails."""
+        engine = CopyTradingEngine()
+        engine.risk = RiskBook()
+        engine.trading_service = AsyncMock()
+        engine.trading_service.place_limit_order.return_value = {'success': False, 'error': 'no funds'}
+        book = FollowerBook()
+        book.add(1, settings())
+        engine.books['0xleader'] = book
+        
+        trade = {'id': 't1', 'market_id': 'm', 'outcome': 'YES', 'side': 'BUY', 'price': 0.5, 'shares': 20}
+        await engine.handle_trade('0xleader', trade, time.perf_counter())
+        assert engine.risk.daily_volume(1) == 0.0
+        assert engine.risk.position(1, 'm') == 0.0
+        assert engine.metrics['rejected_orders'] == 1
+    
+    def test_load_followers(self):
+        """Enabled followers with an active wallet are loaded into their leader's book."""
+        db = next(get_db())
+        user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+        db.add(user)
+        db.flush()
+        db.add(Wallet(user_id=user.id, address='0x' + '1' * 40, encrypted_private_key='unused'))
+        db.add(CopyTradingSettings(user_id=user.id, is_enabled=True, copy_percentage=0.25))
+        db.commit()
+        leader = '0x' + uuid.uuid4().hex
+        
+        engine = CopyTradingEngine()
+        engine.follow_leader(user.id, leader)
+        engine.load_followers()
+        assert list(engine.books[leader].user_ids) == [user.id]
+        assert engine.books[leader].copy_percentage[0] == 0.25
+        
+        engine.unfollow_leader(user.id, leader)
+        engine.load_followers()
+        assert leader not in engine.books
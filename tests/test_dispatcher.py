@@ -0,0 +1,79 @@
+"""
+Tests for concurrent update processing with per-user ordering
+"""
+
+import pytest
+import asyncio
+from telegram import Update
+from bot.dispatcher import OrderedUpdateProcessor
+
+def make_update(update_id, user_id, chat_id=None):
+    """Build a text message update from a user."""
+    return Update.de_json({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'text': 'hi',
+            'chat': {'id': chat_id or user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Test'}
+        }
+    }, None)
+
+class TestOrderedUpdateProcessor:
+    """Test ordering, parallelism and backpressure."""
+    
+    @pytest.mark.asyncio
+    async def test_same_user_is_ordered_other_users_run_in_parallel(self):
+        """A slow update delays only later updates from the same user."""
+        processor = OrderedUpdateProcessor(max_concurrent_updates=10)
+        events = []
+        
+        async def work(name, delay):
+            events.append(f'start:{name}')
+            await asyncio.sleep(delay)
+            events.append(f'end:{name}')
+        
+        await asyncio.gather(
+            processor.process_update(make_update(1, 1), work('a1', 0.05)),
+            processor.process_update(make_update(2, 1), work('a2', 0)),
+            processor.process_update(make_update(3, 2), work('b1', 0))
+        )
+        
+        assert events.index('end:a1') < events.index('start:a2')
+        assert events.index('end:b1') < events.index('end:a1')
+        assert processor.get_metrics()['processed'] == 3
+    
+    @pytest.mark.asyncio
+    async def test_global_limit(self):
+        """No more than the global limit of updates run at once."""
+        processor = OrderedUpdateProcessor(max_concurrent_updates=2)
+        peak = 0
+        
+        async def work():
+            nonlocal peak
+            peak = max(peak, processor.running)
+            await asyncio.sleep(0.01)
+        
+        await asyncio.gather(*[
+            processor.process_update(make_update(i, i), work()) for i in range(1, 7)
+        ])
+        
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_per_user_backlog_is_capped(self):
+        """Updates beyond a user's pending cap are dropped and counted."""
+        processor = OrderedUpdateProcessor(max_concurrent_updates=10, max_pending_per_user=2)
+        ran = []
+        
+        async def work(i):
+            ran.append(i)
+            await asyncio.sleep(0.01)
+        
+        await asyncio.gather(*[
+            processor.process_update(make_update(i, 1), work(i)) for i in range(1, 5)
+        ])
+        
+        assert ran == [1, 2]
+        assert processor.get_metrics()['dropped'] == 2
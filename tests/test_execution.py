@@ -0,0 +1,148 @@
+"""
+Tests for sliced order execution
+"""
+
+import pytest
+import uuid
+from unittest.mock import AsyncMock
+from database import init_db, get_db, User, Trade, ExecutionOrder, ExecutionSlice
+from services.execution import ExecutionScheduler, slice_order_key, slippage_bps
+from services.order_router import book_levels
+
+ORDERBOOK = {
+    'bids': [{'price': 0.48, 'size': 100}, {'price': 0.47, 'size': 300}],
+    'asks': [{'price': 0.52, 'size': 50}, {'price': 0.50, 'size': 40}, {'price': 0.55, 'size': 500}]
+}
+
+def create_user():
+    db = next(get_db())
+    user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+    db.add(user)
+    db.commit()
+    return user.id
+
+def make_scheduler():
+    scheduler = ExecutionScheduler(min_slice_shares=1.0)
+    scheduler.clob_api = AsyncMock()
+    scheduler.clob_api.get_orderbook.return_value = ORDERBOOK
+    scheduler.trading_service = AsyncMock()
+    
+    async def place(user_id, market_id, outcome, side, shares, price, idempotency_key, wait_timeout):
+        db = next(get_db())
+        trade = Trade(user_id=user_id, market_id=market_id, outcome=outcome, side=side, order_type='LIMIT',
+                      shares=shares, price=price, total_amount=shares * price, status='pending')
+        db.add(trade)
+        db.commit()
+        return {'success': True, 'trade_id': trade.id}
+    
+    scheduler.trading_service.place_limit_order.side_effect = place
+    return scheduler
+
+def fill_all(parent_id):
+    db = next(get_db())
+    trade_ids = [row.trade_id for row in db.query(ExecutionSlice).filter(ExecutionSlice.parent_id == parent_id)]
+    db.query(Trade).filter(Trade.id.in_(trade_ids)).update({'status': 'filled'})
+    db.commit()
+
+class TestHelpers:
+    """Test book parsing and slippage."""
+    
+    def test_book_levels_best_first(self):
+        """Asks sort ascending for buyers, bids descending for sellers."""
+        assert book_levels(ORDERBOOK, 'BUY')[0] == (0.50, 40.0)
+        assert book_levels(ORDERBOOK, 'SELL')[0] == (0.48, 100.0)
+        assert book_levels({'asks': [[0.6, 5]]}, 'BUY') == [(0.6, 5.0)]
+    
+    def test_slippage_sign(self):
+        """Paying up on a buy or selling lower is positive slippage."""
+        assert slippage_bps('BUY', 0.5, 0.51) == pytest.approx(200)
+        assert slippage_bps('SELL', 0.5, 0.51) == pytest.approx(-200)
+
+class TestExecutionScheduler:
+    """Test slicing, persistence and progress."""
+    
+    def setup_method(self):
+        """Set up test environment; executions left by other tests would be ticked too."""
+        init_db()
+        db = next(get_db())
+        db.query(ExecutionOrder).filter(ExecutionOrder.status == 'active').update({'status': 'cancelled'})
+        db.commit()
+    
+    @pytest.mark.asyncio
+    async def test_twap_slices_and_reports_slippage(self):
+        """TWAP sends one capped slice per interval and reports fills against the arrival mid."""
+        scheduler = make_scheduler()
+        user_id = create_user()
+        result = await scheduler.submit(user_id, 'm', 'yes', 'buy', 100, 'twap', limit_price=0.51,
+                                        duration=0, slices=4)
+        parent_id = result['execution_id']
+        
+        await scheduler.tick()
+        call = scheduler.trading_service.place_limit_order.await_args
+        assert call.args[4:] == (25.0, 0.5)
+        assert call.kwargs['idempotency_key'] == slice_order_key(parent_id, 1)
+        
+        fill_all(parent_id)
+        for _ in range(4):
+            await scheduler.tick()
+            fill_all(parent_id)
+        await scheduler.tick()
+        report = scheduler.report(parent_id)
+        assert report['status'] == 'completed'
+        assert report['filled_shares'] == pytest.approx(100)
+        assert report['slices_sent'] == 4
+        assert report['arrival_price'] == pytest.approx(0.49)
+        assert report['slippage_bps'] == pytest.approx(204.08, abs=0.01)
+    
+    @pytest.mark.asyncio
+    async def test_iceberg_waits_for_resting_slice(self):
+        """Only one iceberg slice rests at a time."""
+        scheduler = make_scheduler()
+        user_id = create_user()
+        parent_id = (await scheduler.submit(user_id, 'm', 'YES', 'SELL', 50, 'iceberg', display=10))['execution_id']
+        
+        await scheduler.tick()
+        await scheduler.tick()
+        assert scheduler.trading_service.place_limit_order.await_count == 1
+        assert scheduler.trading_service.place_limit_order.await_args.args[4:] == (10.0, 0.48)
+        fill_all(parent_id)
+        await scheduler.tick()
+        assert scheduler.trading_service.place_limit_order.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_pov_sizes_from_depth_within_limit(self):
+        """Participation slices are a fraction of the depth inside the limit price."""
+        scheduler = make_scheduler()
+        user_id = create_user()
+        await scheduler.submit(user_id, 'm', 'YES', 'BUY', 500, 'pov', limit_price=0.52, rate=0.5)
+        await scheduler.tick()
+        assert scheduler.trading_service.place_limit_order.await_args.args[4] == 45.0
+    
+    @pytest.mark.asyncio
+    async def test_unsent_slices_resume_after_restart(self):
+        """A slice written but never handed to the pipeline is resent with its key."""
+        scheduler = make_scheduler()
+        user_id = create_user()
+        parent_id = (await scheduler.submit(user_id, 'm', 'YES', 'BUY', 20, 'iceberg', display=5))['execution_id']
+        db = next(get_db())
+        db.get(ExecutionOrder, parent_id).slices_sent = 1
+        db.add(ExecutionSlice(parent_id=parent_id, seq=1, idempotency_key=slice_order_key(parent_id, 1),
+                              shares=5, price=0.5))
+        db.commit()
+        
+        await scheduler.resume()
+        call = scheduler.trading_service.place_limit_order.await_args
+        assert call.kwargs['idempotency_key'] == slice_order_key(parent_id, 1)
+        db.expire_all()
+        assert db.query(ExecutionSlice).filter(ExecutionSlice.parent_id == parent_id).one().trade_id
+    
+    @pytest.mark.asyncio
+    async def test_rejected_slice_fails_parent(self):
+        """A slice rejected before the pipeline stops the parent."""
+        scheduler = make_scheduler()
+        scheduler.trading_service.place_limit_order.side_effect = None
+        scheduler.trading_service.place_limit_order.return_value = {'success': False, 'error': 'no wallet'}
+        parent_id = (await scheduler.submit(create_user(), 'm', 'YES', 'BUY', 20, 'twap'))['execution_id']
+        await scheduler.tick()
+        db = next(get_db())
+        assert db.get(ExecutionOrder, parent_id).status == 'failed'
@@ -0,0 +1,121 @@
+"""
+Tests for the idempotent order submission pipeline
+"""
+
+import pytest
+import asyncio
+import json
+import uuid
+from unittest.mock import AsyncMock
+from database import init_db, get_db, User, Wallet, Trade, OrderOutbox
+from apis.errors import APIStatusError, APITimeoutError
+from services.order_pipeline import OrderPipeline
+from services.trading_service import TradingService
+
+def create_user_with_wallet() -> int:
+    db = next(get_db())
+    user = User(telegram_id=uuid.uuid4().int % 10 ** 12, username='trader')
+    db.add(user)
+    db.flush()
+    db.add(Wallet(user_id=user.id, address='0x' + uuid.uuid4().hex.ljust(40, '0'),
+                  encrypted_private_key='unused'))
+    db.commit()
+    return user.id
+
+class TestOrderPipeline:
+    """Test outbox writes, dedupe, reconciliation and recovery."""
+    
+    def setup_method(self):
+        """Set up a user and a trading service with a private pipeline."""
+        init_db()
+        self.user_id = create_user_with_wallet()
+        self.trading_service = TradingService()
+        self.pipeline = OrderPipeline(concurrency=2, max_attempts=2, dedupe_window=10, reconcile_interval=60)
+        self.pipeline.gamma_api = AsyncMock()
+        self.trading_service.order_pipeline = self.pipeline
+    
+    async def place(self, **kwargs):
+        params = dict(user_id=self.user_id, market_id='m1', outcome='YES', side='BUY', shares=10.0, price=0.6)
+        params.update(kwargs)
+        return await self.trading_service.place_limit_order(**params)
+    
+    @pytest.mark.asyncio
+    async def test_order_written_to_outbox_and_submitted(self):
+        """The outbox row carries the idempotency key upstream and records the order id."""
+        self.pipeline.gamma_api.place_limit_order.return_value = {'order_id': 'o-1'}
+        result = await self.place()
+        
+        assert result['success'] is True
+        assert result['order_id'] == 'o-1'
+        db = next(get_db())
+        outbox = db.query(OrderOutbox).filter(OrderOutbox.trade_id == result['trade_id']).one()
+        assert outbox.status == 'submitted'
+        sent = self.pipeline.gamma_api.place_limit_order.call_args.args[0]
+        assert sent['client_order_id'] == outbox.idempotency_key
+        trade = db.get(Trade, result['trade_id'])
+        assert (trade.status, trade.order_id) == ('pending', 'o-1')
+        await self.pipeline.stop()
+    
+    @pytest.mark.asyncio
+    async def test_repeated_taps_place_one_order(self):
+        """Concurrent identical taps share the first order."""
+        async def slow_place(order):
+            await asyncio.sleep(0.05)
+            return {'order_id': 'o-2'}
+        self.pipeline.gamma_api.place_limit_order.side_effect = slow_place
+        
+        first, second = await asyncio.gather(self.place(), self.place())
+        assert self.pipeline.gamma_api.place_limit_order.await_count == 1
+        assert first['trade_id'] == second['trade_id']
+        assert second['duplicate'] is True
+        assert second['order_id'] == 'o-2'
+        await self.pipeline.stop()
+    
+    @pytest.mark.asyncio
+    async def test_timeout_reconciled_without_resubmitting(self):
+        """An order that timed out but went through is found upstream by its key."""
+        place_mock = self.pipeline.gamma_api.place_limit_order
+        place_mock.side_effect = APITimeoutError('Limit order failed: timed out')
+        
+        async def upstream_orders(address):
+            sent = place_mock.call_args.args[0]
+            return [{'order_id': 'o-3', 'client_order_id': sent['client_order_id']}]
+        self.pipeline.gamma_api.get_user_orders.side_effect = upstream_orders
+        
+        result = await self.place()
+        assert result['order_id'] == 'o-3'
+        assert result['status'] == 'submitted'
+        assert place_mock.await_count == 1
+        await self.pipeline.stop()
+    
+    @pytest.mark.asyncio
+    async def test_rejected_order_fails(self):
+        """A 4xx rejection fails the order and its trade."""
+        self.pipeline.gamma_api.place_limit_order.side_effect = APIStatusError('Limit order failed: bad price', 400)
+        result = await self.place()
+        
+        assert result['success'] is False
+        assert 'bad price' in result['error']
+        assert next(get_db()).get(Trade, result['trade_id']).status == 'failed'
+        await self.pipeline.stop()
+    
+    @pytest.mark.asyncio
+    async def test_recover_submits_queued_orders(self):
+        """Orders still queued from a previous run are submitted on start."""
+        db = next(get_db())
+        trade = Trade(user_id=self.user_id, market_id='m9', outcome='NO', side='SELL', order_type='LIMIT',
+                      shares=1.0, price=0.4, total_amount=0.4, status='queued')
+        db.add(trade)
+        db.flush()
+        key = uuid.uuid4().hex
+        outbox = OrderOutbox(idempotency_key=key, fingerprint='f', user_id=self.user_id, trade_id=trade.id,
+                             order_type='LIMIT', payload=json.dumps({'client_order_id': key}), status='queued')
+        db.add(outbox)
+        db.commit()
+        
+        self.pipeline.gamma_api.place_limit_order.return_value = {'order_id': 'o-9'}
+        self.pipeline.gamma_api.get_user_orders.return_value = []
+        await self.pipeline.start()
+        result = await self.pipeline.wait_for_result(outbox.id, timeout=1)
+        assert result['order_id'] == 'o-9'
+        await self.pipeline.stop()
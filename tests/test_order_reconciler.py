@@ -0,0 +1,65 @@
+"""
+Tests for the batched order status reconciler
+"""
+
+import pytest
+import uuid
+from unittest.mock import AsyncMock
+from database import init_db, get_db, User, Wallet, Trade
+from services.order_reconciler import OrderStatusReconciler
+
+def create_wallet_with_trades(order_ids):
+    db = next(get_db())
+    user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+    db.add(user)
+    db.flush()
+    address = '0x' + uuid.uuid4().hex.ljust(40, '0')
+    db.add(Wallet(user_id=user.id, address=address, encrypted_private_key='unused'))
+    trades = []
+    for order_id in order_ids:
+        trade = Trade(user_id=user.id, market_id='m', outcome='YES', side='BUY', order_type='LIMIT',
+                      shares=1.0, price=0.5, total_amount=0.5, status='pending', order_id=order_id)
+        db.add(trade)
+        trades.append(trade)
+    db.commit()
+    return address, [trade.id for trade in trades]
+
+class TestOrderStatusReconciler:
+    """Test batching per wallet, bulk updates and the adaptive interval."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        init_db()
+    
+    @pytest.mark.asyncio
+    async def test_one_request_per_wallet(self):
+        """Trades are grouped by wallet and updated in bulk."""
+        prefix = uuid.uuid4().hex[:6]
+        first, first_ids = create_wallet_with_trades([f'{prefix}-a', f'{prefix}-b'])
+        second, second_ids = create_wallet_with_trades([f'{prefix}-c'])
+        upstream = {
+            first: [{'order_id': f'{prefix}-a', 'status': 'FILLED', 'filled_at': '2024-01-02T03:04:05Z'},
+                    {'order_id': f'{prefix}-b', 'status': 'open'}],
+            second: [{'id': f'{prefix}-c', 'status': 'cancelled'}]
+        }
+        
+        reconciler = OrderStatusReconciler()
+        reconciler.gamma_api = AsyncMock()
+        reconciler.gamma_api.get_user_orders.side_effect = lambda address: upstream.get(address, [])
+        await reconciler.reconcile_once()
+        
+        polled = [call.args[0] for call in reconciler.gamma_api.get_user_orders.await_args_list]
+        assert polled.count(first) == 1 and polled.count(second) == 1
+        db = next(get_db())
+        filled, still_open = (db.get(Trade, trade_id) for trade_id in first_ids)
+        assert filled.status == 'filled'
+        assert filled.filled_at.isoformat() == '2024-01-02T03:04:05'
+        assert still_open.status == 'pending'
+        assert db.get(Trade, second_ids[0]).status == 'cancelled'
+    
+    def test_interval_adapts_to_open_orders(self):
+        """Many open orders poll at the minimum interval; none idles at the maximum."""
+        reconciler = OrderStatusReconciler(min_interval=5, max_interval=60)
+        assert reconciler.next_interval(0) == 60
+        assert 5 < reconciler.next_interval(4) < 60
+        assert reconciler.next_interval(1000) == 5
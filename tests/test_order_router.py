@@ -0,0 +1,59 @@
+"""
+Tests for depth-aware order planning
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+from services.order_router import plan_order, plan_legs
+from services.trading_service import TradingService
+
+ORDERBOOK = {
+    'bids': [{'price': 0.48, 'size': 100}, {'price': 0.45, 'size': 300}],
+    'asks': [{'price': 0.50, 'size': 40}, {'price': 0.52, 'size': 50}, {'price': 0.60, 'size': 500}]
+}
+
+class TestPlanOrder:
+    """Test candidate scoring against the book."""
+    
+    def test_takes_cheap_depth_and_rests_the_rest(self):
+        """Levels cheaper than resting are taken; levels past the slippage bound never are."""
+        plan = plan_order(ORDERBOOK, 'BUY', 200, max_slippage=0.10, urgency=0.5)
+        assert (plan.take_shares, plan.take_price) == (40, 0.50)
+        assert (plan.rest_shares, plan.rest_price) == (160, 0.49)
+        assert plan.reference_price == pytest.approx(0.49)
+        assert plan_legs(plan) == [('take', 40, 0.50), ('rest', 160, 0.49)]
+    
+    def test_urgency_shifts_the_split(self):
+        """Full urgency takes all depth inside the bound; none rests everything."""
+        urgent = plan_order(ORDERBOOK, 'BUY', 200, max_slippage=0.10, urgency=1.0)
+        assert (urgent.take_shares, urgent.take_price) == (90, 0.52)
+        patient = plan_order(ORDERBOOK, 'BUY', 200, max_slippage=0.10, urgency=0.0)
+        assert patient.take_shares == 0 and patient.rest_shares == 200
+    
+    def test_small_sell_fills_immediately(self):
+        """A sell smaller than the top bid is taken in full."""
+        plan = plan_order(ORDERBOOK, 'SELL', 30, max_slippage=0.05)
+        assert (plan.take_shares, plan.take_price, plan.rest_shares) == (30, 0.48, 0)
+        assert plan.expected_cost_bps == pytest.approx(204.08, abs=0.01)
+    
+    def test_empty_book(self):
+        """Without prices there is no plan."""
+        assert plan_order({'bids': [], 'asks': []}, 'BUY', 10, 0.1) is None
+
+class TestSmartOrder:
+    """Test order placement from a plan."""
+    
+    @pytest.mark.asyncio
+    async def test_places_one_order_per_leg(self):
+        """Each leg becomes a limit order with its own idempotency key."""
+        service = TradingService()
+        service.clob_api = AsyncMock()
+        service.clob_api.get_orderbook.return_value = ORDERBOOK
+        service.place_limit_order = AsyncMock(return_value={'success': True})
+        
+        result = await service.place_smart_order(1, 'm', 'YES', 'BUY', 200, max_slippage=0.10,
+                                                 urgency=0.5, idempotency_key='k')
+        calls = service.place_limit_order.await_args_list
+        assert [call.args[4:] for call in calls] == [(40, 0.50), (160, 0.49)]
+        assert [call.kwargs['idempotency_key'] for call in calls] == ['k-take', 'k-rest']
+        assert result['success'] and result['plan']['take_shares'] == 40
@@ -0,0 +1,97 @@
+"""
+Tests for the price alert engine
+"""
+
+import pytest
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+from database import init_db, get_db, User, PriceAlert
+from services.price_alerts import AlertBook, PriceAlertEngine
+
+def create_user():
+    db = next(get_db())
+    user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+    db.add(user)
+    db.commit()
+    return user.id, user.telegram_id
+
+class TestAlertBook:
+    """Test the per-direction threshold heaps."""
+    
+    def test_only_crossed_thresholds_fire(self):
+        """A tick pops exactly the thresholds it reached, in either direction."""
+        book = AlertBook()
+        book.add(1, 'above', 0.8)
+        book.add(2, 'above', 0.6)
+        book.add(3, 'below', 0.3)
+        book.add(4, 'below', 0.5)
+        assert book.crossed(0.55) == []
+        assert sorted(book.crossed(0.7)) == [2]
+        assert sorted(book.crossed(0.4)) == [4]
+        assert len(book) == 2
+
+class TestPriceAlertEngine:
+    """Test persistence, firing and notification."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        init_db()
+    
+    def test_tick_fires_and_persists(self):
+        """Crossed alerts are deactivated in the database and notified once per user."""
+        user_id, chat_id = create_user()
+        engine = PriceAlertEngine()
+        engine.bind(MagicMock())
+        market = f'm-{uuid.uuid4().hex[:8]}'
+        first = engine.create_alert(user_id, market, 'yes', 'above', 0.8)['alert_id']
+        second = engine.create_alert(user_id, market, 'YES', 'above', 0.7)['alert_id']
+        engine.create_alert(user_id, market, 'YES', 'below', 0.2)
+        
+        assert sorted(engine.on_tick(market, 'YES', 0.85)) == sorted([first, second])
+        assert engine.on_tick(market, 'YES', 0.9) == []
+        engine.send_queue.send_message.assert_called_once()
+        assert engine.send_queue.send_message.call_args.args[0] == chat_id
+        
+        db = next(get_db())
+        alert = db.get(PriceAlert, first)
+        assert not alert.is_active and alert.triggered_price == 0.85
+        assert len(engine.list_alerts(user_id)) == 1
+    
+    def test_cancelled_alerts_do_not_fire(self):
+        """A cancelled alert is skipped when its threshold is crossed."""
+        user_id, _ = create_user()
+        engine = PriceAlertEngine()
+        engine.bind(MagicMock())
+        alert_id = engine.create_alert(user_id, 'm', 'YES', 'below', 0.4)['alert_id']
+        assert engine.cancel_alert(user_id, alert_id)['success']
+        assert engine.on_tick('m', 'YES', 0.1) == []
+        engine.send_queue.send_message.assert_not_called()
+    
+    def test_validation_and_reload(self):
+        """Bad input is rejected and active alerts survive a reload."""
+        user_id, _ = create_user()
+        engine = PriceAlertEngine(max_per_user=1)
+        assert not engine.create_alert(user_id, 'm', 'YES', 'sideways', 0.5)['success']
+        assert not engine.create_alert(user_id, 'm', 'YES', 'above', 1.5)['success']
+        alert_id = engine.create_alert(user_id, 'm', 'YES', 'above', 0.5)['alert_id']
+        assert not engine.create_alert(user_id, 'm', 'NO', 'above', 0.5)['success']
+        
+        restarted = PriceAlertEngine()
+        restarted.load()
+        assert alert_id in restarted.alerts
+    
+    @pytest.mark.asyncio
+    async def test_poll_feeds_ticks(self):
+        """Only markets with open alerts are polled."""
+        user_id, _ = create_user()
+        engine = PriceAlertEngine()
+        engine.bind(MagicMock())
+        market = f'm-{uuid.uuid4().hex[:8]}'
+        alert_id = engine.create_alert(user_id, market, 'NO', 'above', 0.5)['alert_id']
+        engine.clob_api = AsyncMock()
+        engine.clob_api.get_market_prices.return_value = {'yes_price': 0.4, 'no_price': 0.6}
+        
+        await engine.poll_once()
+        engine.clob_api.get_market_prices.assert_awaited_once_with(market)
+        assert alert_id not in engine.alerts
+        assert engine.books == {}
@@ -0,0 +1,95 @@
+"""
+Tests for the client-side API rate limiter
+"""
+
+import pytest
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from apis.rate_limiter import (
+    RateLimiter, PRIORITY_USER, PRIORITY_BACKGROUND, background_requests, current_priority
+)
+from apis.resilience import ResilientClient, RetryPolicy
+
+class TestRateLimiter:
+    """Test token bucket pacing, priorities and 429 back-off."""
+    
+    @pytest.mark.asyncio
+    async def test_burst_then_paced(self):
+        """Requests within the burst go straight through; the rest wait."""
+        limiter = RateLimiter('test', rate=50, burst=2)
+        waits = [await limiter.acquire() for _ in range(3)]
+        assert waits[:2] == [0.0, 0.0]
+        assert waits[2] > 0
+        assert limiter.get_metrics()['delayed'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_user_requests_overtake_background(self):
+        """Queued user-facing requests are served before background ones."""
+        limiter = RateLimiter('test', rate=100, burst=1)
+        await limiter.acquire()
+        order = []
+        
+        async def call(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+        
+        background = [asyncio.create_task(call(f'bg{i}', PRIORITY_BACKGROUND)) for i in range(3)]
+        await asyncio.sleep(0)
+        user = asyncio.create_task(call('user', PRIORITY_USER))
+        await asyncio.gather(user, *background)
+        assert order[0] == 'user'
+        assert set(limiter.get_metrics()['wait_ms_by_priority']) == {'user', 'background'}
+    
+    @pytest.mark.asyncio
+    async def test_penalize_pauses_and_slows(self):
+        """A 429 pauses for Retry-After and halves the rate until requests succeed."""
+        limiter = RateLimiter('test', rate=100, burst=5)
+        limiter.penalize(0.05)
+        assert limiter.rate == 50
+        waited = await limiter.acquire()
+        assert waited >= 0.04
+        
+        for _ in range(20):
+            limiter.record_success()
+        assert limiter.rate == 100
+    
+    def test_background_context(self):
+        """background_requests() lowers the priority only inside the block."""
+        assert current_priority() == PRIORITY_USER
+        with background_requests():
+            assert current_priority() == PRIORITY_BACKGROUND
+        assert current_priority() == PRIORITY_USER
+
+class TestClientRateLimiting:
+    """Test 429 handling in the resilient client."""
+    
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honored(self):
+        """A 429 is retried after Retry-After without tripping the breaker."""
+        hits = []
+        
+        async def handle(request):
+            hits.append(asyncio.get_running_loop().time())
+            if len(hits) == 1:
+                return web.json_response({}, status=429, headers={'Retry-After': '0.1'})
+            return web.json_response({'ok': True})
+        
+        app = web.Application()
+        app.router.add_get('/x', handle)
+        server = TestServer(app)
+        await server.start_server()
+        client = ResilientClient('test_429', str(server.make_url('')).rstrip('/'),
+                                 retry_policy=RetryPolicy(max_attempts=2), api_key='secret')
+        try:
+            assert await client.get('/x', 'x') == {'ok': True}
+            assert hits[1] - hits[0] >= 0.09
+            metrics = client.upstream.get_metrics()
+            assert metrics['rate_limited'] == 1
+            assert metrics['breaker_failures'] == 0
+            assert metrics['rate_limiter']['throttled'] == 1
+            assert client.key_limiter.get_metrics()['acquired'] == 2
+            assert 'secret' not in client.key_limiter.name
+        finally:
+            await client.upstream.close()
+            await server.close()
@@ -0,0 +1,179 @@
+"""
+Tests for the shared API resilience layer
+"""
+
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from apis.errors import APIStatusError, APITimeoutError, CircuitOpenError
+from apis.resilience import CircuitBreaker, ResilientClient, RetryPolicy, OPEN, CLOSED, HALF_OPEN
+
+class FlakyUpstream:
+    """aiohttp app whose responses are scripted per test."""
+    
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.hits = 0
+    
+    async def handle(self, request):
+        self.hits += 1
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == 'slow':
+            await asyncio.sleep(1)
+            status = 200
+        return web.json_response({'hits': self.hits}, status=status)
+    
+    async def serve(self):
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self.handle)
+        server = TestServer(app)
+        await server.start_server()
+        return server
+
+def make_client(name, server, **kwargs):
+    return ResilientClient(name, str(server.make_url('')).rstrip('/'),
+                           retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001), **kwargs)
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+    
+    def test_opens_after_threshold_and_probes_once(self):
+        """The breaker opens after N failures and lets a single probe through."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+class TestResilientClient:
+    """Test retries, breaker integration and cache fallback."""
+    
+    @pytest.mark.asyncio
+    async def test_get_retries_server_errors(self):
+        """Idempotent GETs are retried on 5xx."""
+        upstream = FlakyUpstream([503, 502])
+        server = await upstream.serve()
+        try:
+            client = make_client('test_retry', server)
+            assert await client.get('/x', 'x') == {'hits': 3}
+            assert client.upstream.metrics['retries'] == 2
+        finally:
+            await client.upstream.close()
+            await server.close()
+    
+    @pytest.mark.asyncio
+    async def test_post_is_not_retried(self):
+        """Non-idempotent requests get a single attempt."""
+        upstream = FlakyUpstream([500])
+        server = await upstream.serve()
+        try:
+            client = make_client('test_post', server)
+            with pytest.raises(APIStatusError):
+                await client.post('/orders', 'orders', {'size': 1})
+            assert upstream.hits == 1
+        finally:
+            await client.upstream.close()
+            await server.close()
+    
+    @pytest.mark.asyncio
+    async def test_client_error_does_not_trip_breaker(self):
+        """A 4xx is raised immediately and counts as a healthy upstream."""
+        upstream = FlakyUpstream([404])
+        server = await upstream.serve()
+        try:
+            client = make_client('test_4xx', server)
+            with pytest.raises(APIStatusError) as exc:
+                await client.get('/missing', 'x')
+            assert exc.value.status == 404
+            assert upstream.hits == 1
+            assert client.upstream.breaker.failures == 0
+        finally:
+            await client.upstream.close()
+            await server.close()
+    
+    @pytest.mark.asyncio
+    async def test_open_breaker_serves_cached_response(self):
+        """Once the breaker opens, cached GETs are served and others fail fast."""
+        upstream = FlakyUpstream([200, 500, 500, 500])
+        server = await upstream.serve()
+        try:
+            client = make_client('test_open', server)
+            client.upstream.breaker.failure_threshold = 3
+            client.upstream.breaker.reset_timeout = 60
+            client.upstream.coalescer.ttl = 0
+            assert await client.get('/cached', 'x') == {'hits': 1}
+            
+            # Retries exhausted: the breaker opens and the last good value is served
+            assert await client.get('/cached', 'x') == {'hits': 1}
+            assert client.upstream.breaker.state == OPEN
+            
+            hits = upstream.hits
+            assert await client.get('/cached', 'x') == {'hits': 1}
+            with pytest.raises(CircuitOpenError):
+                await client.get('/uncached', 'x')
+            assert upstream.hits == hits
+            assert client.upstream.get_metrics()['short_circuited'] == 2
+        finally:
+            await client.upstream.close()
+            await server.close()
+    
+    @pytest.mark.asyncio
+    async def test_per_endpoint_timeout(self):
+        """Each endpoint uses its own timeout."""
+        upstream = FlakyUpstream(['slow', 'slow', 'slow'])
+        server = await upstream.serve()
+        try:
+            client = make_client('test_timeout', server, timeouts={'fast': 0.05})
+            with pytest.raises(APITimeoutError):
+                await client.get('/slow', 'fast')
+            assert client.upstream.metrics['timeouts'] == 3
+        finally:
+            await client.upstream.close()
+            await server.close()
+
+class TestCoalescing:
+    """Test single-flight merging and micro-caching of GETs."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_gets_share_one_request(self):
+        """Identical concurrent GETs hit the upstream once; a repeat is a micro-cache hit."""
+        upstream = FlakyUpstream([])
+        server = await upstream.serve()
+        try:
+            client = make_client('test_coalesce', server)
+            results = await asyncio.gather(*[client.get('/markets/1', 'x', {'a': True}) for _ in range(10)])
+            assert results == [{'hits': 1}] * 10
+            assert await client.get('/markets/1', 'x', {'a': True}) == {'hits': 1}
+            assert await client.get('/markets/2', 'x') == {'hits': 2}
+            
+            metrics = client.upstream.coalescer.get_metrics()
+            assert metrics['fetches'] == 2
+            assert metrics['merged'] == 9
+            assert metrics['micro_hits'] == 1
+        finally:
+            await client.upstream.close()
+            await server.close()
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_fetch(self):
+        """Other waiters still get the result when one caller is cancelled."""
+        upstream = FlakyUpstream(['slow'])
+        server = await upstream.serve()
+        try:
+            client = make_client('test_coalesce_cancel', server)
+            first = asyncio.create_task(client.get('/slow', 'x'))
+            second = asyncio.create_task(client.get('/slow', 'x'))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            assert await second == {'hits': 1}
+            assert first.cancelled()
+        finally:
+            await client.upstream.close()
+            await server.close()
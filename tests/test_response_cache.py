@@ -0,0 +1,106 @@
+"""
+Tests for the stale-while-revalidate response cache
+"""
+
+import pytest
+import asyncio
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import apis.response_cache as response_cache
+from apis.response_cache import CacheEntry, CachePolicy, ResponseCache
+from apis.resilience import ResilientClient
+
+class VersionedUpstream:
+    """Serves a versioned body with an ETag and honours If-None-Match."""
+    
+    def __init__(self):
+        self.version = 1
+        self.requests = []
+    
+    async def handle(self, request):
+        self.requests.append(request.headers.get('If-None-Match'))
+        etag = f'"v{self.version}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.json_response({'version': self.version}, headers={'ETag': etag})
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResponseCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(response_cache, '_response_cache', cache)
+    return cache
+
+async def serve(upstream):
+    app = web.Application()
+    app.router.add_get('/markets/1', upstream.handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+class TestResponseCache:
+    """Test tiers, eviction and stale-while-revalidate reads."""
+    
+    @pytest.mark.asyncio
+    async def test_size_based_eviction(self):
+        """The least recently used entries go first once the byte budget is exceeded."""
+        cache = ResponseCache(max_bytes=60)
+        expires = time.time() + 60
+        await cache.set('a', CacheEntry('x' * 20, None, time.time(), expires))
+        await cache.set('b', CacheEntry('y' * 20, None, time.time(), expires))
+        await cache.get('a')
+        await cache.set('c', CacheEntry('z' * 20, None, time.time(), expires))
+        assert await cache.get('b') is None
+        assert (await cache.get('a')).value == 'x' * 20
+        assert cache.metrics['evictions'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        """Entries written to disk are found by a new cache instance."""
+        first = ResponseCache(disk_path=str(tmp_path))
+        await first.set(('k', 1), CacheEntry({'a': 1}, '"e"', time.time(), time.time() + 60))
+        second = ResponseCache(disk_path=str(tmp_path))
+        entry = await second.get(('k', 1))
+        assert entry.value == {'a': 1}
+        assert entry.etag == '"e"'
+        assert second.metrics['disk_hits'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_stale_served_while_revalidating(self, cache):
+        """A stale entry is returned at once and refreshed with If-None-Match."""
+        upstream = VersionedUpstream()
+        server = await serve(upstream)
+        client = ResilientClient('test_swr', str(server.make_url('')).rstrip('/'),
+                                 cache_policies={'market': CachePolicy(ttl=0, stale_ttl=60)})
+        client.upstream.coalescer.ttl = 0
+        try:
+            assert await client.get('/markets/1', 'market') == {'version': 1}
+            
+            upstream.version = 2
+            assert await client.get('/markets/1', 'market') == {'version': 1}
+            await asyncio.gather(*cache._refreshing.values())
+            assert await client.get('/markets/1', 'market') == {'version': 2}
+            
+            await asyncio.gather(*cache._refreshing.values())
+            assert upstream.requests == [None, '"v1"', '"v2"']
+            assert cache.metrics['stale_hits'] == 2
+            assert cache.metrics['not_modified'] == 1
+        finally:
+            await client.upstream.close()
+            await server.close()
+    
+    @pytest.mark.asyncio
+    async def test_fresh_entry_skips_upstream(self, cache):
+        """Within the TTL the cached body is served without a request."""
+        upstream = VersionedUpstream()
+        server = await serve(upstream)
+        client = ResilientClient('test_fresh', str(server.make_url('')).rstrip('/'),
+                                 cache_policies={'market': CachePolicy(ttl=60)})
+        try:
+            for _ in range(3):
+                assert await client.get('/markets/1', 'market') == {'version': 1}
+            assert len(upstream.requests) == 1
+            assert cache.metrics['fresh_hits'] == 2
+        finally:
+            await client.upstream.close()
+            await server.close()
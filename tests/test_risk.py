@@ -0,0 +1,86 @@
+"""
+Tests for the in-memory risk book
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from database import init_db, get_db, User, Trade
+from services.risk import RiskBook, RollingCounter
+
+class TestRollingCounter:
+    """Test the ring-bucket sliding window."""
+
+    def test_old_buckets_expire(self):
+        """Amounts leave the window one bucket at a time."""
+        counter = RollingCounter(window=100.0, buckets=10)
+        counter.add(5.0, at=1000.0)
+        counter.add(3.0, at=1055.0)
+        assert counter.value(now=1060.0) == 8.0
+        assert counter.value(now=1100.0) == 3.0
+        assert counter.value(now=1160.0) == 0.0
+
+    def test_idle_gap_clears_ring(self):
+        """A gap longer than the window empties every bucket."""
+        counter = RollingCounter(window=100.0, buckets=10)
+        counter.add(5.0, at=1000.0)
+        counter.add(2.0, at=5000.0)
+        assert counter.value(now=5000.0) == 2.0
+
+class TestRiskBook:
+    """Test pre-trade checks and order accounting."""
+
+    def test_record_is_idempotent_and_release_reverts(self):
+        """Recording a key twice counts once; releasing it undoes volume and exposure."""
+        risk = RiskBook()
+        assert risk.record('k1', 1, 'm', 'buy', 40.0)
+        assert not risk.record('k1', 1, 'm', 'BUY', 40.0)
+        assert risk.daily_volume(1) == 40.0
+        assert risk.position(1, 'm') == 40.0
+
+        assert risk.release('k1')
+        assert not risk.release('k1')
+        assert risk.daily_volume(1) == 0.0
+        assert risk.position(1, 'm') == 0.0
+
+    def test_check_limits(self):
+        """Daily volume applies to both sides, position size only to buys."""
+        risk = RiskBook()
+        risk.record('k1', 1, 'm', 'BUY', 80.0)
+        assert risk.check(1, 'm', 'BUY', 10.0, max_daily_volume=100.0, max_position_size=100.0) is None
+        assert 'Daily volume' in risk.check(1, 'm', 'SELL', 30.0, max_daily_volume=100.0)
+        assert 'Position' in risk.check(1, 'm', 'BUY', 30.0, max_position_size=100.0)
+        assert risk.check(1, 'm', 'SELL', 30.0, max_position_size=100.0) is None
+        assert risk.get_metrics()['rejections'] == 2
+
+    def test_settled_orders_keep_volume(self):
+        """A filled order can no longer be released."""
+        risk = RiskBook()
+        risk.record('k1', 1, 'm', 'BUY', 25.0)
+        risk.settle('k1')
+        assert not risk.release('k1')
+        assert risk.position(1, 'm') == 25.0
+
+    def test_rebuild_from_trades(self):
+        """Live trades inside the window count; old and failed ones do not add volume."""
+        init_db()
+        db = next(get_db())
+        user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+        db.add(user)
+        db.flush()
+        now = datetime.utcnow()
+        for status, amount, created_at in [
+            ('filled', 10.0, now - timedelta(hours=1)),
+            ('pending', 5.0, now),
+            ('failed', 50.0, now),
+            ('filled', 7.0, now - timedelta(days=2))
+        ]:
+            db.add(Trade(user_id=user.id, market_id='m', outcome='YES', side='BUY', order_type='LIMIT',
+                         shares=amount * 2, price=0.5, total_amount=amount, status=status,
+                         created_at=created_at))
+        db.commit()
+
+        risk = RiskBook()
+        risk.rebuild()
+        assert risk.daily_volume(user.id) == 15.0
+        assert risk.position(user.id, 'm') == 22.0
+        assert risk.get_metrics()['tracked_orders'] >= 1
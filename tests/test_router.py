@@ -0,0 +1,75 @@
+"""
+Tests for the callback query router
+"""
+
+import pytest
+from types import SimpleNamespace
+from bot.router import CallbackRouter, rate_limit
+
+def make_update(data, user_id=1):
+    """Build a minimal callback query update."""
+    query = SimpleNamespace(data=data, from_user=SimpleNamespace(id=user_id))
+    return SimpleNamespace(callback_query=query)
+
+class TestCallbackRouter:
+    """Test exact, prefix and middleware dispatch."""
+    
+    @pytest.mark.asyncio
+    async def test_exact_and_prefix_routes(self):
+        """Exact data wins; prefixed data gets a typed payload."""
+        router = CallbackRouter()
+        seen = []
+        
+        async def record(ctx):
+            seen.append((ctx.route.name, ctx.payload))
+        
+        router.add("positions", record)
+        router.add_prefix("view_market_", record)
+        router.add_prefix("page_", record, payload_type=int)
+        
+        assert await router.dispatch(make_update("positions"), None)
+        assert await router.dispatch(make_update("view_market_0xabc"), None)
+        assert await router.dispatch(make_update("page_3"), None)
+        assert not await router.dispatch(make_update("page_x"), None)
+        assert not await router.dispatch(make_update("unknown"), None)
+        
+        assert seen == [("positions", None), ("view_market_*", "0xabc"), ("page_*", 3)]
+        assert router.get_metrics()['routes']['positions']['count'] == 1
+        assert router.get_metrics()['unmatched'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_longest_prefix_wins(self):
+        """Overlapping prefixes resolve to the most specific route."""
+        router = CallbackRouter()
+        seen = []
+        
+        async def short(ctx):
+            seen.append('short')
+        
+        async def long(ctx):
+            seen.append(ctx.payload)
+        
+        router.add_prefix("copy_", short)
+        router.add_prefix("copy_referral_", long)
+        
+        await router.dispatch(make_update("copy_referral_ABC123"), None)
+        await router.dispatch(make_update("copy_other"), None)
+        
+        assert seen == ["ABC123", "short"]
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_middleware(self):
+        """Repeat taps inside the interval are dropped per user."""
+        router = CallbackRouter()
+        calls = []
+        
+        async def handler(ctx):
+            calls.append(ctx.telegram_id)
+        
+        router.add("refresh", handler, middleware=[rate_limit(60)])
+        
+        await router.dispatch(make_update("refresh", user_id=1), None)
+        await router.dispatch(make_update("refresh", user_id=1), None)
+        await router.dispatch(make_update("refresh", user_id=2), None)
+        
+        assert calls == [1, 2]
@@ -0,0 +1,72 @@
+"""
+Tests for the single event loop runtime
+"""
+
+import pytest
+import asyncio
+from runtime import BotRuntime
+
+class TestBotRuntime:
+    """Test runtime lifecycle ordering."""
+    
+    @pytest.mark.asyncio
+    async def test_start_and_stop_order(self):
+        """Components start in order and stop in reverse order."""
+        runtime = BotRuntime()
+        events = []
+        
+        for name in ('health', 'prices', 'telegram'):
+            async def start(name=name):
+                events.append(f'start:{name}')
+            async def stop(name=name):
+                events.append(f'stop:{name}')
+            runtime.add_component(name, start, stop)
+        
+        await runtime.start()
+        assert runtime.get_status()['status'] == 'healthy'
+        await runtime.stop()
+        
+        assert events == [
+            'start:health', 'start:prices', 'start:telegram',
+            'stop:telegram', 'stop:prices', 'stop:health'
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_failed_start_unwinds(self):
+        """A failing component stops everything started before it."""
+        runtime = BotRuntime()
+        events = []
+        
+        async def ok_start():
+            events.append('start:ok')
+        async def ok_stop():
+            events.append('stop:ok')
+        async def bad_start():
+            raise RuntimeError('boom')
+        
+        runtime.add_component('ok', ok_start, ok_stop)
+        runtime.add_component('bad', bad_start)
+        
+        with pytest.raises(RuntimeError):
+            await runtime.start()
+        
+        assert events == ['start:ok', 'stop:ok']
+    
+    @pytest.mark.asyncio
+    async def test_background_task_cancelled_on_stop(self):
+        """Background tasks run on the shared loop and are cancelled on stop."""
+        runtime = BotRuntime()
+        ticks = []
+        
+        async def loop_forever():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+        
+        runtime.add_background_task('ticker', loop_forever)
+        await runtime.start()
+        await asyncio.sleep(0.05)
+        await runtime.stop()
+        
+        assert ticks
+        assert 'ticker' not in runtime.tasks
@@ -0,0 +1,59 @@
+"""
+Tests for skip-if-unchanged screen rendering
+"""
+
+import pytest
+from types import SimpleNamespace
+from bot import screens
+
+class FakeQuery:
+    """Callback query stand-in that counts edits."""
+    
+    def __init__(self, chat_id=1, message_id=100):
+        self.message = SimpleNamespace(chat_id=chat_id, message_id=message_id)
+        self.edits = []
+    
+    async def edit_message_text(self, text, reply_markup=None, parse_mode=None):
+        self.edits.append(text)
+
+class TestScreenRenderer:
+    """Test that identical renders skip the Telegram call."""
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_render_is_skipped(self):
+        """Rendering the same screen twice edits the message once."""
+        renderer = screens.ScreenRenderer()
+        query = FakeQuery()
+        
+        assert await renderer.show(query, screens.render_help()) is True
+        assert await renderer.show(query, screens.render_help()) is False
+        assert query.edits == [screens.HELP_TEXT]
+        assert renderer.get_metrics()['skipped'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_changed_render_is_sent(self):
+        """Different content or a different message is always sent."""
+        renderer = screens.ScreenRenderer()
+        query = FakeQuery()
+        other = FakeQuery(message_id=101)
+        
+        await renderer.show(query, screens.render_referral('ABC', 1, 0.0))
+        await renderer.show(query, screens.render_referral('ABC', 2, 0.0))
+        await renderer.show(other, screens.render_referral('ABC', 2, 0.0))
+        
+        assert len(query.edits) == 2
+        assert len(other.edits) == 1
+    
+    def test_positions_template(self):
+        """Positions render with a total P&L footer."""
+        positions = [
+            SimpleNamespace(unrealized_pnl=2.0, market_title='A', outcome='YES',
+                            shares=1.0, average_price=0.5, current_price=0.6),
+            SimpleNamespace(unrealized_pnl=-1.0, market_title='B', outcome='NO',
+                            shares=1.0, average_price=0.5, current_price=0.4)
+        ]
+        text, markup = screens.render_positions(positions)
+        
+        assert text.startswith(screens.POSITIONS_HEADER)
+        assert text.endswith("**Total P&L:** $1.00")
+        assert markup is screens.BACK_TO_MAIN_MARKUP
@@ -0,0 +1,73 @@
+"""
+Tests for the outbound Telegram send queue
+"""
+
+import pytest
+import asyncio
+from telegram.error import RetryAfter
+from bot.send_queue import SendQueue, PRIORITY_TRADE, PRIORITY_MARKETING
+
+class FakeBot:
+    """Records calls instead of talking to Telegram."""
+    
+    def __init__(self, fail_first_with=None):
+        self.calls = []
+        self.fail_first_with = fail_first_with
+    
+    async def send_message(self, **kwargs):
+        if self.fail_first_with:
+            error, self.fail_first_with = self.fail_first_with, None
+            raise error
+        self.calls.append(('send_message', kwargs['chat_id'], kwargs['text']))
+        return len(self.calls)
+    
+    async def edit_message_text(self, **kwargs):
+        self.calls.append(('edit_message_text', kwargs['chat_id'], kwargs['text']))
+        return len(self.calls)
+
+class TestSendQueue:
+    """Test rate shaping, priorities and coalescing."""
+    
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        """Trade confirmations go out before marketing messages."""
+        bot = FakeBot()
+        queue = SendQueue(bot, global_rate=1000, private_rate=1000)
+        marketing = queue.send_message(1, 'promo', priority=PRIORITY_MARKETING)
+        trade = queue.send_message(2, 'filled', priority=PRIORITY_TRADE)
+        
+        await queue.start()
+        await asyncio.gather(marketing, trade)
+        await queue.stop()
+        
+        assert [call[2] for call in bot.calls] == ['filled', 'promo']
+    
+    @pytest.mark.asyncio
+    async def test_edits_are_coalesced(self):
+        """Pending edits of the same message collapse into the newest one."""
+        bot = FakeBot()
+        queue = SendQueue(bot, global_rate=1000, private_rate=1000)
+        first = queue.edit_message_text(1, 10, 'v1')
+        second = queue.edit_message_text(1, 10, 'v2')
+        
+        await queue.start()
+        results = await asyncio.gather(first, second)
+        await queue.stop()
+        
+        assert bot.calls == [('edit_message_text', 1, 'v2')]
+        assert results[0] == results[1]
+        assert queue.get_metrics()['coalesced'] == 1
+    
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honoured(self):
+        """A 429 pauses the queue and the message is retried."""
+        bot = FakeBot(fail_first_with=RetryAfter(0))
+        queue = SendQueue(bot, global_rate=1000, private_rate=1000)
+        future = queue.send_message(1, 'hello')
+        
+        await queue.start()
+        await asyncio.wait_for(future, timeout=2)
+        await queue.stop()
+        
+        assert bot.calls == [('send_message', 1, 'hello')]
+        assert queue.get_metrics()['retry_after'] == 1
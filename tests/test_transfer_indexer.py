@@ -0,0 +1,135 @@
+"""
+Tests for the ERC-20 transfer indexer
+"""
+
+import os
+import pytest
+import uuid
+from database import init_db, get_db, User, Wallet, WalletTransfer, IndexerCursor
+from apis.polygon_rpc import PolygonRPC
+from services.transfer_indexer import TransferIndexer, TRANSFER_TOPIC, CURSOR_NAME, get_history
+
+USDC = '0x2791bca1f2de4661ed88a30c99a7a9449aa84174'
+OTHER_TOKEN = '0x' + '22' * 20
+
+def topic(address):
+    return '0x' + '0' * 24 + address[2:].lower()
+
+def transfer_log(token, sender, recipient, value, block, index):
+    return {
+        'address': token,
+        'topics': [TRANSFER_TOPIC, topic(sender), topic(recipient)],
+        'data': hex(value),
+        'transactionHash': '0x' + f'{block:04x}{index:04x}'.rjust(64, '0'),
+        'logIndex': hex(index),
+        'blockNumber': hex(block)
+    }
+
+class FakeNode:
+    """Serves canned logs for whatever range is requested."""
+    
+    def __init__(self, head, logs):
+        self.head = head
+        self.logs = logs
+        self.ranges = []
+    
+    async def block_number(self):
+        return self.head
+    
+    async def call(self, method, params):
+        assert method == 'eth_getLogs'
+        start, end = int(params[0]['fromBlock'], 16), int(params[0]['toBlock'], 16)
+        self.ranges.append((start, end))
+        return [log for log in self.logs if start <= int(log['blockNumber'], 16) <= end]
+    
+    async def batch(self, calls):
+        return [{'timestamp': hex(1700000000 + int(params[0], 16) * 2)} for _, params in calls]
+
+def fresh_address():
+    return '0x' + uuid.uuid4().hex + uuid.uuid4().hex[:8]
+
+class TestTransferIndexer:
+    """Test log filtering, cursor handling and history pages."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        init_db()
+        db = next(get_db())
+        db.query(IndexerCursor).delete()
+        db.commit()
+        self.ours = fresh_address()
+        self.mine_too = fresh_address()
+        user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+        db.add(user)
+        db.flush()
+        db.add_all([Wallet(user_id=user.id, address=self.ours, encrypted_private_key='x'),
+                    Wallet(user_id=user.id, address=self.mine_too, encrypted_private_key='x')])
+        db.commit()
+    
+    @pytest.mark.asyncio
+    async def test_indexes_only_our_transfers_in_ranges(self):
+        """Unrelated and untracked-token logs are dropped; internal transfers get a row per side."""
+        stranger = fresh_address()
+        logs = [
+            transfer_log(USDC, stranger, self.ours, 5 * 10 ** 6, 105, 0),
+            transfer_log(USDC, stranger, fresh_address(), 10 ** 6, 106, 1),
+            transfer_log(OTHER_TOKEN, stranger, self.ours, 1, 107, 0),
+            transfer_log(USDC, self.ours, self.mine_too, 2 * 10 ** 6, 112, 3)
+        ]
+        node = FakeNode(head=100, logs=logs)
+        indexer = TransferIndexer(rpc=node, tokens={'USDC': (USDC, 6)}, confirmations=5, max_blocks=5)
+        
+        # First run starts at the confirmed head
+        assert await indexer.step() == 0
+        node.head = 120
+        stored = 0
+        while indexer.metrics['lag'] or not stored:
+            stored += await indexer.step()
+        assert node.ranges == [(96, 100), (101, 105), (106, 110), (111, 115)]
+        assert stored == 3
+        
+        db = next(get_db())
+        assert db.get(IndexerCursor, CURSOR_NAME).block_number == 115
+        received = db.query(WalletTransfer).filter(WalletTransfer.wallet_address == self.mine_too).one()
+        assert (received.direction, received.amount, received.counterparty) == ('in', 2.0, self.ours)
+        assert received.block_time is not None
+    
+    @pytest.mark.asyncio
+    async def test_history_pages_newest_first(self):
+        """Keyset pages cover every transfer exactly once."""
+        logs = [transfer_log(USDC, fresh_address(), self.ours, i * 10 ** 6, 101 + i // 2, i) for i in range(5)]
+        node = FakeNode(head=100, logs=logs)
+        indexer = TransferIndexer(rpc=node, tokens={'USDC': (USDC, 6)}, confirmations=0)
+        await indexer.step()
+        node.head = 110
+        await indexer.step()
+        
+        page, cursor = get_history(self.ours, limit=2)
+        assert [row.amount for row in page] == [4.0, 3.0]
+        seen = [row.amount for row in page]
+        while cursor is not None:
+            page, cursor = get_history(self.ours, limit=2, before=cursor)
+            seen += [row.amount for row in page]
+        assert seen == [4.0, 3.0, 2.0, 1.0, 0.0]
+
+@pytest.mark.skipif(not os.getenv('ANVIL_RPC_URL'), reason="set ANVIL_RPC_URL to a local anvil or hardhat node")
+class TestDevChain:
+    """Follow blocks mined on a local dev node."""
+    
+    def setup_method(self):
+        init_db()
+        db = next(get_db())
+        db.query(IndexerCursor).delete()
+        db.commit()
+    
+    @pytest.mark.asyncio
+    async def test_follows_mined_blocks(self):
+        """The cursor trails the head by the confirmation depth."""
+        rpc = PolygonRPC(os.getenv('ANVIL_RPC_URL'))
+        indexer = TransferIndexer(rpc=rpc, tokens={'USDC': (USDC, 6)}, confirmations=2)
+        await indexer.step()
+        await rpc.call('evm_mine')
+        await rpc.call('evm_mine')
+        await rpc.call('evm_mine')
+        await indexer.step()
+        assert indexer.metrics['last_block'] == await rpc.block_number() - 2
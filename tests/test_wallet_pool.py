@@ -0,0 +1,74 @@
+"""
+Tests for the pre-generated wallet pool
+"""
+
+import pytest
+import uuid
+from eth_account import Account
+from config import Config
+from database import init_db, get_db, User, Wallet, PooledWallet, decrypt_private_key
+from services.wallet_pool import WalletPool, generate_encrypted_wallets
+from services.wallet_service import WalletService
+
+def create_user():
+    db = next(get_db())
+    user = User(telegram_id=uuid.uuid4().int % 10 ** 12)
+    db.add(user)
+    db.commit()
+    return user.id
+
+class TestWalletPool:
+    """Test refilling and claiming pooled wallets."""
+    
+    def setup_method(self):
+        """Set up test environment."""
+        init_db()
+        db = next(get_db())
+        db.query(PooledWallet).delete()
+        db.commit()
+    
+    @pytest.fixture(autouse=True)
+    def encryption_key(self, monkeypatch):
+        monkeypatch.setattr(Config, 'ENCRYPTION_KEY', 'test-key')
+    
+    def test_generated_keys_decrypt_to_their_address(self):
+        """Each pooled key belongs to its address."""
+        wallets = generate_encrypted_wallets(3)
+        assert len({address for address, _ in wallets}) == 3
+        for address, encrypted in wallets:
+            assert Account.from_key(decrypt_private_key(encrypted)).address == address
+    
+    @pytest.mark.asyncio
+    async def test_refill_in_worker_processes_then_claim(self):
+        """The pool tops up to its target in batches and each claim moves one wallet to a user."""
+        pool = WalletPool(target=5, low_water=2, batch_size=2, workers=2)
+        try:
+            assert await pool.refill() == 5
+            assert await pool.refill() == 0
+        finally:
+            pool.stop()
+        assert pool.count() == 5
+        
+        user_id = create_user()
+        wallet = pool.claim(user_id)
+        assert wallet.user_id == user_id
+        assert pool.count() == 4
+        db = next(get_db())
+        assert db.query(Wallet).filter(Wallet.address == wallet.address).count() == 1
+        assert db.query(PooledWallet).filter(PooledWallet.address == wallet.address).count() == 0
+        metrics = pool.get_metrics()
+        assert (metrics['generated'], metrics['claimed'], metrics['level']) == (5, 1, 4)
+        assert metrics['refill_rate'] > 0
+    
+    @pytest.mark.asyncio
+    async def test_provision_falls_back_when_pool_is_empty(self, monkeypatch):
+        """An empty pool counts a miss and still gives the user a wallet."""
+        pool = WalletPool(workers=1)
+        monkeypatch.setattr('services.wallet_service.get_wallet_pool', lambda: pool)
+        user_id = create_user()
+        try:
+            wallet = await WalletService().provision_wallet(user_id)
+        finally:
+            pool.stop()
+        assert wallet is not None and wallet.user_id == user_id
+        assert pool.get_metrics()['misses'] == 1